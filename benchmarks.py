@@ -0,0 +1,216 @@
+from argparse import ArgumentParser
+from datetime import datetime
+from itertools import islice
+from json import dump
+from multiprocessing import get_context
+from os import chdir, makedirs
+from os.path import abspath
+from platform import platform, python_version
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+try:
+    from resource import getrusage, RUSAGE_SELF
+except ImportError:
+    getrusage = None
+
+from helpers_synthetic_data import SyntheticDataGenerator, write_leads_csv, write_subscriptions_csv, write_names_csv
+
+DEFAULT_ROWS_COUNTS = (10_000, 1_000_000, 10_000_000)
+DEFAULT_NAMES_DICTIONARY_SIZE = 30_000
+_BATCH_SIZE = 100_000
+
+
+def _get_peak_rss_megabytes():
+    """Возвращает пиковый объем резидентной памяти процесса в мегабайтах или None, если resource недоступен"""
+    if getrusage is None:
+        return None
+    return getrusage(RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _iter_batches(values):
+    """Генератор списков значений по _BATCH_SIZE"""
+    values = iter(values)
+    while True:
+        cur_batch = list(islice(values, _BATCH_SIZE))
+        if not cur_batch:
+            return
+        yield cur_batch
+
+
+def _prepare_work_dir(work_dir_path, names_dictionary_size):
+    """Готовит рабочую директорию со справочником имен, как ее ожидают преобразователи"""
+    makedirs(f'{work_dir_path}/csv_dict_helpers', exist_ok=True)
+    makedirs(f'{work_dir_path}/result_csv_files', exist_ok=True)
+    write_names_csv(f'{work_dir_path}/csv_dict_helpers/nature_names.csv', size=names_dictionary_size)
+    chdir(work_dir_path)
+
+
+def _benchmark_transformer(transformer_class, write_source_func, rows_count, compact_rows=False) -> dict:
+    """Замеряет преобразователь по стадиям: чтение, чтение с подготовкой, полный цикл с записью"""
+    src_file_path = abspath('source.csv')
+    dst_dir_path = abspath('result_csv_files')
+    write_source_func(src_file_path, rows_count)
+
+    def new_transformer():
+        return transformer_class(
+            src_file_path=src_file_path, dst_dir_path=dst_dir_path, streaming=True, compact_rows=compact_rows,
+        )
+
+    started_at = perf_counter()
+    for _ in new_transformer()._get_source_rows()[1]:
+        pass
+    read_seconds = perf_counter() - started_at
+
+    transformer = new_transformer()
+    started_at = perf_counter()
+    src_field_names, source_rows = transformer._get_source_rows()
+    for _ in transformer._iter_prepared_source_rows(src_field_names=src_field_names, rows=source_rows):
+        pass
+    read_and_prepare_seconds = perf_counter() - started_at
+
+    transformer = new_transformer()
+    started_at = perf_counter()
+    transformer.extract_data_to_result_file()
+    total_seconds = perf_counter() - started_at
+
+    return {
+        'seconds': total_seconds,
+        'rows_out_count': transformer.rows_out_count,
+        'stages': {
+            'read': read_seconds,
+            'prepare': max(read_and_prepare_seconds - read_seconds, 0.0),
+            'write': max(total_seconds - read_and_prepare_seconds, 0.0),
+        },
+    }
+
+
+def benchmark_lead_conv_to_ringer_dog(rows_count, names_dictionary_size) -> dict:
+    """Замер LeadConvToRingerDogCSVFileTransformer"""
+    from transformers import LeadConvToRingerDogCSVFileTransformer
+    return _benchmark_transformer(LeadConvToRingerDogCSVFileTransformer, write_leads_csv, rows_count)
+
+
+def benchmark_david_platform_to_lead_conv(rows_count, names_dictionary_size) -> dict:
+    """Замер DavidPlatformToLeadConvSubscriptionTransformer"""
+    from transformers import DavidPlatformToLeadConvSubscriptionTransformer
+    return _benchmark_transformer(DavidPlatformToLeadConvSubscriptionTransformer, write_subscriptions_csv, rows_count)
+
+
+def benchmark_lead_conv_to_ringer_dog_compact(rows_count, names_dictionary_size) -> dict:
+    """Замер LeadConvToRingerDogCSVFileTransformer на компактных строках"""
+    from transformers import LeadConvToRingerDogCSVFileTransformer
+    return _benchmark_transformer(LeadConvToRingerDogCSVFileTransformer, write_leads_csv, rows_count, compact_rows=True)
+
+
+def benchmark_david_platform_to_lead_conv_compact(rows_count, names_dictionary_size) -> dict:
+    """Замер DavidPlatformToLeadConvSubscriptionTransformer на компактных строках"""
+    from transformers import DavidPlatformToLeadConvSubscriptionTransformer
+    return _benchmark_transformer(
+        DavidPlatformToLeadConvSubscriptionTransformer, write_subscriptions_csv, rows_count, compact_rows=True,
+    )
+
+
+def benchmark_phone_number_for_ringer_dog(rows_count, names_dictionary_size) -> dict:
+    """Замер PhoneNumberForRingerDog: пообъектная цепочка шагов и пакетный быстрый путь"""
+    from preparers_for_phone_number import PhoneNumberForRingerDog
+    generator = SyntheticDataGenerator()
+    objects_seconds = batch_seconds = 0.0
+    for cur_batch in _iter_batches(generator.dirty_phone() for _ in range(rows_count)):
+        started_at = perf_counter()
+        for cur_phone in cur_batch:
+            PhoneNumberForRingerDog(src_phone_number=cur_phone).prepared_phone_number
+        objects_seconds += perf_counter() - started_at
+
+        started_at = perf_counter()
+        PhoneNumberForRingerDog.prepare_phone_number_strings(src_phone_numbers=cur_batch)
+        batch_seconds += perf_counter() - started_at
+
+    return {'seconds': batch_seconds, 'stages': {'objects': objects_seconds, 'batch': batch_seconds}}
+
+
+def benchmark_list_checker_from_csv_names_file(rows_count, names_dictionary_size) -> dict:
+    """Замер ListCheckerFromCSVNamesFile: загрузка справочника и проверка слов полных имен"""
+    from helpers_file_list_checker import ListCheckerFromCSVNamesFile
+    started_at = perf_counter()
+    list_checker = ListCheckerFromCSVNamesFile(src_file_path=abspath('csv_dict_helpers/nature_names.csv'))
+    load_seconds = perf_counter() - started_at
+
+    generator = SyntheticDataGenerator()
+    check_seconds = 0.0
+    for cur_batch in _iter_batches(generator.full_name() for _ in range(rows_count)):
+        cur_words = [cur_word for cur_full_name in cur_batch for cur_word in cur_full_name.split()]
+        started_at = perf_counter()
+        list_checker.check_values(cur_words)
+        check_seconds += perf_counter() - started_at
+
+    return {'seconds': load_seconds + check_seconds, 'stages': {'load': load_seconds, 'check': check_seconds}}
+
+
+BENCHMARK_CASES = {
+    'lead_conv_to_ringer_dog': benchmark_lead_conv_to_ringer_dog,
+    'david_platform_to_lead_conv': benchmark_david_platform_to_lead_conv,
+    'lead_conv_to_ringer_dog_compact': benchmark_lead_conv_to_ringer_dog_compact,
+    'david_platform_to_lead_conv_compact': benchmark_david_platform_to_lead_conv_compact,
+    'phone_number_for_ringer_dog': benchmark_phone_number_for_ringer_dog,
+    'list_checker_from_csv_names_file': benchmark_list_checker_from_csv_names_file,
+}
+
+
+def _run_case_in_current_process(case_name, rows_count, names_dictionary_size, work_dir_path) -> dict:
+    """Выполняет замер в отдельном процессе, чтобы пиковая память относилась только к нему"""
+    _prepare_work_dir(work_dir_path=work_dir_path, names_dictionary_size=names_dictionary_size)
+    case_result = BENCHMARK_CASES[case_name](rows_count=rows_count, names_dictionary_size=names_dictionary_size)
+    case_result.update({
+        'case': case_name,
+        'rows_count': rows_count,
+        'rows_per_second': rows_count / case_result['seconds'] if case_result['seconds'] else 0.0,
+        'peak_rss_mb': _get_peak_rss_megabytes(),
+    })
+    return case_result
+
+
+def run_benchmarks(case_names, rows_counts, names_dictionary_size) -> dict:
+    """Выполняет замеры каждого случая на каждом объеме данных, каждый - в новом процессе"""
+    results = []
+    spawn_context = get_context('spawn')
+    for cur_rows_count in rows_counts:
+        for cur_case_name in case_names:
+            with TemporaryDirectory() as work_dir_path, spawn_context.Pool(processes=1) as pool:
+                cur_result = pool.apply(
+                    _run_case_in_current_process,
+                    (cur_case_name, cur_rows_count, names_dictionary_size, work_dir_path),
+                )
+            stages_report = ', '.join(
+                f'{cur_stage_name} {cur_seconds:.3f} с' for cur_stage_name, cur_seconds in cur_result['stages'].items()
+            )
+            peak_rss_report = (
+                f'{cur_result["peak_rss_mb"]:.1f} МБ' if cur_result['peak_rss_mb'] is not None else 'не измерен'
+            )
+            print(
+                f'{cur_case_name} [{cur_rows_count}]: {cur_result["rows_per_second"]:.0f} строк/с, '
+                f'пик памяти {peak_rss_report}, стадии: {stages_report}'
+            )
+            results.append(cur_result)
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python_version': python_version(),
+        'platform': platform(),
+        'names_dictionary_size': names_dictionary_size,
+        'results': results,
+    }
+
+
+if __name__ == '__main__':
+    argument_parser = ArgumentParser(description='Замеры пропускной способности преобразователей и подготовщиков')
+    argument_parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS_COUNTS)
+    argument_parser.add_argument('--cases', nargs='+', choices=tuple(BENCHMARK_CASES), default=tuple(BENCHMARK_CASES))
+    argument_parser.add_argument('--names-dictionary-size', type=int, default=DEFAULT_NAMES_DICTIONARY_SIZE)
+    argument_parser.add_argument('--output', default='bench_results.json')
+    arguments = argument_parser.parse_args()
+
+    benchmark_results = run_benchmarks(
+        case_names=arguments.cases, rows_counts=arguments.rows, names_dictionary_size=arguments.names_dictionary_size,
+    )
+    with open(arguments.output, 'w', encoding='utf-8') as write_obj:
+        dump(benchmark_results, write_obj, ensure_ascii=False, indent=2)
@@ -0,0 +1,248 @@
+from asyncio import Queue, Semaphore, gather, get_running_loop, run
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pickle import dumps, loads
+from time import perf_counter
+from uuid import uuid4
+
+from helpers_batch_runner import BatchTransformRunner, BatchTransformResult, FileTransformResult, \
+    set_src_file_info, set_transformer_info
+from helpers_manifest import get_transformer_config
+
+DEFAULT_QUEUE_SIZE = 4
+DEFAULT_BLOCK_ROWS = 10000
+DEFAULT_MAX_CONCURRENT_FILES = 4
+_WORKER_TRANSFORMERS_MAX_COUNT = 16
+_worker_transformers = {}
+
+
+def read_rows_block(rows, block_rows) -> list:
+    """Читает из генератора исходных строк блок до block_rows строк"""
+    return list(islice(rows, block_rows))
+
+
+def prepare_rows_block(transformer, src_field_names, rows) -> tuple:
+    """Готовит блок исходных строк. Выполняется в потоке или в процессе пула стадии подготовки"""
+    return transformer.prepare_rows_block(src_field_names=src_field_names, rows=rows)
+
+
+def prepare_rows_block_in_worker(transformer_key, src_field_names, rows, transformer_state=None):
+    """Готовит блок исходных строк в процессе пула копией преобразователя, созданной один раз на файл
+
+    Копия хранится в процессе по transformer_key, поэтому для блоков передаются только ключ и строки,
+    а скомпилированные функции подготовки и кеши подготовщиков переиспользуются между блоками.
+    Если копии в процессе еще нет, она восстанавливается из transformer_state (pickle преобразователя),
+    без transformer_state возвращается None - блок нужно отправить повторно с состоянием
+
+    """
+    transformer = _worker_transformers.get(transformer_key)
+    if transformer is None:
+        if transformer_state is None:
+            return None
+        if len(_worker_transformers) >= _WORKER_TRANSFORMERS_MAX_COUNT:
+            _worker_transformers.pop(next(iter(_worker_transformers)))
+        transformer = _worker_transformers[transformer_key] = loads(transformer_state)
+    return prepare_rows_block(transformer, src_field_names, rows)
+
+
+async def extract_data_to_result_file_pipelined(
+        transformer, queue_size=DEFAULT_QUEUE_SIZE, block_rows=DEFAULT_BLOCK_ROWS, transform_executor=None
+):
+    """Готовит результирующий файл конвейером из задач чтения, подготовки и записи блоков строк
+
+    Задачи связаны очередями по queue_size блоков из block_rows строк: при заполнении очереди
+    предыдущая стадия ждет, поэтому в памяти находится не больше 2 * queue_size блоков.
+    Чтение и запись выполняются в потоках, подготовка - в transform_executor
+    (None - в потоке, ProcessPoolExecutor - в процессах: преобразователь сериализуется один раз на файл
+    и восстанавливается в каждом процессе при первом блоке, дальше передаются только строки блоков).
+    Пока блок готовится, следующий читается, а предыдущий пишется на диск.
+
+    Преобразователи, не подходящие для конвейера (_is_pipelined_extraction), обрабатываются
+    extract_data_to_result_file в отдельном потоке
+
+    """
+    loop = get_running_loop()
+    if not transformer._is_pipelined_extraction():
+        await loop.run_in_executor(None, transformer.extract_data_to_result_file)
+        return
+
+    src_field_names, source_rows = await loop.run_in_executor(None, transformer._get_source_rows)
+    source_queue = Queue(maxsize=queue_size)
+    result_queue = Queue(maxsize=queue_size)
+    is_process_executor = isinstance(transform_executor, ProcessPoolExecutor)
+    transformer_key = uuid4().hex if is_process_executor else None
+    transformer_state = await loop.run_in_executor(None, dumps, transformer) if is_process_executor else None
+
+    async def prepare_block(cur_block):
+        if not is_process_executor:
+            return await loop.run_in_executor(
+                transform_executor, prepare_rows_block, transformer, src_field_names, cur_block,
+            )
+        block_result = await loop.run_in_executor(
+            transform_executor, prepare_rows_block_in_worker, transformer_key, src_field_names, cur_block,
+        )
+        if block_result is None:
+            block_result = await loop.run_in_executor(
+                transform_executor, prepare_rows_block_in_worker, transformer_key, src_field_names, cur_block,
+                transformer_state,
+            )
+        return block_result
+
+    async def read_blocks():
+        while True:
+            cur_block = await loop.run_in_executor(None, read_rows_block, source_rows, block_rows)
+            await source_queue.put(cur_block)
+            if not cur_block:
+                return
+
+    async def prepare_blocks():
+        while True:
+            cur_block = await source_queue.get()
+            if not cur_block:
+                await result_queue.put(None)
+                return
+            prepared_rows, rows_in_count, rows_out_count = await prepare_block(cur_block)
+            if is_process_executor:
+                transformer.add_rows_counts(rows_in_count=rows_in_count, rows_out_count=rows_out_count)
+            await result_queue.put(prepared_rows)
+
+    async def write_blocks():
+        field_names = None
+        write_obj = await loop.run_in_executor(None, open, transformer._get_tmp_result_file_path(), 'w')
+        try:
+            while True:
+                prepared_rows = await result_queue.get()
+                if prepared_rows is None:
+                    break
+                cur_field_names = await loop.run_in_executor(
+                    None, transformer._write_csv_rows, write_obj, iter(prepared_rows), field_names is None,
+                )
+                field_names = field_names if field_names else cur_field_names
+        finally:
+            await loop.run_in_executor(None, write_obj.close)
+        await loop.run_in_executor(None, transformer._commit_tmp_result_file)
+
+    tasks = [loop.create_task(read_blocks()), loop.create_task(prepare_blocks()), loop.create_task(write_blocks())]
+    try:
+        await gather(*tasks)
+    except BaseException:
+        for cur_task in tasks:
+            cur_task.cancel()
+        raise
+
+
+async def transform_file_async(
+        transformer_class, src_file_path, dst_dir_path, transformer_kwargs, compute_src_file_hash=False,
+        queue_size=DEFAULT_QUEUE_SIZE, block_rows=DEFAULT_BLOCK_ROWS, transform_executor=None
+) -> FileTransformResult:
+    """Преобразует один файл конвейером и возвращает результат. Ошибка сохраняется в результат"""
+    loop = get_running_loop()
+    file_result = FileTransformResult(src_file_path=src_file_path)
+    started_at = perf_counter()
+    try:
+        await loop.run_in_executor(None, set_src_file_info, file_result, compute_src_file_hash)
+        transformer = await loop.run_in_executor(None, lambda: transformer_class(
+            src_file_path=src_file_path, dst_dir_path=dst_dir_path, **transformer_kwargs
+        ))
+        await extract_data_to_result_file_pipelined(
+            transformer=transformer, queue_size=queue_size, block_rows=block_rows,
+            transform_executor=transform_executor,
+        )
+        set_transformer_info(file_result=file_result, transformer=transformer)
+    except Exception as e:
+        file_result.error = f'{type(e).__name__}: {e}'
+    file_result.seconds = perf_counter() - started_at
+    return file_result
+
+
+class AsyncBatchTransformRunner(BatchTransformRunner):
+    """Запускает конвейерное преобразование пакета файлов в asyncio
+
+    _max_concurrent_files - количество одновременно обрабатываемых файлов,
+    _transform_workers - количество процессов стадии подготовки, None - подготовка в потоках,
+    _queue_size и _block_rows - размер очередей между стадиями в блоках и размер блока в строках.
+    Подходит для исходных директорий на сетевых дисках: пока одни файлы ждут чтения, другие готовятся
+
+    """
+    _max_concurrent_files = DEFAULT_MAX_CONCURRENT_FILES
+    _transform_workers = None
+    _queue_size = DEFAULT_QUEUE_SIZE
+    _block_rows = DEFAULT_BLOCK_ROWS
+
+    def set_pipeline_params(self, max_concurrent_files, transform_workers, queue_size, block_rows):
+        """Сеттер параметров конвейера"""
+        self._max_concurrent_files = max_concurrent_files
+        self._transform_workers = transform_workers
+        self._queue_size = queue_size
+        self._block_rows = block_rows
+
+    def __init__(
+            self, transformer_class, dst_dir_path, max_concurrent_files=DEFAULT_MAX_CONCURRENT_FILES,
+            transform_workers=None, queue_size=DEFAULT_QUEUE_SIZE, block_rows=DEFAULT_BLOCK_ROWS,
+            use_manifest=False, **transformer_kwargs
+    ):
+        self.set_pipeline_params(
+            max_concurrent_files=max_concurrent_files,
+            transform_workers=transform_workers,
+            queue_size=queue_size,
+            block_rows=block_rows,
+        )
+        super(AsyncBatchTransformRunner, self).__init__(
+            transformer_class=transformer_class,
+            dst_dir_path=dst_dir_path,
+            use_manifest=use_manifest,
+            **transformer_kwargs
+        )
+
+    def _is_metrics_hooks_pickled(self) -> bool:
+        """Признак передачи обработчиков метрик в процессы пула: не передаются
+
+        Преобразователи с обработчиками метрик обрабатываются в потоках,
+        а в процессы подготовки передается состояние преобразователя без обработчиков
+
+        """
+        return False
+
+    async def run_async(self, src_file_paths) -> BatchTransformResult:
+        """Преобразует пакет файлов, не больше _max_concurrent_files одновременно"""
+        started_at = perf_counter()
+        manifest = self._get_manifest()
+        transformer_config = get_transformer_config(self._transformer_class, self._transformer_kwargs)
+        skipped_file_results, src_file_paths_for_transform = self._split_src_file_paths(
+            src_file_paths=src_file_paths, manifest=manifest, transformer_config=transformer_config,
+        )
+        semaphore = Semaphore(self._max_concurrent_files)
+        transform_executor = None
+        if self._transform_workers:
+            self._transformer_class.preload_shared_data_for_pool()
+            transform_executor = ProcessPoolExecutor(max_workers=self._transform_workers)
+
+        async def transform_one_file(src_file_path):
+            async with semaphore:
+                file_result = await transform_file_async(
+                    self._transformer_class, src_file_path, self._dst_dir_path, self._transformer_kwargs,
+                    compute_src_file_hash=self._use_manifest,
+                    queue_size=self._queue_size,
+                    block_rows=self._block_rows,
+                    transform_executor=transform_executor,
+                )
+            self._mark_file_result_done(
+                manifest=manifest, transformer_config=transformer_config, file_result=file_result,
+            )
+            return file_result
+
+        try:
+            file_results = await gather(*map(transform_one_file, src_file_paths_for_transform))
+        finally:
+            if transform_executor:
+                transform_executor.shutdown()
+        if manifest:
+            manifest.save()
+
+        return BatchTransformResult(
+            file_results=skipped_file_results + list(file_results), seconds=perf_counter() - started_at,
+        )
+
+    def run(self, src_file_paths) -> BatchTransformResult:
+        """Преобразует пакет файлов в новом цикле событий asyncio"""
+        return run(self.run_async(src_file_paths=src_file_paths))
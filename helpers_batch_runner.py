@@ -0,0 +1,281 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from os import stat
+from time import perf_counter
+
+from helpers_manifest import ProcessingManifest, get_file_hash, get_transformer_config
+from helpers_metrics import check_metrics_hooks_picklable
+
+
+class FileTransformResult:
+    """Результат преобразования одного файла с метриками пропускной способности"""
+
+    def __init__(self, src_file_path):
+        self.src_file_path = src_file_path
+        self.size_bytes = 0
+        self.rows_in_count = 0
+        self.rows_out_count = 0
+        self.seconds = 0.0
+        self.error = None
+        self.is_skipped = False
+        self.result_file_path = None
+        self.src_file_stat = None
+        self.src_file_hash = None
+        self.metrics = None
+
+    @property
+    def is_success(self):
+        """Признак успешного преобразования"""
+        return self.error is None
+
+    @property
+    def rows_per_second(self):
+        """Возвращает количество исходных строк в секунду"""
+        return self.rows_in_count / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self):
+        """Возвращает объем исходных данных в мегабайтах в секунду"""
+        return self.size_bytes / 1024 / 1024 / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        if not self.is_success:
+            return f'{self.src_file_path}: ошибка {self.error}'
+        if self.is_skipped:
+            return f'{self.src_file_path}: пропущен, результат актуален'
+        return (
+            f'{self.src_file_path}: {self.rows_in_count} -> {self.rows_out_count} строк за {self.seconds:.2f} с, '
+            f'{self.rows_per_second:.0f} строк/с, {self.megabytes_per_second:.2f} МБ/с'
+        )
+
+
+class BatchTransformResult:
+    """Результат преобразования пакета файлов"""
+
+    def __init__(self, file_results, seconds):
+        self.file_results = tuple(file_results)
+        self.seconds = seconds
+
+    @property
+    def failed_file_results(self):
+        """Возвращает результаты файлов, обработанных с ошибкой"""
+        return tuple(cur_result for cur_result in self.file_results if not cur_result.is_success)
+
+    @property
+    def rows_in_count(self):
+        """Возвращает суммарное количество исходных строк"""
+        return sum(cur_result.rows_in_count for cur_result in self.file_results)
+
+    @property
+    def rows_out_count(self):
+        """Возвращает суммарное количество результирующих строк"""
+        return sum(cur_result.rows_out_count for cur_result in self.file_results)
+
+    @property
+    def size_bytes(self):
+        """Возвращает суммарный объем исходных файлов"""
+        return sum(cur_result.size_bytes for cur_result in self.file_results)
+
+    @property
+    def rows_per_second(self):
+        """Возвращает количество исходных строк в секунду для всего пакета"""
+        return self.rows_in_count / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self):
+        """Возвращает объем исходных данных в мегабайтах в секунду для всего пакета"""
+        return self.size_bytes / 1024 / 1024 / self.seconds if self.seconds else 0.0
+
+    @property
+    def skipped_file_results(self):
+        """Возвращает результаты файлов, пропущенных как актуальные"""
+        return tuple(cur_result for cur_result in self.file_results if cur_result.is_skipped)
+
+    def report_lines(self) -> tuple:
+        """Возвращает строки отчета по файлам и итоговую строку пакета"""
+        summary_line = (
+            f'Итого: файлов {len(self.file_results)}, ошибок {len(self.failed_file_results)}, '
+            f'пропущено {len(self.skipped_file_results)}, '
+            f'{self.rows_in_count} -> {self.rows_out_count} строк за {self.seconds:.2f} с, '
+            f'{self.rows_per_second:.0f} строк/с, {self.megabytes_per_second:.2f} МБ/с'
+        )
+        return tuple(str(cur_result) for cur_result in self.file_results) + (summary_line,)
+
+
+def set_src_file_info(file_result, compute_src_file_hash=False):
+    """Заполняет в результате сведения об исходном файле: stat, размер и, при необходимости, хеш"""
+    file_result.src_file_stat = stat(file_result.src_file_path)
+    file_result.size_bytes = file_result.src_file_stat.st_size
+    if compute_src_file_hash:
+        file_result.src_file_hash = get_file_hash(file_result.src_file_path)
+
+
+def set_transformer_info(file_result, transformer):
+    """Заполняет в результате количество строк, путь результата и метрики преобразователя"""
+    file_result.rows_in_count = transformer.rows_in_count
+    file_result.rows_out_count = transformer.rows_out_count
+    file_result.result_file_path = transformer.result_file_path
+    file_result.metrics = transformer.metrics.as_dict() if transformer.metrics else None
+
+
+def transform_file(
+        transformer_class, src_file_path, dst_dir_path, transformer_kwargs, compute_src_file_hash=False
+) -> FileTransformResult:
+    """Преобразует один файл и возвращает результат. Ошибка сохраняется в результат, а не пробрасывается"""
+    file_result = FileTransformResult(src_file_path=src_file_path)
+    started_at = perf_counter()
+    try:
+        set_src_file_info(file_result=file_result, compute_src_file_hash=compute_src_file_hash)
+        transformer = transformer_class(src_file_path=src_file_path, dst_dir_path=dst_dir_path, **transformer_kwargs)
+        transformer.extract_data_to_result_file()
+        set_transformer_info(file_result=file_result, transformer=transformer)
+    except Exception as e:
+        file_result.error = f'{type(e).__name__}: {e}'
+    file_result.seconds = perf_counter() - started_at
+    return file_result
+
+
+class BatchTransformRunner:
+    """Запускает преобразование пакета файлов в пуле процессов
+
+    _max_workers - количество процессов пула, None - по количеству ядер,
+    1 - обработка в текущем процессе без пула
+
+    _use_manifest - признак ведения манифеста в результирующей директории:
+    файлы с актуальным результатом пропускаются, обработанные записываются в манифест
+
+    Обработчики метрик (metrics_hooks) при max_workers != 1 передаются в процессы пула,
+    поэтому несериализуемые обработчики (CallbackMetricsHook с lambda) отклоняются при создании
+
+    """
+    _transformer_class = None
+    _dst_dir_path = None
+    _max_workers = None
+    _use_manifest = False
+    _transformer_kwargs = None
+
+    def set_transformer_class(self, transformer_class):
+        """Сеттер класса преобразователя"""
+        self._transformer_class = transformer_class
+
+    def set_dst_dir_path(self, dst_dir_path):
+        """Сеттер пути результирующей директории"""
+        self._dst_dir_path = dst_dir_path
+
+    def set_max_workers(self, max_workers):
+        """Сеттер количества процессов пула"""
+        self._max_workers = max_workers
+
+    def set_use_manifest(self, use_manifest):
+        """Сеттер признака ведения манифеста"""
+        self._use_manifest = use_manifest
+
+    def __init__(self, transformer_class, dst_dir_path, max_workers=None, use_manifest=False, **transformer_kwargs):
+        self.set_transformer_class(transformer_class=transformer_class)
+        self.set_dst_dir_path(dst_dir_path=dst_dir_path)
+        self.set_max_workers(max_workers=max_workers)
+        self.set_use_manifest(use_manifest=use_manifest)
+        if self._is_metrics_hooks_pickled():
+            check_metrics_hooks_picklable(metrics_hooks=transformer_kwargs.get('metrics_hooks', ()))
+        self._transformer_kwargs = transformer_kwargs
+
+    def _is_metrics_hooks_pickled(self) -> bool:
+        """Признак передачи обработчиков метрик в процессы пула вместе с параметрами преобразователя"""
+        return self._max_workers != 1
+
+    def _iter_file_results_in_current_process(self, src_file_paths):
+        """Последовательно преобразует файлы в текущем процессе"""
+        for cur_file_path in src_file_paths:
+            yield transform_file(
+                self._transformer_class, cur_file_path, self._dst_dir_path, self._transformer_kwargs,
+                self._use_manifest,
+            )
+
+    def _iter_file_results_in_process_pool(self, src_file_paths):
+        """Преобразует файлы в пуле процессов, результаты возвращаются в порядке файлов
+
+        Если процесс пула аварийно завершился (BrokenProcessPool), незавершенные файлы пула
+        преобразуются каждый в отдельном процессе: ошибку получает только файл, завершивший свой процесс
+
+        """
+        self._transformer_class.preload_shared_data_for_pool()
+        with ProcessPoolExecutor(max_workers=self._max_workers) as executor:
+            futures = [
+                executor.submit(
+                    transform_file, self._transformer_class, cur_file_path, self._dst_dir_path,
+                    self._transformer_kwargs, self._use_manifest,
+                )
+                for cur_file_path in src_file_paths
+            ]
+            for cur_file_path, cur_future in zip(src_file_paths, futures):
+                try:
+                    yield cur_future.result()
+                except BrokenProcessPool:
+                    yield self._transform_file_in_own_process(src_file_path=cur_file_path)
+
+    def _transform_file_in_own_process(self, src_file_path) -> FileTransformResult:
+        """Преобразует файл в отдельном процессе, аварийное завершение процесса сохраняется в результат"""
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(
+                transform_file, self._transformer_class, src_file_path, self._dst_dir_path,
+                self._transformer_kwargs, self._use_manifest,
+            )
+            try:
+                return future.result()
+            except BrokenProcessPool as e:
+                file_result = FileTransformResult(src_file_path=src_file_path)
+                file_result.error = f'{type(e).__name__}: {e}'
+                return file_result
+
+    def _get_manifest(self):
+        """Возвращает манифест результирующей директории или None, если манифест не ведется"""
+        return ProcessingManifest(dst_dir_path=self._dst_dir_path) if self._use_manifest else None
+
+    def _split_src_file_paths(self, src_file_paths, manifest, transformer_config) -> tuple:
+        """Возвращает результаты пропущенных как актуальные файлов и пути файлов для преобразования"""
+        skipped_file_results = []
+        src_file_paths_for_transform = []
+        for cur_file_path in src_file_paths:
+            if manifest and manifest.is_up_to_date(cur_file_path, transformer_config):
+                skipped_file_result = FileTransformResult(src_file_path=cur_file_path)
+                skipped_file_result.is_skipped = True
+                skipped_file_results.append(skipped_file_result)
+            else:
+                src_file_paths_for_transform.append(cur_file_path)
+        return skipped_file_results, src_file_paths_for_transform
+
+    @staticmethod
+    def _mark_file_result_done(manifest, transformer_config, file_result):
+        """Записывает успешно преобразованный файл в манифест"""
+        if manifest and file_result.is_success:
+            manifest.mark_done(
+                src_file_path=file_result.src_file_path,
+                transformer_config=transformer_config,
+                result_file_path=file_result.result_file_path,
+                src_file_stat=file_result.src_file_stat,
+                src_file_hash=file_result.src_file_hash,
+            )
+            manifest.save()
+
+    def run(self, src_file_paths) -> BatchTransformResult:
+        """Преобразует пакет файлов и возвращает результат по каждому файлу и по пакету"""
+        started_at = perf_counter()
+        manifest = self._get_manifest()
+        transformer_config = get_transformer_config(self._transformer_class, self._transformer_kwargs)
+        file_results, src_file_paths_for_transform = self._split_src_file_paths(
+            src_file_paths=src_file_paths, manifest=manifest, transformer_config=transformer_config,
+        )
+
+        if self._max_workers == 1 or len(src_file_paths_for_transform) <= 1:
+            file_results_iter = self._iter_file_results_in_current_process(src_file_paths_for_transform)
+        else:
+            file_results_iter = self._iter_file_results_in_process_pool(src_file_paths_for_transform)
+        for cur_file_result in file_results_iter:
+            file_results.append(cur_file_result)
+            self._mark_file_result_done(
+                manifest=manifest, transformer_config=transformer_config, file_result=cur_file_result,
+            )
+        if manifest:
+            manifest.save()
+
+        return BatchTransformResult(file_results=file_results, seconds=perf_counter() - started_at)
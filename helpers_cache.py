@@ -0,0 +1,35 @@
+from functools import lru_cache
+
+from helpers_singleton import SingletonMeta
+
+
+class PreparersCache(metaclass=SingletonMeta):
+    """Реестр кешей результатов подготовки по исходной строке
+
+    Кеши общие для всех преобразований в процессе, поэтому повторяющиеся
+    в файлах пакета имена и телефоны готовятся один раз.
+    Вытеснение давно не используемых значений и счетчики попаданий - functools.lru_cache
+
+    """
+
+    def __init__(self):
+        self._cached_funcs = {}
+
+    def get_cached_func(self, func, max_size):
+        """Возвращает кешированную обертку функции одного аргумента с ограничением размера кеша"""
+        cache_key = (func, max_size)
+        if cache_key not in self._cached_funcs:
+            self._cached_funcs[cache_key] = lru_cache(maxsize=max_size)(func)
+        return self._cached_funcs[cache_key]
+
+    def cache_info(self) -> dict:
+        """Возвращает статистику попаданий и промахов по каждому кешу"""
+        return {
+            f'{getattr(func, "__qualname__", func)}[{max_size}]': cached_func.cache_info()
+            for (func, max_size), cached_func in self._cached_funcs.items()
+        }
+
+    def clear(self):
+        """Очищает все кеши"""
+        for cached_func in self._cached_funcs.values():
+            cached_func.cache_clear()
@@ -0,0 +1,69 @@
+from os import fstat
+
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+_SCAN_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+def find_csv_record_boundaries(src_file_path, chunk_size=DEFAULT_CHUNK_SIZE, quote_char='"') -> tuple:
+    """Возвращает смещения границ записей csv для разбиения файла на части размером около chunk_size байт
+
+    Первое смещение - конец строки заголовка, последнее - размер файла.
+    Граница ставится только на перевод строки вне кавычек, поэтому переводы строк
+    внутри экранированных кавычками значений запись не разрывают.
+    Четность кавычек считается по блокам средствами bytes.count, без разбора значений
+
+    """
+    quote = quote_char.encode()
+    boundaries = []
+    in_quotes = False
+    target_offset = 0
+
+    with open(src_file_path, 'rb') as read_obj:
+        file_size = fstat(read_obj.fileno()).st_size
+        block_start = 0
+        block = read_obj.read(_SCAN_BLOCK_SIZE)
+        pos = 0
+
+        while block:
+            if pos >= len(block):
+                block_start += len(block)
+                block = read_obj.read(_SCAN_BLOCK_SIZE)
+                pos = 0
+                continue
+
+            if target_offset > block_start + pos:
+                stop = min(len(block), target_offset - block_start)
+                if block.count(quote, pos, stop) % 2:
+                    in_quotes = not in_quotes
+                pos = stop
+                continue
+
+            new_line_pos = block.find(b'\n', pos)
+            stop = len(block) if new_line_pos == -1 else new_line_pos + 1
+            if block.count(quote, pos, stop) % 2:
+                in_quotes = not in_quotes
+            pos = stop
+
+            if new_line_pos != -1 and not in_quotes:
+                boundaries.append(block_start + pos)
+                target_offset = block_start + pos + chunk_size
+
+    if not boundaries or boundaries[-1] != file_size:
+        boundaries.append(file_size)
+    return tuple(boundaries)
+
+
+def iter_chunk_ranges(boundaries) -> tuple:
+    """Возвращает диапазоны (начало, конец) частей файла по границам записей, без заголовка"""
+    return tuple(
+        (boundaries[cur_index], boundaries[cur_index + 1])
+        for cur_index in range(len(boundaries) - 1)
+        if boundaries[cur_index] < boundaries[cur_index + 1]
+    )
+
+
+def transform_csv_chunk(transformer, start_offset, end_offset, part_file_path) -> tuple:
+    """Преобразует часть csv файла в файл части. Выполняется в процессе пула"""
+    return transformer.transform_chunk_to_part_file(
+        start_offset=start_offset, end_offset=end_offset, part_file_path=part_file_path,
+    )
@@ -0,0 +1,168 @@
+from codecs import BOM_UTF8, BOM_UTF16_BE, BOM_UTF16_LE, BOM_UTF32_BE, BOM_UTF32_LE, getincrementaldecoder, \
+    register_error
+from csv import Sniffer, Error as CSVError, writer, get_dialect
+from os import makedirs, remove
+from os.path import dirname, exists
+from re import compile as re_compile
+from threading import Lock
+
+DEFAULT_FALLBACK_ENCODINGS = ('utf-8', 'cp1251')
+SNIFF_DELIMITERS = ',;\t|'
+SNIFF_TEXT_SIZE = 8192
+MAX_DECODE_ERRORS_SHARE = 0.05
+_BOM_ENCODINGS = (
+    (BOM_UTF32_LE, 'utf-32'),
+    (BOM_UTF32_BE, 'utf-32'),
+    (BOM_UTF8, 'utf-8-sig'),
+    (BOM_UTF16_LE, 'utf-16'),
+    (BOM_UTF16_BE, 'utf-16'),
+)
+_UNDECODED_BYTES = re_compile('[\udc80-\udcff]')
+DECODE_ERRORS_HANDLER_NAME = 'csv_sniffing_surrogateescape'
+_decode_errors_counters = {}
+_free_decode_errors_handler_names = []
+_decode_errors_handlers_lock = Lock()
+
+
+def _count_decode_errors(handler_name, error):
+    """Обработчик ошибок декодирования: считает ошибки в счетчике обработчика и заменяет байты суррогатами,
+    как surrogateescape"""
+    _decode_errors_counters[handler_name].errors_count += 1
+    return ''.join(chr(0xdc00 + cur_byte) for cur_byte in error.object[error.start:error.end]), error.end
+
+
+class DecodeErrorsCounter:
+    """Счетчик ошибок декодирования одного чтения файла
+
+    Обработчик ошибок кодеков регистрируется по имени на весь процесс и не удаляется, поэтому счетчику
+    выдается свободное имя обработчика (handler_name) из пула, а после close имя возвращается в пул.
+    Ошибки чтений в разных потоках считаются раздельно, обработчиков регистрируется не больше,
+    чем одновременных чтений
+
+    """
+    handler_name = None
+    errors_count = 0
+
+    def __init__(self):
+        self.errors_count = 0
+        with _decode_errors_handlers_lock:
+            if _free_decode_errors_handler_names:
+                handler_name = _free_decode_errors_handler_names.pop()
+            else:
+                handler_name = f'{DECODE_ERRORS_HANDLER_NAME}_{len(_decode_errors_counters)}'
+                register_error(handler_name, lambda error: _count_decode_errors(handler_name, error))
+            _decode_errors_counters[handler_name] = self
+        self.handler_name = handler_name
+
+    def close(self):
+        """Возвращает имя обработчика в пул"""
+        if self.handler_name is None:
+            return
+        with _decode_errors_handlers_lock:
+            _free_decode_errors_handler_names.append(self.handler_name)
+        self.handler_name = None
+
+
+def has_undecoded_bytes(row) -> bool:
+    """Проверяет, содержит ли строка значения с байтами, не декодированными в кодировке файла"""
+    return any(_UNDECODED_BYTES.search(cur_value) for cur_value in row if not cur_value.isascii())
+
+
+def detect_encoding(sample, fallback_encodings=DEFAULT_FALLBACK_ENCODINGS) -> tuple:
+    """Определяет кодировку по началу файла. Возвращает кодировку и признак декодирования без ошибок
+
+    Кодировка с BOM определяется по BOM, иначе выбирается первая из fallback_encodings, в которой ошибок
+    декодирования начала файла не больше MAX_DECODE_ERRORS_SHARE от декодированных не-ascii символов
+    (неполный символ в конце образца допускается), а если такой нет - с наименьшим количеством ошибок.
+    Несколько испорченных байт в файле utf-8 не переключают его на однобайтовую кодировку,
+    в которой декодируется почти любой байт: строки с ними уходят в карантин, а не читаются искаженными
+
+    """
+    for cur_bom, cur_encoding in _BOM_ENCODINGS:
+        if sample.startswith(cur_bom):
+            return cur_encoding, True
+    best_encoding, best_errors_count = None, None
+    for cur_encoding in fallback_encodings:
+        cur_text = getincrementaldecoder(cur_encoding)(errors='surrogateescape').decode(sample, final=False)
+        cur_errors_count = len(_UNDECODED_BYTES.findall(cur_text))
+        if cur_errors_count <= MAX_DECODE_ERRORS_SHARE * _count_non_ascii_chars(cur_text, cur_errors_count):
+            return cur_encoding, not cur_errors_count
+        if best_errors_count is None or cur_errors_count < best_errors_count:
+            best_encoding, best_errors_count = cur_encoding, cur_errors_count
+    return best_encoding, not best_errors_count
+
+
+def _count_non_ascii_chars(text, errors_count) -> int:
+    """Возвращает количество декодированных не-ascii символов текста без errors_count суррогатов ошибок"""
+    return len(text) - len(text.encode('ascii', 'ignore')) - errors_count
+
+
+def sniff_format_params(sample_text, dialect) -> dict:
+    """Определяет по образцу разделитель и символ кавычек csv. Возвращает параметры, отличные от dialect
+
+    Для определения берутся первые SNIFF_TEXT_SIZE символов образца (время csv.Sniffer растет
+    быстрее размера образца), обрезанные по последнему переводу строки.
+    Если определить не удалось, возвращается пустой словарь
+
+    """
+    sample_text = sample_text[:SNIFF_TEXT_SIZE]
+    sample_text = sample_text.rsplit('\n', 1)[0] if '\n' in sample_text else sample_text
+    if not sample_text:
+        return {}
+    try:
+        sniffed_dialect = Sniffer().sniff(sample_text, delimiters=SNIFF_DELIMITERS)
+    except CSVError:
+        return {}
+    base_dialect = get_dialect(dialect) if isinstance(dialect, str) else dialect
+    format_params = {}
+    if base_dialect is None or sniffed_dialect.delimiter != base_dialect.delimiter:
+        format_params['delimiter'] = sniffed_dialect.delimiter
+    if sniffed_dialect.quotechar and (base_dialect is None or sniffed_dialect.quotechar != base_dialect.quotechar):
+        format_params['quotechar'] = sniffed_dialect.quotechar
+    return format_params
+
+
+class QuarantineFile:
+    """Файл карантина строк, которые не удалось разобрать
+
+    Строки пишутся в csv с колонками line_number, error, row: номер строки исходного файла, причина
+    и значения строки или ее текст. Файл и его директория создаются при первой записи,
+    прежний файл удаляется при создании объекта
+
+    """
+    _file_path = None
+    _write_obj = None
+    _writer = None
+    rows_count = 0
+
+    def __init__(self, file_path):
+        self._file_path = file_path
+        self.reset()
+
+    def reset(self):
+        """Удаляет записанные строки карантина"""
+        self.close()
+        self.rows_count = 0
+        if exists(self._file_path):
+            remove(self._file_path)
+
+    def add(self, line_number, error, row):
+        """Записывает строку в карантин. row - список значений или текст строки"""
+        if self._writer is None:
+            makedirs(dirname(self._file_path) or '.', exist_ok=True)
+            self._write_obj = open(self._file_path, 'w', newline='', encoding='utf-8')
+            self._writer = writer(self._write_obj)
+            self._writer.writerow(('line_number', 'error', 'row'))
+        if not isinstance(row, str):
+            row = ','.join(
+                cur_value.encode('utf-8', 'surrogateescape').decode('utf-8', 'replace') for cur_value in row
+            )
+        self._writer.writerow((line_number, error, row))
+        self.rows_count += 1
+
+    def close(self):
+        """Закрывает файл карантина"""
+        if self._write_obj is not None:
+            self._write_obj.close()
+            self._write_obj = None
+            self._writer = None
@@ -0,0 +1,262 @@
+from operator import itemgetter
+from os import close, remove
+from os.path import exists
+from pickle import dumps, loads, HIGHEST_PROTOCOL
+from sqlite3 import connect
+from tempfile import mkstemp
+
+DEDUP_POLICY_FIRST = 'first'
+DEDUP_POLICY_LATEST = 'latest'
+DEDUP_POLICY_MERGE = 'merge'
+DEDUP_POLICIES = (DEDUP_POLICY_FIRST, DEDUP_POLICY_LATEST, DEDUP_POLICY_MERGE)
+DEFAULT_DEDUP_MAX_KEYS_IN_MEMORY = 1000000
+_SQLITE_BATCH_SIZE = 10000
+_UNIQUE_KEY_PREFIX = '\0'
+
+
+def _get_field_getter(field_name, field_names, tuple_rows):
+    """Возвращает функцию получения значения поля строки-словаря или строки-кортежа"""
+    if field_names is not None and field_name not in field_names:
+        raise ValueError(f'Поле "{field_name}" отсутствует в результирующих полях {tuple(field_names)}')
+    return itemgetter(tuple(field_names).index(field_name) if tuple_rows else field_name)
+
+
+def _merge_non_empty_values(old_row, new_row):
+    """Дополняет пустые значения прежней строки значениями новой строки"""
+    if isinstance(old_row, dict):
+        return {cur_name: cur_value if cur_value else new_row.get(cur_name) for cur_name, cur_value in old_row.items()}
+    return tuple(cur_old if cur_old else cur_new for cur_old, cur_new in zip(old_row, new_row))
+
+
+def get_merge_rows_func(policy, get_order_value=None):
+    """Возвращает функцию слияния (прежняя строка, новая строка) -> строка по политике дедупликации
+
+    first - остается первая строка, latest - строка с наибольшим значением поля порядка (updated_at,
+    при равенстве - более поздняя), merge - первая строка, пустые значения которой дополнены последующими
+
+    """
+    if policy == DEDUP_POLICY_FIRST:
+        return lambda old_row, new_row: old_row
+    if policy == DEDUP_POLICY_LATEST:
+        return lambda old_row, new_row: (
+            new_row if (get_order_value(new_row) or '') >= (get_order_value(old_row) or '') else old_row
+        )
+    if policy == DEDUP_POLICY_MERGE:
+        return _merge_non_empty_values
+    raise ValueError(f'Неизвестная политика дедупликации "{policy}", допустимые: {", ".join(DEDUP_POLICIES)}')
+
+
+class DedupIndex:
+    """Индекс дедупликации подготовленных строк по ключу
+
+    Политика first работает потоково: строка пропускается, если ключ уже встречался.
+    Ключи хранятся во множестве в памяти, при превышении max_keys_in_memory ключей множество сбрасывается в sqlite
+    (ограничение задается количеством ключей, а не байтами).
+    Политики latest и merge накапливают строки в словаре {ключ: строка} в порядке первого появления,
+    при превышении бюджета словарь сбрасывается во временную таблицу sqlite, по окончании сброшенные части
+    сливаются сортировкой по ключу средствами sqlite, и строки выдаются в порядке первого появления ключа.
+
+    index_file_path - общий для пакета файл индекса: ключи, выданные при обработке других файлов, отбрасываются.
+    Результаты других файлов уже записаны, поэтому между файлами действует правило "первый файл выигрывает",
+    а политика слияния применяется внутри файла. Ключи повторно обрабатываемого файла перед обработкой удаляются.
+    Без index_file_path sqlite создается во временном файле только при сбросе и удаляется в close.
+    Строки с пустым ключом не дедуплицируются.
+
+    ordered_rows - строки передаются парами (значение порядка, строка), например со значением поля порядка
+    из исходной строки, которого нет среди результирующих полей. Для политики latest строки сравниваются
+    по значению пары, а не по order_field_name, выдаются строки без значений порядка
+
+    """
+
+    def __init__(
+            self, policy, key_field_name, field_names=None, tuple_rows=False, order_field_name='updated_at',
+            max_keys_in_memory=DEFAULT_DEDUP_MAX_KEYS_IN_MEMORY, index_file_path=None, src_file_path=None,
+            ordered_rows=False,
+    ):
+        self._policy = policy
+        self._ordered_rows = ordered_rows
+        self._get_key = _get_field_getter(key_field_name, field_names, tuple_rows)
+        get_order_value = None
+        if ordered_rows:
+            get_row_key = self._get_key
+            self._get_key = lambda cur_ordered_row: get_row_key(cur_ordered_row[1])
+            get_order_value = itemgetter(0)
+        elif policy == DEDUP_POLICY_LATEST:
+            get_order_value = _get_field_getter(order_field_name, field_names, tuple_rows)
+        merge_rows = get_merge_rows_func(policy=policy, get_order_value=get_order_value)
+        if ordered_rows and policy == DEDUP_POLICY_MERGE:
+            self._merge_rows = lambda old_row, new_row: (old_row[0], merge_rows(old_row[1], new_row[1]))
+        else:
+            self._merge_rows = merge_rows
+        self._max_keys_in_memory = max_keys_in_memory
+        self._index_file_path = index_file_path
+        self._is_tmp_index_file = False
+        self._src_file_path = src_file_path or ''
+        self._connection = None
+        self._has_batch_keys = False
+        self._has_spilled_rows = False
+        self.dropped_rows_count = 0
+        if index_file_path:
+            self._init_batch_keys()
+
+    def _get_connection(self):
+        """Возвращает соединение sqlite, при первом обращении создает файл индекса и таблицы"""
+        if self._connection is not None:
+            return self._connection
+        if not self._index_file_path:
+            tmp_file_descriptor, self._index_file_path = mkstemp(suffix='.dedup.sqlite')
+            close(tmp_file_descriptor)
+            self._is_tmp_index_file = True
+        self._connection = connect(self._index_file_path, timeout=60)
+        if self._is_tmp_index_file:
+            self._connection.execute('PRAGMA synchronous = OFF')
+            self._connection.execute('PRAGMA journal_mode = OFF')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS batch_keys (key TEXT PRIMARY KEY, src_file_path TEXT) WITHOUT ROWID'
+        )
+        self._connection.execute('CREATE TEMP TABLE IF NOT EXISTS spilled_rows (key TEXT, first_seq INTEGER, row BLOB)')
+        self._connection.execute('CREATE TEMP TABLE IF NOT EXISTS merged_rows (first_seq INTEGER, key TEXT, row BLOB)')
+        return self._connection
+
+    def _init_batch_keys(self):
+        """Удаляет ключи обрабатываемого файла из общего индекса и проверяет наличие ключей других файлов"""
+        connection = self._get_connection()
+        with connection:
+            connection.execute('DELETE FROM batch_keys WHERE src_file_path = ?', (self._src_file_path,))
+        self._has_batch_keys = connection.execute('SELECT EXISTS(SELECT 1 FROM batch_keys)').fetchone()[0] == 1
+
+    def _is_batch_key(self, key):
+        """Проверяет наличие ключа в sqlite: сброшенные ключи файла и ключи других файлов пакета"""
+        if not self._has_batch_keys:
+            return False
+        return self._connection.execute('SELECT 1 FROM batch_keys WHERE key = ?', (key,)).fetchone() is not None
+
+    def _save_batch_keys(self, keys):
+        """Записывает ключи обрабатываемого файла в sqlite"""
+        connection = self._get_connection()
+        with connection:
+            connection.executemany(
+                'INSERT OR IGNORE INTO batch_keys (key, src_file_path) VALUES (?, ?)',
+                ((cur_key, self._src_file_path) for cur_key in keys),
+            )
+        self._has_batch_keys = True
+
+    def _iter_first_rows(self, rows):
+        """Потоковая дедупликация по политике first"""
+        get_key = self._get_key
+        keys = set()
+        for cur_row in rows:
+            cur_key = get_key(cur_row)
+            if not cur_key:
+                yield cur_row
+                continue
+            if cur_key in keys or self._is_batch_key(cur_key):
+                self.dropped_rows_count += 1
+                continue
+            keys.add(cur_key)
+            if len(keys) >= self._max_keys_in_memory:
+                self._save_batch_keys(keys)
+                keys.clear()
+            yield cur_row
+        if keys and self._index_file_path and not self._is_tmp_index_file:
+            self._save_batch_keys(keys)
+
+    def _spill_rows(self, rows_by_key):
+        """Сбрасывает накопленные строки во временную таблицу sqlite"""
+        connection = self._get_connection()
+        with connection:
+            connection.executemany(
+                'INSERT INTO spilled_rows (key, first_seq, row) VALUES (?, ?, ?)',
+                (
+                    (cur_key, cur_first_seq, dumps(cur_row, protocol=HIGHEST_PROTOCOL))
+                    for cur_key, (cur_first_seq, cur_row) in rows_by_key.items()
+                ),
+            )
+        rows_by_key.clear()
+        self._has_spilled_rows = True
+
+    def _iter_spilled_merged_rows(self):
+        """Сливает сброшенные части по ключу и возвращает строки в порядке первого появления ключа"""
+        connection = self._get_connection()
+        spilled_rows = connection.execute('SELECT key, first_seq, row FROM spilled_rows ORDER BY key, first_seq')
+        merged_rows = []
+        cur_key = cur_first_seq = cur_row = None
+        for cur_spilled_key, cur_spilled_first_seq, cur_spilled_row in spilled_rows:
+            cur_spilled_row = loads(cur_spilled_row)
+            if cur_spilled_key == cur_key:
+                cur_row = self._merge_rows(cur_row, cur_spilled_row)
+                self.dropped_rows_count += 1
+                continue
+            if cur_key is not None:
+                merged_rows.append((cur_first_seq, cur_key, dumps(cur_row, protocol=HIGHEST_PROTOCOL)))
+            cur_key, cur_first_seq, cur_row = cur_spilled_key, cur_spilled_first_seq, cur_spilled_row
+            if len(merged_rows) >= _SQLITE_BATCH_SIZE:
+                connection.executemany('INSERT INTO merged_rows (first_seq, key, row) VALUES (?, ?, ?)', merged_rows)
+                merged_rows = []
+        if cur_key is not None:
+            merged_rows.append((cur_first_seq, cur_key, dumps(cur_row, protocol=HIGHEST_PROTOCOL)))
+        connection.executemany('INSERT INTO merged_rows (first_seq, key, row) VALUES (?, ?, ?)', merged_rows)
+        connection.execute('DELETE FROM spilled_rows')
+        connection.commit()
+
+        for cur_key, cur_row in connection.execute('SELECT key, row FROM merged_rows ORDER BY first_seq'):
+            yield cur_key, loads(cur_row)
+
+    def _iter_merged_rows(self, rows):
+        """Дедупликация с накоплением строк по политикам latest и merge"""
+        get_key = self._get_key
+        merge_rows = self._merge_rows
+        rows_by_key = {}
+        for cur_seq, cur_row in enumerate(rows):
+            cur_key = get_key(cur_row)
+            if not cur_key:
+                cur_key = f'{_UNIQUE_KEY_PREFIX}{cur_seq}'
+            cur_entry = rows_by_key.get(cur_key)
+            if cur_entry is None:
+                rows_by_key[cur_key] = [cur_seq, cur_row]
+                if len(rows_by_key) >= self._max_keys_in_memory:
+                    self._spill_rows(rows_by_key)
+            else:
+                cur_entry[1] = merge_rows(cur_entry[1], cur_row)
+                self.dropped_rows_count += 1
+
+        if self._has_spilled_rows:
+            self._spill_rows(rows_by_key)
+            merged_rows = self._iter_spilled_merged_rows()
+        else:
+            merged_rows = ((cur_key, cur_row) for cur_key, (_, cur_row) in rows_by_key.items())
+
+        is_shared_index = self._index_file_path and not self._is_tmp_index_file
+        has_other_files_keys = self._has_batch_keys
+        new_keys = []
+        for cur_key, cur_row in merged_rows:
+            is_unique_key = cur_key.startswith(_UNIQUE_KEY_PREFIX)
+            if not is_unique_key and has_other_files_keys and self._is_batch_key(cur_key):
+                self.dropped_rows_count += 1
+                continue
+            if is_shared_index and not is_unique_key:
+                new_keys.append(cur_key)
+                if len(new_keys) >= _SQLITE_BATCH_SIZE:
+                    self._save_batch_keys(new_keys)
+                    new_keys.clear()
+            yield cur_row
+        if new_keys:
+            self._save_batch_keys(new_keys)
+
+    def iter_rows(self, rows):
+        """Генератор строк без дубликатов по ключу"""
+        if self._policy == DEDUP_POLICY_FIRST:
+            rows = self._iter_first_rows(rows)
+        else:
+            rows = self._iter_merged_rows(rows)
+        if self._ordered_rows:
+            return (cur_row for _, cur_row in rows)
+        return rows
+
+    def close(self):
+        """Закрывает соединение sqlite и удаляет временный файл индекса"""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        if self._is_tmp_index_file and exists(self._index_file_path):
+            remove(self._index_file_path)
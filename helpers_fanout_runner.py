@@ -0,0 +1,332 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from time import perf_counter
+
+from helpers_batch_runner import BatchTransformResult, FileTransformResult, set_src_file_info, set_transformer_info
+from helpers_manifest import ProcessingManifest, get_transformer_config
+from helpers_metrics import check_metrics_hooks_picklable
+
+DEFAULT_FANOUT_BLOCK_ROWS = 10000
+
+
+class FanOutTarget:
+    """Цель разветвления: класс преобразователя, результирующая директория и параметры преобразователя
+
+    По умолчанию преобразователь создается с streaming=True: строки готовятся блоками при общем чтении
+
+    """
+
+    def __init__(self, transformer_class, dst_dir_path, **transformer_kwargs):
+        self.transformer_class = transformer_class
+        self.dst_dir_path = dst_dir_path
+        self.transformer_kwargs = {'streaming': True, **transformer_kwargs}
+
+    @property
+    def name(self):
+        """Возвращает наименование цели для отчета"""
+        return self.transformer_class.__name__
+
+    def create_transformer(self, src_file_path):
+        """Создает преобразователь исходного файла в результирующую директорию цели"""
+        return self.transformer_class(
+            src_file_path=src_file_path, dst_dir_path=self.dst_dir_path, **self.transformer_kwargs
+        )
+
+
+class TargetFileTransformResult(FileTransformResult):
+    """Результат преобразования исходного файла для одной цели разветвления"""
+
+    def __init__(self, src_file_path, target_name):
+        super(TargetFileTransformResult, self).__init__(src_file_path=src_file_path)
+        self.target_name = target_name
+
+    def __str__(self):
+        return f'[{self.target_name}] {super(TargetFileTransformResult, self).__str__()}'
+
+
+def get_fanout_source_field_names(transformers):
+    """Возвращает колонки исходного файла, необходимые всем преобразователям. None - все колонки"""
+    field_names = []
+    for cur_transformer in transformers:
+        cur_field_names = cur_transformer._get_source_field_names()
+        if cur_field_names is None:
+            return None
+        field_names.extend(cur_field_names)
+    return tuple(dict.fromkeys(field_names))
+
+
+def get_fanout_source_rows(transformers) -> tuple:
+    """Возвращает заголовок и генератор строк исходного файла, прочитанного один раз для всех преобразователей
+
+    Файл читается бэкендом, диалектом и кодировкой первого преобразователя,
+    выбираются колонки, необходимые хотя бы одному преобразователю. Для строк-словарей заголовок - None
+
+    """
+    source_transformer = transformers[0]
+    read_params = dict(
+        src_file_path=source_transformer._src_file_path,
+        dialect=source_transformer._dialect,
+        encoding=source_transformer._encoding,
+        field_names=get_fanout_source_field_names(transformers),
+    )
+    if source_transformer._compact_rows:
+        tuple_rows = source_transformer._reader_backend.iter_tuples(**read_params)
+        return tuple(next(tuple_rows, ())), tuple_rows
+    return None, source_transformer._reader_backend.iter_dicts(**read_params)
+
+
+def extract_data_to_result_files_fanout(transformers, block_rows=DEFAULT_FANOUT_BLOCK_ROWS) -> tuple:
+    """Готовит результирующие файлы нескольких преобразователей одного исходного файла за одно чтение
+
+    Исходные строки читаются блоками по block_rows, каждый блок готовится функцией подготовки
+    каждого преобразователя (компилируется один раз) и дописывается в его временный файл,
+    после чтения всех блоков временные файлы переименовываются в результирующие.
+
+    Разветвляются преобразователи, подходящие для конвейера (_is_pipelined_extraction: потоковая запись csv
+    без контрольных точек, частей, дедупликации и метрик) с тем же представлением строк (compact_rows),
+    что и первый из них. Остальные обрабатываются своим extract_data_to_result_file с отдельным чтением.
+
+    Возвращает ошибки в порядке transformers (None - результат готов). Ошибка подготовки или записи
+    преобразователя исключает его из дальнейших блоков и удаляет его временный файл, остальные продолжают;
+    ошибка чтения исходного файла достается всем разветвляемым преобразователям
+
+    """
+    errors = {}
+    fanout_transformers = [
+        cur_transformer for cur_transformer in transformers if cur_transformer._is_pipelined_extraction()
+    ]
+    if fanout_transformers:
+        compact_rows = fanout_transformers[0]._compact_rows
+        fanout_transformers = [
+            cur_transformer for cur_transformer in fanout_transformers if cur_transformer._compact_rows == compact_rows
+        ]
+    for cur_transformer in transformers:
+        if cur_transformer not in fanout_transformers:
+            try:
+                cur_transformer.extract_data_to_result_file()
+            except Exception as e:
+                errors[cur_transformer] = f'{type(e).__name__}: {e}'
+    if not fanout_transformers:
+        return tuple(errors.get(cur_transformer) for cur_transformer in transformers)
+
+    prepare_funcs = {}
+    field_names = {}
+    write_objs = {}
+
+    def fail_transformer(transformer, error):
+        errors[transformer] = f'{type(error).__name__}: {error}'
+        write_obj = write_objs.pop(transformer, None)
+        if write_obj is not None:
+            write_obj.close()
+        transformer._remove_tmp_result_file()
+
+    try:
+        src_field_names, source_rows = get_fanout_source_rows(fanout_transformers)
+        for cur_transformer in fanout_transformers:
+            try:
+                write_objs[cur_transformer] = open(cur_transformer._get_tmp_result_file_path(), 'w')
+            except Exception as e:
+                fail_transformer(transformer=cur_transformer, error=e)
+        while write_objs:
+            cur_block = list(islice(source_rows, block_rows))
+            if not cur_block:
+                break
+            for cur_transformer in tuple(write_objs):
+                try:
+                    if cur_transformer not in prepare_funcs:
+                        if compact_rows:
+                            prepare_funcs[cur_transformer] = cur_transformer._get_prepare_tuple_func(
+                                src_field_names=src_field_names,
+                            )
+                        else:
+                            prepare_funcs[cur_transformer] = cur_transformer._get_prepare_row_func(
+                                src_field_names=tuple(cur_block[0]),
+                            )
+                    cur_field_names = cur_transformer._write_csv_rows(
+                        write_obj=write_objs[cur_transformer],
+                        rows=cur_transformer._iter_rows_prepared_by(
+                            rows=cur_block, prepare_row=prepare_funcs[cur_transformer],
+                        ),
+                        with_header=field_names.get(cur_transformer) is None,
+                    )
+                except Exception as e:
+                    fail_transformer(transformer=cur_transformer, error=e)
+                    continue
+                field_names[cur_transformer] = field_names.get(cur_transformer) or cur_field_names
+    except Exception as e:
+        for cur_transformer in fanout_transformers:
+            if cur_transformer not in errors:
+                fail_transformer(transformer=cur_transformer, error=e)
+    finally:
+        for cur_write_obj in write_objs.values():
+            cur_write_obj.close()
+
+    for cur_transformer in fanout_transformers:
+        if cur_transformer in errors:
+            continue
+        try:
+            cur_transformer._commit_tmp_result_file()
+        except Exception as e:
+            fail_transformer(transformer=cur_transformer, error=e)
+    return tuple(errors.get(cur_transformer) for cur_transformer in transformers)
+
+
+def transform_file_fanout(
+        targets, src_file_path, compute_src_file_hash=False, block_rows=DEFAULT_FANOUT_BLOCK_ROWS
+) -> tuple:
+    """Преобразует один файл во все цели и возвращает результат по каждой цели
+
+    Ошибка цели сохраняется только в ее результат, общая ошибка (сведения об исходном файле) - во все
+
+    """
+    file_results = tuple(
+        TargetFileTransformResult(src_file_path=src_file_path, target_name=cur_target.name) for cur_target in targets
+    )
+    started_at = perf_counter()
+    try:
+        set_src_file_info(file_result=file_results[0], compute_src_file_hash=compute_src_file_hash)
+        for cur_file_result in file_results[1:]:
+            cur_file_result.src_file_stat = file_results[0].src_file_stat
+            cur_file_result.size_bytes = file_results[0].size_bytes
+            cur_file_result.src_file_hash = file_results[0].src_file_hash
+    except Exception as e:
+        for cur_file_result in file_results:
+            cur_file_result.error = f'{type(e).__name__}: {e}'
+    else:
+        transformers = {}
+        for cur_file_result, cur_target in zip(file_results, targets):
+            try:
+                transformers[cur_file_result] = cur_target.create_transformer(src_file_path=src_file_path)
+            except Exception as e:
+                cur_file_result.error = f'{type(e).__name__}: {e}'
+        errors = extract_data_to_result_files_fanout(transformers=tuple(transformers.values()), block_rows=block_rows)
+        for (cur_file_result, cur_transformer), cur_error in zip(transformers.items(), errors):
+            if cur_error:
+                cur_file_result.error = cur_error
+            else:
+                set_transformer_info(file_result=cur_file_result, transformer=cur_transformer)
+    seconds = perf_counter() - started_at
+    for cur_file_result in file_results:
+        cur_file_result.seconds = seconds
+    return file_results
+
+
+class FanOutTransformRunner:
+    """Запускает преобразование пакета файлов сразу в несколько целей (FanOutTarget)
+
+    Каждый исходный файл читается и разбирается один раз, строки готовятся преобразователями всех целей
+    и пишутся в их результирующие директории. Результаты в отчете - по каждой паре файл-цель,
+    время файла общее для его целей.
+
+    _max_workers - количество процессов пула, None - по количеству ядер, 1 - обработка в текущем процессе,
+    _use_manifest - манифест ведется в директории каждой цели, файл пропускается, если актуален для всех целей.
+    Директории целей должны различаться: результаты одного файла называются одинаково.
+    При _max_workers != 1 несериализуемые обработчики метрик целей (CallbackMetricsHook с lambda) отклоняются
+
+    """
+    _targets = ()
+    _max_workers = None
+    _use_manifest = False
+    _block_rows = DEFAULT_FANOUT_BLOCK_ROWS
+
+    def set_targets(self, targets):
+        """Сеттер целей разветвления"""
+        targets = tuple(targets)
+        if not targets:
+            raise ValueError('Не заданы цели разветвления')
+        dst_dir_paths = [cur_target.dst_dir_path for cur_target in targets]
+        if len(set(dst_dir_paths)) != len(dst_dir_paths):
+            raise ValueError(f'Цели разветвления пишут в одну директорию: {", ".join(dst_dir_paths)}')
+        self._targets = targets
+
+    def set_max_workers(self, max_workers):
+        """Сеттер количества процессов пула"""
+        self._max_workers = max_workers
+
+    def set_use_manifest(self, use_manifest):
+        """Сеттер признака ведения манифеста"""
+        self._use_manifest = use_manifest
+
+    def set_block_rows(self, block_rows):
+        """Сеттер размера блока исходных строк"""
+        self._block_rows = block_rows
+
+    def __init__(self, targets, max_workers=None, use_manifest=False, block_rows=DEFAULT_FANOUT_BLOCK_ROWS):
+        self.set_targets(targets=targets)
+        self.set_max_workers(max_workers=max_workers)
+        self.set_use_manifest(use_manifest=use_manifest)
+        self.set_block_rows(block_rows=block_rows)
+        if max_workers != 1:
+            for cur_target in self._targets:
+                check_metrics_hooks_picklable(metrics_hooks=cur_target.transformer_kwargs.get('metrics_hooks', ()))
+
+    def _get_manifests(self) -> tuple:
+        """Возвращает манифесты директорий целей или None, если манифест не ведется"""
+        if not self._use_manifest:
+            return None
+        return tuple(ProcessingManifest(dst_dir_path=cur_target.dst_dir_path) for cur_target in self._targets)
+
+    def _is_up_to_date(self, manifests, transformer_configs, src_file_path) -> bool:
+        """Признак актуальности результатов файла для всех целей"""
+        return bool(manifests) and all(
+            cur_manifest.is_up_to_date(src_file_path, cur_transformer_config)
+            for cur_manifest, cur_transformer_config in zip(manifests, transformer_configs)
+        )
+
+    def _iter_file_results(self, src_file_paths):
+        """Преобразует файлы в текущем процессе или в пуле, результаты возвращаются в порядке файлов"""
+        transform_args = (self._use_manifest, self._block_rows)
+        if self._max_workers == 1 or len(src_file_paths) <= 1:
+            for cur_file_path in src_file_paths:
+                yield transform_file_fanout(self._targets, cur_file_path, *transform_args)
+            return
+
+        for cur_transformer_class in dict.fromkeys(cur_target.transformer_class for cur_target in self._targets):
+            cur_transformer_class.preload_shared_data_for_pool()
+        with ProcessPoolExecutor(max_workers=self._max_workers) as executor:
+            futures = [
+                executor.submit(transform_file_fanout, self._targets, cur_file_path, *transform_args)
+                for cur_file_path in src_file_paths
+            ]
+            for cur_future in futures:
+                yield cur_future.result()
+
+    def run(self, src_file_paths) -> BatchTransformResult:
+        """Преобразует пакет файлов во все цели и возвращает результат по каждому файлу и цели"""
+        started_at = perf_counter()
+        manifests = self._get_manifests()
+        transformer_configs = tuple(
+            get_transformer_config(cur_target.transformer_class, cur_target.transformer_kwargs)
+            for cur_target in self._targets
+        )
+        file_results = []
+        src_file_paths_for_transform = []
+        for cur_file_path in src_file_paths:
+            if self._is_up_to_date(manifests, transformer_configs, cur_file_path):
+                for cur_target in self._targets:
+                    skipped_file_result = TargetFileTransformResult(
+                        src_file_path=cur_file_path, target_name=cur_target.name,
+                    )
+                    skipped_file_result.is_skipped = True
+                    file_results.append(skipped_file_result)
+            else:
+                src_file_paths_for_transform.append(cur_file_path)
+
+        for cur_target_file_results in self._iter_file_results(src_file_paths_for_transform):
+            file_results.extend(cur_target_file_results)
+            if not manifests:
+                continue
+            for cur_manifest, cur_transformer_config, cur_file_result in zip(
+                    manifests, transformer_configs, cur_target_file_results
+            ):
+                if cur_file_result.is_success:
+                    cur_manifest.mark_done(
+                        src_file_path=cur_file_result.src_file_path,
+                        transformer_config=cur_transformer_config,
+                        result_file_path=cur_file_result.result_file_path,
+                        src_file_stat=cur_file_result.src_file_stat,
+                        src_file_hash=cur_file_result.src_file_hash,
+                    )
+                    cur_manifest.save()
+
+        return BatchTransformResult(file_results=file_results, seconds=perf_counter() - started_at)
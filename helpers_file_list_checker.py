@@ -1,23 +1,69 @@
 from abc import abstractmethod
 
+from os.path import dirname, basename
+
+from helpers_manifest import FileSnapshot
 from helpers_singleton import SingletonMeta
 from helpers_mixins import CSVFileReaderMixin
 
 
 class ListChecker(metaclass=SingletonMeta):
-    """Класс для проверки вхождения значений в список"""
-    _list_for_check = []
+    """Класс для проверки вхождения значений в список
+
+    _list_for_check - список значений, заполняемый в наследниках методом _init_list,
+    _index_for_check - хеш-индекс по нормализованным значениям списка,
+    строится один раз после _init_list, проверка вхождения за O(1)
+
+    Если наследник возвращает снимок индекса в _get_index_snapshot, индекс загружается из него
+    без _init_list, а построенный заново индекс сохраняется в снимок
+
+    """
+    _list_for_check = None
+    _index_for_check = frozenset()
 
     @abstractmethod
     def _init_list(self, *args, **kwargs):
         """Абстракный метод для инициализации списков в наследниках"""
 
+    def _normalize_value(self, value):
+        """Приводит значение к виду, в котором оно хранится в индексе"""
+        return value
+
+    def _init_index(self):
+        """Строит хеш-индекс по списку значений"""
+        self._index_for_check = frozenset(self._list_for_check)
+
+    def _get_index_snapshot(self, *args, **kwargs):
+        """Возвращает снимок индекса (helpers_manifest.FileSnapshot) или None, если снимок не используется"""
+        return None
+
     def __init__(self, *args, **kwargs):
+        self._list_for_check = []
+        index_snapshot = self._get_index_snapshot(*args, **kwargs)
+        index_for_check = index_snapshot.load() if index_snapshot else None
+        if index_for_check is not None:
+            self._index_for_check = index_for_check
+            return
+
         self._init_list(*args, **kwargs)
+        self._init_index()
+        if index_snapshot:
+            index_snapshot.save(self._index_for_check)
+
+    @property
+    def values(self) -> frozenset:
+        """Возвращает нормализованные значения списка"""
+        return self._index_for_check
 
     def check_value(self, value):
         """Проверяет вхождение значения в список"""
-        return True if value in self._list_for_check else False
+        return self._normalize_value(value) in self._index_for_check
+
+    def check_values(self, values) -> tuple:
+        """Проверяет вхождение каждого из значений в список, возвращает кортеж признаков"""
+        index_for_check = self._index_for_check
+        normalize_value = self._normalize_value
+        return tuple(normalize_value(cur_value) in index_for_check for cur_value in values)
 
 
 class StrListChecker(ListChecker):
@@ -25,18 +71,57 @@ class StrListChecker(ListChecker):
     def _init_list(self, *args, **kwargs):
         """Абстракный метод для инициализации списков в наследниках"""
 
-    def check_value(self, value):
-        """Проверяет вхождение значения в список"""
-        return True if str(value).lower().strip() in self._list_for_check else False
+    def _normalize_value(self, value):
+        """Приводит значение к строке в нижнем регистре без крайних пробелов"""
+        return str(value).lower().strip()
 
 
 class ListCheckerFromCSVNamesFile(CSVFileReaderMixin, StrListChecker):
+    """Проверка значений по справочнику из csv файла
+
+    column_name / column_names - одна или несколько колонок справочника,
+    aliases_separator - разделитель, если в ячейке перечислено несколько вариантов (синонимов) значения,
+    use_snapshot - признак хранения нормализованного индекса в бинарном снимке рядом со справочником
+    (.<имя файла>.snapshot), снимок пересоздается при изменении содержимого справочника
+
+    """
+    _read_on_init = False
+
+    @staticmethod
+    def _get_column_names(**kwargs) -> tuple:
+        """Возвращает колонки справочника из параметров column_names / column_name, по умолчанию Name"""
+        column_names = kwargs.get('column_names')
+        if not column_names:
+            column_name = kwargs.get('column_name')
+            column_names = (column_name if column_name else 'Name',)
+        return tuple(column_names)
+
+    def _get_index_snapshot(self, *args, **kwargs):
+        """Возвращает снимок индекса справочника, если задан use_snapshot"""
+        if not kwargs.get('use_snapshot'):
+            return None
+        return FileSnapshot(
+            snapshot_file_path=f'{dirname(self._src_file_path) or "."}/.{basename(self._src_file_path)}.snapshot',
+            src_file_path=self._src_file_path,
+            options={
+                'list_checker': type(self).__qualname__,
+                'column_names': self._get_column_names(**kwargs),
+                'aliases_separator': kwargs.get('aliases_separator'),
+            },
+        )
+
     def _init_list(self, *args, **kwargs):
-        """Инициализирует список из выбранной колонки csv файла"""
-        column_name = kwargs.get('column_name')
-        column_name = column_name if column_name else 'Name'
-
-        for cur_line in self._csv_file_list_of_dict:
-            cur_name = cur_line.get(column_name)
-            if cur_name:
-                self._list_for_check.append(str(cur_name).lower().strip())
+        """Инициализирует список из выбранных колонок csv файла"""
+        column_names = self._get_column_names(**kwargs)
+        aliases_separator = kwargs.get('aliases_separator')
+
+        for cur_line in self._iter_csv_dicts():
+            for cur_column_name in column_names:
+                cur_value = cur_line.get(cur_column_name)
+                if not cur_value:
+                    continue
+                cur_names = cur_value.split(aliases_separator) if aliases_separator else (cur_value,)
+                for cur_name in cur_names:
+                    cur_normalized_name = self._normalize_value(cur_name)
+                    if cur_normalized_name:
+                        self._list_for_check.append(cur_normalized_name)
@@ -0,0 +1,214 @@
+from abc import ABC, abstractmethod
+from ctypes import CDLL, get_errno
+from ctypes.util import find_library
+from os import close, read, scandir, strerror
+from select import select
+from struct import calcsize, unpack_from
+from sys import platform
+from time import monotonic, sleep
+
+DEFAULT_WATCH_FILE_EXTENSIONS = ('.csv', '.parquet', '.arrow', '.feather')
+DEFAULT_POLL_SECONDS = 1.0
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_Q_OVERFLOW = 0x00004000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_INOTIFY_EVENT_FORMAT = 'iIII'
+_INOTIFY_EVENT_SIZE = calcsize(_INOTIFY_EVENT_FORMAT)
+_INOTIFY_READ_SIZE = 64 * 1024
+_libc = None
+
+
+def _get_libc():
+    """Возвращает libc с функциями inotify или None, если inotify недоступен"""
+    global _libc
+    if _libc is None:
+        _libc = False
+        if platform.startswith('linux'):
+            try:
+                libc = CDLL(find_library('c') or 'libc.so.6', use_errno=True)
+            except OSError:
+                libc = None
+            if libc is not None and hasattr(libc, 'inotify_init1'):
+                _libc = libc
+    return _libc or None
+
+
+class FileWatcher(ABC):
+    """Базовый класс наблюдения за новыми и измененными файлами директории
+
+    Наблюдаются файлы с расширениями file_extensions, скрытые файлы (.имя) пропускаются:
+    в них обычно пишутся временные копии перед переименованием.
+    Наследник без wait_for_file_paths не создается: ошибка возникает при создании, а не в цикле наблюдения
+
+    """
+    _src_dir_path = None
+    _file_extensions = DEFAULT_WATCH_FILE_EXTENSIONS
+
+    def __init__(self, src_dir_path, file_extensions=DEFAULT_WATCH_FILE_EXTENSIONS):
+        self._src_dir_path = src_dir_path
+        self._file_extensions = tuple(file_extensions)
+
+    def _is_watched_file_name(self, file_name) -> bool:
+        """Признак наблюдаемого файла по имени"""
+        return not file_name.startswith('.') and file_name.endswith(self._file_extensions)
+
+    def _get_file_path(self, file_name) -> str:
+        """Возвращает путь файла в наблюдаемой директории"""
+        return f'{self._src_dir_path}/{file_name}'
+
+    def _scan_signatures(self) -> dict:
+        """Возвращает {путь: (размер, время изменения)} наблюдаемых файлов директории"""
+        signatures = {}
+        with scandir(self._src_dir_path) as dir_entries:
+            for cur_entry in dir_entries:
+                if not self._is_watched_file_name(cur_entry.name) or not cur_entry.is_file():
+                    continue
+                try:
+                    cur_stat = cur_entry.stat()
+                except FileNotFoundError:
+                    continue
+                signatures[self._get_file_path(cur_entry.name)] = (cur_stat.st_size, cur_stat.st_mtime_ns)
+        return signatures
+
+    def scan(self) -> list:
+        """Возвращает пути всех наблюдаемых файлов директории, отсортированные по имени"""
+        return sorted(self._scan_signatures())
+
+    @abstractmethod
+    def wait_for_file_paths(self, timeout) -> list:
+        """Абстрактное ожидание: ждет не дольше timeout секунд и возвращает пути файлов, запись которых завершилась"""
+        pass
+
+    def close(self):
+        """Освобождает ресурсы наблюдения"""
+
+
+class PollingFileWatcher(FileWatcher):
+    """Наблюдение опросом директории раз в poll_seconds
+
+    Файл считается готовым, когда его размер и время изменения не менялись между двумя опросами
+    и отличаются от уже сообщенных: файл, который еще копируется, не отдается на обработку,
+    если запись не прерывается дольше poll_seconds
+
+    """
+    _poll_seconds = DEFAULT_POLL_SECONDS
+
+    def __init__(self, src_dir_path, file_extensions=DEFAULT_WATCH_FILE_EXTENSIONS, poll_seconds=DEFAULT_POLL_SECONDS):
+        super(PollingFileWatcher, self).__init__(src_dir_path=src_dir_path, file_extensions=file_extensions)
+        self._poll_seconds = poll_seconds
+        self._last_signatures = {}
+        self._reported_signatures = {}
+        self._next_scan_at = monotonic()
+
+    def scan(self) -> list:
+        """Запоминает наблюдаемые файлы директории и возвращает пустой список
+
+        Уже лежащие файлы подчиняются тому же правилу двух опросов, что и новые: они сообщаются
+        ближайшим wait_for_file_paths, если не изменились, поэтому файл, который копировался
+        при запуске, не отдается на обработку недописанным
+
+        """
+        self._last_signatures = self._scan_signatures()
+        self._reported_signatures = {}
+        self._next_scan_at = monotonic() + self._poll_seconds
+        return []
+
+    def wait_for_file_paths(self, timeout) -> list:
+        """Ждет очередного опроса не дольше timeout и возвращает пути устоявшихся новых и измененных файлов"""
+        wait_seconds = self._next_scan_at - monotonic()
+        if wait_seconds > timeout:
+            sleep(timeout)
+            return []
+        if wait_seconds > 0:
+            sleep(wait_seconds)
+        self._next_scan_at = monotonic() + self._poll_seconds
+
+        signatures = self._scan_signatures()
+        ready_file_paths = [
+            cur_file_path for cur_file_path, cur_signature in signatures.items()
+            if self._last_signatures.get(cur_file_path) == cur_signature
+            and self._reported_signatures.get(cur_file_path) != cur_signature
+        ]
+        self._last_signatures = signatures
+        self._reported_signatures = {
+            cur_file_path: cur_signature for cur_file_path, cur_signature in self._reported_signatures.items()
+            if cur_file_path in signatures
+        }
+        for cur_file_path in ready_file_paths:
+            self._reported_signatures[cur_file_path] = signatures[cur_file_path]
+        return sorted(ready_file_paths)
+
+
+class InotifyFileWatcher(FileWatcher):
+    """Наблюдение через inotify (Linux)
+
+    Файл считается готовым по событию закрытия после записи (IN_CLOSE_WRITE) или переименования
+    в директорию (IN_MOVED_TO), поэтому файл отдается на обработку сразу после завершения записи.
+    При переполнении очереди событий ядра директория пересматривается целиком.
+    Если inotify недоступен, при создании выбрасывается OSError
+
+    """
+    _inotify_fd = None
+
+    def __init__(self, src_dir_path, file_extensions=DEFAULT_WATCH_FILE_EXTENSIONS):
+        super(InotifyFileWatcher, self).__init__(src_dir_path=src_dir_path, file_extensions=file_extensions)
+        libc = _get_libc()
+        if libc is None:
+            raise OSError('inotify недоступен на этой платформе')
+        inotify_fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if inotify_fd < 0:
+            raise OSError(get_errno(), f'Не удалось создать inotify: {strerror(get_errno())}')
+        if libc.inotify_add_watch(inotify_fd, src_dir_path.encode(), _IN_CLOSE_WRITE | _IN_MOVED_TO) < 0:
+            errno = get_errno()
+            close(inotify_fd)
+            raise OSError(errno, f'Не удалось наблюдать директорию {src_dir_path}: {strerror(errno)}')
+        self._inotify_fd = inotify_fd
+
+    def _read_file_paths(self) -> list:
+        """Читает накопленные события inotify и возвращает пути готовых файлов"""
+        file_paths = []
+        while True:
+            try:
+                events_data = read(self._inotify_fd, _INOTIFY_READ_SIZE)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(events_data):
+                _, cur_mask, _, cur_name_size = unpack_from(_INOTIFY_EVENT_FORMAT, events_data, offset)
+                offset += _INOTIFY_EVENT_SIZE
+                cur_file_name = events_data[offset:offset + cur_name_size].rstrip(b'\0')
+                cur_file_name = cur_file_name.decode(errors='surrogateescape')
+                offset += cur_name_size
+                if cur_mask & _IN_Q_OVERFLOW:
+                    return self.scan()
+                if not cur_mask & _IN_ISDIR and self._is_watched_file_name(cur_file_name):
+                    file_paths.append(self._get_file_path(cur_file_name))
+        return list(dict.fromkeys(file_paths))
+
+    def wait_for_file_paths(self, timeout) -> list:
+        """Ждет событий inotify не дольше timeout и возвращает пути файлов, запись которых завершилась"""
+        if not select([self._inotify_fd], [], [], timeout)[0]:
+            return []
+        return self._read_file_paths()
+
+    def close(self):
+        """Закрывает дескриптор inotify"""
+        if self._inotify_fd is not None:
+            close(self._inotify_fd)
+            self._inotify_fd = None
+
+
+def get_file_watcher(
+        src_dir_path, file_extensions=DEFAULT_WATCH_FILE_EXTENSIONS, poll_seconds=DEFAULT_POLL_SECONDS,
+        use_inotify=True,
+) -> FileWatcher:
+    """Возвращает наблюдение через inotify, если он доступен и use_inotify, иначе наблюдение опросом"""
+    if use_inotify:
+        try:
+            return InotifyFileWatcher(src_dir_path=src_dir_path, file_extensions=file_extensions)
+        except OSError:
+            pass
+    return PollingFileWatcher(src_dir_path=src_dir_path, file_extensions=file_extensions, poll_seconds=poll_seconds)
@@ -0,0 +1,834 @@
+from abc import abstractmethod
+from codecs import getincrementaldecoder, lookup
+from collections import OrderedDict
+from csv import DictReader, DictWriter, reader, writer, get_dialect, Error as CSVError
+from hashlib import md5
+from io import StringIO, TextIOWrapper
+from itertools import islice, chain
+from locale import getpreferredencoding
+from operator import itemgetter
+from os import makedirs
+from os.path import exists, basename, dirname
+from re import compile as re_compile
+from shutil import rmtree
+
+from helpers_csv_sniffing import DEFAULT_FALLBACK_ENCODINGS, DecodeErrorsCounter, QuarantineFile, \
+    detect_encoding, has_undecoded_bytes, sniff_format_params
+
+pyarrow = None
+zstandard = None
+
+DEFAULT_ARROW_BATCH_SIZE = 64 * 1024
+DEFAULT_WRITE_BUFFER_SIZE = 1024 * 1024
+DEFAULT_MAX_OPEN_SHARDS = 64
+DEFAULT_SNIFF_SAMPLE_SIZE = 64 * 1024
+DEFAULT_READ_BLOCK_SIZE = 1024 * 1024
+DEFAULT_QUARANTINE_DIR_NAME = '.quarantine'
+COMPRESSION_FILE_EXTENSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+_SHARD_NAME_INVALID_CHARS = re_compile(r'[^\w\-]+')
+
+
+def _import_pyarrow():
+    """Импортирует pyarrow при первом создании колоночного бэкенда
+
+    Импорт pyarrow занимает заметную долю запуска, поэтому при обработке csv он не выполняется
+
+    """
+    global pyarrow
+    if pyarrow is not None:
+        return
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.csv
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        pyarrow = None
+        raise ImportError('Для чтения и записи Parquet / Arrow IPC необходимо установить пакет pyarrow')
+
+
+def _import_zstandard():
+    """Импортирует zstandard при первом использовании сжатия zstd"""
+    global zstandard
+    if zstandard is not None:
+        return
+    try:
+        import zstandard
+    except ImportError:
+        zstandard = None
+        raise ImportError('Для сжатия zstd необходимо установить пакет zstandard')
+
+
+def check_compression(compression):
+    """Проверяет, что сжатие поддерживается"""
+    if compression not in COMPRESSION_FILE_EXTENSIONS:
+        raise ValueError(
+            f'Неизвестное сжатие "{compression}", допустимые: {", ".join(filter(None, COMPRESSION_FILE_EXTENSIONS))}'
+        )
+
+
+def open_compressed_write_obj(file_path, compression=None, append=False):
+    """Открывает бинарный файл для записи, при заданном compression - с потоковым сжатием gzip или zstd
+
+    При дозаписи в сжатый файл добавляется новый кадр (gzip member, zstd frame), файл остается корректным
+
+    """
+    check_compression(compression)
+    mode = 'ab' if append else 'wb'
+    if compression is None:
+        return open(file_path, mode)
+    if compression == 'gzip':
+        from gzip import open as open_gzip
+        return open_gzip(file_path, mode, compresslevel=6)
+    _import_zstandard()
+    return zstandard.open(file_path, mode)
+
+
+def get_shard_file_name(value) -> str:
+    """Возвращает имя файла для значения колонки шардирования
+
+    Недопустимые в имени символы заменяются на "_", при замене добавляется хеш значения,
+    чтобы разные значения не попали в один файл
+
+    """
+    value = '' if value is None else str(value)
+    shard_name = _SHARD_NAME_INVALID_CHARS.sub('_', value)[:80]
+    if shard_name != value or not shard_name:
+        shard_name = f'{shard_name}_{md5(value.encode()).hexdigest()[:8]}'
+    return shard_name
+
+
+def _is_pyarrow_available() -> bool:
+    """Проверяет, установлен ли pyarrow, и импортирует его"""
+    try:
+        _import_pyarrow()
+    except ImportError:
+        return False
+    return True
+
+
+class ReaderBackend:
+    """Базовый класс бэкенда чтения исходных строк в виде словарей или кортежей значений
+
+    supports_chunks - признак чтения файла частями по диапазонам байт при обработке по частям
+
+    """
+    supports_chunks = False
+
+    @abstractmethod
+    def iter_dicts(self, src_file_path, dialect=None, encoding=None, field_names=None, read_obj_wrapper=None):
+        """Абстрактный генератор строк
+
+        field_names - необходимые колонки, None - все колонки,
+        read_obj_wrapper - обертка открытого текстового файла (например, для замера времени чтения)
+
+        """
+        pass
+
+    @abstractmethod
+    def iter_tuples(self, src_file_path, dialect=None, encoding=None, field_names=None, read_obj_wrapper=None):
+        """Абстрактный генератор строк в виде последовательностей значений. Первая строка - заголовок"""
+        pass
+
+
+class CSVReaderBackend(ReaderBackend):
+    """Чтение csv через DictReader или csv.reader
+
+    Строка csv разбирается целиком, поэтому field_names не используется
+
+    """
+    supports_chunks = True
+
+    def iter_dicts(self, src_file_path, dialect=None, encoding=None, field_names=None, read_obj_wrapper=None):
+        """Генератор строк csv в виде словарей"""
+        with open(src_file_path, 'r', encoding=encoding, newline='') as read_obj:
+            yield from DictReader(read_obj_wrapper(read_obj) if read_obj_wrapper else read_obj, dialect=dialect)
+
+    def iter_tuples(self, src_file_path, dialect=None, encoding=None, field_names=None, read_obj_wrapper=None):
+        """Генератор строк csv в виде списков csv.reader без пустых строк, как их пропускает DictReader"""
+        with open(src_file_path, 'r', encoding=encoding, newline='') as read_obj:
+            yield from filter(None, reader(
+                read_obj_wrapper(read_obj) if read_obj_wrapper else read_obj, dialect=dialect,
+            ))
+
+
+class SniffingCSVReaderBackend(CSVReaderBackend):
+    """Чтение csv от партнеров: определение кодировки и диалекта, карантин неразобранных строк
+
+    По первым sample_size байтам определяются кодировка (BOM, затем первая подходящая из fallback_encodings,
+    если кодировка не задана преобразователем) и, при sniff_dialect, разделитель и кавычки.
+    Файл декодируется блоками по block_size байт. Строки с ошибкой разбора, с количеством полей,
+    отличным от заголовка, и с байтами, не декодируемыми в кодировке файла, пишутся в файл карантина
+    <quarantine_dir_path>/<имя файла>.quarantine.csv с номерами строк, а не прерывают обработку.
+    По умолчанию карантин пишется в скрытую поддиректорию .quarantine исходной директории,
+    чтобы файлы карантина не принимались за исходные при обходе директории и в режиме наблюдения.
+
+    fast_parser - разбор pyarrow.csv, если pyarrow установлен: читаются только колонки field_names.
+    Используется для файлов, начало которых декодируется без ошибок. Если pyarrow не смог разобрать файл
+    (например, байты не в кодировке файла), чтение продолжается csv.reader с той же строки
+
+    """
+    supports_chunks = False
+
+    def __init__(
+            self, fallback_encodings=DEFAULT_FALLBACK_ENCODINGS, sample_size=DEFAULT_SNIFF_SAMPLE_SIZE,
+            block_size=DEFAULT_READ_BLOCK_SIZE, quarantine_dir_path=None, sniff_dialect=True, fast_parser=False,
+    ):
+        self.fallback_encodings = tuple(fallback_encodings)
+        self.sample_size = sample_size
+        self.block_size = block_size
+        self.quarantine_dir_path = quarantine_dir_path
+        self.sniff_dialect = sniff_dialect
+        self.fast_parser = fast_parser and _is_pyarrow_available()
+
+    def __setstate__(self, state):
+        """Восстановление в процессе пула: pyarrow импортируется и там"""
+        if state.get('fast_parser'):
+            _import_pyarrow()
+        self.__dict__.update(state)
+
+    def get_quarantine_file_path(self, src_file_path):
+        """Возвращает путь файла карантина исходного файла"""
+        quarantine_dir_path = self.quarantine_dir_path
+        if not quarantine_dir_path:
+            quarantine_dir_path = f'{dirname(src_file_path) or "."}/{DEFAULT_QUARANTINE_DIR_NAME}'
+        return f'{quarantine_dir_path}/{basename(src_file_path)}.quarantine.csv'
+
+    def get_source_format(self, src_file_path, dialect=None, encoding=None) -> tuple:
+        """Возвращает кодировку, параметры формата csv, отличные от dialect, текст образца и признак его
+        декодирования без ошибок"""
+        with open(src_file_path, 'rb') as read_obj:
+            sample = read_obj.read(self.sample_size)
+        is_sample_decoded = True
+        if not encoding:
+            encoding, is_sample_decoded = detect_encoding(sample=sample, fallback_encodings=self.fallback_encodings)
+        sample_text = getincrementaldecoder(encoding)(errors='replace').decode(sample, final=False)
+        format_params = sniff_format_params(sample_text=sample_text, dialect=dialect) if self.sniff_dialect else {}
+        return encoding, format_params, sample_text, is_sample_decoded
+
+    def _iter_python_rows(self, src_file_path, dialect, encoding, format_params, read_obj_wrapper, quarantine_file):
+        """Генератор заголовка и строк csv.reader без пустых строк, неразобранные строки пишутся в карантин"""
+        decode_errors_counter = DecodeErrorsCounter()
+        try:
+            with open(src_file_path, 'rb', buffering=self.block_size) as binary_read_obj:
+                read_obj = TextIOWrapper(
+                    binary_read_obj, encoding=encoding, errors=decode_errors_counter.handler_name, newline='',
+                )
+                read_obj._CHUNK_SIZE = self.block_size
+                csv_reader = reader(read_obj_wrapper(read_obj) if read_obj_wrapper else read_obj, dialect=dialect,
+                                    **format_params)
+                header_length = None
+                while True:
+                    try:
+                        for cur_row in csv_reader:
+                            if not cur_row:
+                                continue
+                            if header_length is None:
+                                header_length = len(cur_row)
+                            elif len(cur_row) != header_length:
+                                quarantine_file.add(
+                                    line_number=self._get_row_line_number(csv_reader=csv_reader, row=cur_row),
+                                    error=f'Количество полей {len(cur_row)}, ожидалось {header_length}',
+                                    row=cur_row,
+                                )
+                                continue
+                            elif decode_errors_counter.errors_count and has_undecoded_bytes(cur_row):
+                                quarantine_file.add(
+                                    line_number=self._get_row_line_number(csv_reader=csv_reader, row=cur_row),
+                                    error=f'Байты не в кодировке {encoding}',
+                                    row=cur_row,
+                                )
+                                continue
+                            yield cur_row
+                        return
+                    except CSVError as e:
+                        quarantine_file.add(line_number=csv_reader.line_num, error=f'Ошибка разбора csv: {e}', row='')
+        finally:
+            decode_errors_counter.close()
+
+    @staticmethod
+    def _get_row_line_number(csv_reader, row) -> int:
+        """Возвращает номер первой строки файла, в которой начинается разобранная строка csv"""
+        return csv_reader.line_num - sum(cur_value.count('\n') for cur_value in row)
+
+    def _iter_arrow_rows(self, src_file_path, dialect, encoding, format_params, header, field_names, quarantine_file):
+        """Генератор заголовка и строк, разобранных pyarrow.csv, с продолжением csv.reader при ошибке разбора"""
+        csv_dialect = get_dialect(dialect) if isinstance(dialect, str) else dialect
+        column_names = [cur_name for cur_name in header if cur_name in set(field_names)] if field_names else header
+        column_types = {cur_name: pyarrow.string() for cur_name in header}
+
+        def on_invalid_row(invalid_row):
+            quarantine_file.add(
+                line_number=invalid_row.number,
+                error=f'Количество полей {invalid_row.actual_columns}, ожидалось {invalid_row.expected_columns}',
+                row=invalid_row.text,
+            )
+            return 'skip'
+
+        yield tuple(column_names)
+        rows_count = 0
+        try:
+            csv_reader = pyarrow.csv.open_csv(
+                src_file_path,
+                read_options=pyarrow.csv.ReadOptions(
+                    encoding='utf8' if lookup(encoding).name == 'utf-8' else encoding,
+                    block_size=self.block_size,
+                    use_threads=False,
+                ),
+                parse_options=pyarrow.csv.ParseOptions(
+                    delimiter=format_params.get('delimiter', csv_dialect.delimiter),
+                    quote_char=format_params.get('quotechar', csv_dialect.quotechar) or False,
+                    double_quote=csv_dialect.doublequote,
+                    escape_char=csv_dialect.escapechar or False,
+                    newlines_in_values=True,
+                    invalid_row_handler=on_invalid_row,
+                ),
+                convert_options=pyarrow.csv.ConvertOptions(
+                    column_types=column_types,
+                    include_columns=column_names,
+                    strings_can_be_null=False,
+                    quoted_strings_can_be_null=False,
+                ),
+            )
+            for cur_record_batch in csv_reader:
+                yield from zip(*(cur_column.to_pylist() for cur_column in cur_record_batch.columns))
+                rows_count += cur_record_batch.num_rows
+        except pyarrow.ArrowInvalid:
+            quarantine_file.reset()
+            rows = self._iter_python_rows(
+                src_file_path=src_file_path,
+                dialect=dialect,
+                encoding=encoding,
+                format_params=format_params,
+                read_obj_wrapper=None,
+                quarantine_file=quarantine_file,
+            )
+            python_header = tuple(next(rows, ()))
+            column_indexes = [python_header.index(cur_name) for cur_name in column_names]
+            yield from (
+                tuple(cur_row[cur_index] for cur_index in column_indexes)
+                for cur_row in islice(rows, rows_count, None)
+            )
+
+    def iter_tuples(self, src_file_path, dialect=None, encoding=None, field_names=None, read_obj_wrapper=None):
+        """Генератор строк в виде последовательностей значений, первая строка - заголовок"""
+        encoding, format_params, sample_text, is_sample_decoded = self.get_source_format(
+            src_file_path=src_file_path, dialect=dialect, encoding=encoding,
+        )
+        quarantine_file = QuarantineFile(file_path=self.get_quarantine_file_path(src_file_path))
+        header = None
+        if self.fast_parser and is_sample_decoded and '\n' in sample_text:
+            header = next(reader(StringIO(sample_text, newline=''), dialect=dialect, **format_params), None)
+        try:
+            if header and len(set(header)) == len(header):
+                yield from self._iter_arrow_rows(
+                    src_file_path=src_file_path,
+                    dialect=dialect,
+                    encoding=encoding,
+                    format_params=format_params,
+                    header=header,
+                    field_names=field_names,
+                    quarantine_file=quarantine_file,
+                )
+            else:
+                yield from self._iter_python_rows(
+                    src_file_path=src_file_path,
+                    dialect=dialect,
+                    encoding=encoding,
+                    format_params=format_params,
+                    read_obj_wrapper=read_obj_wrapper,
+                    quarantine_file=quarantine_file,
+                )
+        finally:
+            quarantine_file.close()
+
+    def iter_dicts(self, src_file_path, dialect=None, encoding=None, field_names=None, read_obj_wrapper=None):
+        """Генератор строк в виде словарей"""
+        rows = self.iter_tuples(
+            src_file_path=src_file_path,
+            dialect=dialect,
+            encoding=encoding,
+            field_names=field_names,
+            read_obj_wrapper=read_obj_wrapper,
+        )
+        header = tuple(next(rows, ()))
+        for cur_row in rows:
+            yield dict(zip(header, cur_row))
+
+
+class ArrowReaderBackend(ReaderBackend):
+    """Базовый класс чтения колоночных форматов пакетами записей
+
+    Читаются только колонки field_names, присутствующие в схеме. Значения приводятся к строкам,
+    пустые значения - к пустой строке, как их возвращает DictReader
+
+    """
+
+    def __init__(self, batch_size=DEFAULT_ARROW_BATCH_SIZE):
+        _import_pyarrow()
+        self._batch_size = batch_size
+
+    def __setstate__(self, state):
+        """Восстановление в процессе пула: pyarrow импортируется и там"""
+        _import_pyarrow()
+        self.__dict__.update(state)
+
+    @staticmethod
+    def _get_projected_column_names(schema, field_names):
+        """Возвращает колонки схемы, которые нужно прочитать"""
+        if not field_names:
+            return None
+        field_names = set(field_names)
+        return [cur_name for cur_name in schema.names if cur_name in field_names]
+
+    @staticmethod
+    def _get_string_columns(record_batch) -> list:
+        """Возвращает колонки пакета записей, приведенные к строкам с пустой строкой вместо null"""
+        return [
+            pyarrow.compute.fill_null(pyarrow.compute.cast(cur_column, pyarrow.string()), '')
+            for cur_column in record_batch.columns
+        ]
+
+    @abstractmethod
+    def _iter_record_batches(self, src_file_path, field_names=None):
+        """Абстрактный генератор пакетов записей с проекцией колонок field_names"""
+        pass
+
+    def iter_dicts(self, src_file_path, dialect=None, encoding=None, field_names=None, read_obj_wrapper=None):
+        """Генератор строк со строковыми значениями в виде словарей"""
+        for cur_record_batch in self._iter_record_batches(src_file_path=src_file_path, field_names=field_names):
+            yield from pyarrow.RecordBatch.from_arrays(
+                self._get_string_columns(record_batch=cur_record_batch), names=cur_record_batch.schema.names,
+            ).to_pylist()
+
+    def iter_tuples(self, src_file_path, dialect=None, encoding=None, field_names=None, read_obj_wrapper=None):
+        """Генератор строк со строковыми значениями в виде кортежей, собранных из колонок пакета"""
+        is_header_yielded = False
+        for cur_record_batch in self._iter_record_batches(src_file_path=src_file_path, field_names=field_names):
+            if not is_header_yielded:
+                yield tuple(cur_record_batch.schema.names)
+                is_header_yielded = True
+            yield from zip(*(
+                cur_column.to_pylist() for cur_column in self._get_string_columns(record_batch=cur_record_batch)
+            ))
+
+
+class ParquetReaderBackend(ArrowReaderBackend):
+    """Чтение Parquet пакетами записей с проекцией колонок"""
+
+    def _iter_record_batches(self, src_file_path, field_names=None):
+        """Генератор пакетов записей Parquet"""
+        parquet_file = pyarrow.parquet.ParquetFile(src_file_path)
+        column_names = self._get_projected_column_names(schema=parquet_file.schema_arrow, field_names=field_names)
+        yield from parquet_file.iter_batches(batch_size=self._batch_size, columns=column_names)
+
+
+class ArrowIPCReaderBackend(ArrowReaderBackend):
+    """Чтение Arrow IPC (Feather v2) файла через memory map с проекцией колонок"""
+
+    def _iter_record_batches(self, src_file_path, field_names=None):
+        """Генератор пакетов записей Arrow IPC"""
+        with pyarrow.memory_map(src_file_path, 'r') as source:
+            ipc_reader = pyarrow.ipc.open_file(source)
+            column_names = self._get_projected_column_names(schema=ipc_reader.schema, field_names=field_names)
+            for cur_batch_index in range(ipc_reader.num_record_batches):
+                cur_record_batch = ipc_reader.get_batch(cur_batch_index)
+                if column_names is not None:
+                    cur_record_batch = cur_record_batch.select(column_names)
+                yield cur_record_batch
+
+
+class WriterBackend:
+    """Базовый класс бэкенда записи подготовленных строк"""
+    file_extension = None
+
+    @abstractmethod
+    def save_dicts(self, dst_file_path, dict_rows, dialect=None):
+        """Абстрактный метод записи строк в файл. Возвращает наименования полей или None, если строк нет"""
+        pass
+
+    @abstractmethod
+    def save_tuples(self, dst_file_path, field_names, tuple_rows, dialect=None):
+        """Абстрактный метод записи строк-кортежей в порядке field_names. Возвращает field_names или None"""
+        pass
+
+
+class CSVWriterBackend(WriterBackend):
+    """Запись csv через DictWriter или csv.writer
+
+    buffer_size - размер буфера записи файла
+
+    """
+    file_extension = 'csv'
+
+    def __init__(self, buffer_size=DEFAULT_WRITE_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+
+    @staticmethod
+    def write_dicts(write_obj, dict_rows, dialect=None, with_header=True):
+        """Пишет строки в открытый файл. Наименования полей берутся из первой строки"""
+        first_row = next(dict_rows, None)
+        if first_row is None:
+            return None
+        dict_writer = DictWriter(write_obj, dialect=dialect, fieldnames=first_row.keys())
+        if with_header:
+            dict_writer.writeheader()
+        dict_writer.writerow(first_row)
+        dict_writer.writerows(dict_rows)
+        return tuple(first_row.keys())
+
+    @staticmethod
+    def write_tuples(write_obj, field_names, tuple_rows, dialect=None, with_header=True):
+        """Пишет строки-кортежи в открытый файл. Заголовок пишется, только если есть строки"""
+        first_row = next(tuple_rows, None)
+        if first_row is None:
+            return None
+        csv_writer = writer(write_obj, dialect=dialect)
+        if with_header:
+            csv_writer.writerow(field_names)
+        csv_writer.writerow(first_row)
+        csv_writer.writerows(tuple_rows)
+        return tuple(field_names)
+
+    def save_dicts(self, dst_file_path, dict_rows, dialect=None):
+        """Пишет строки в csv файл"""
+        with open(dst_file_path, 'w', buffering=self.buffer_size) as write_obj:
+            return self.write_dicts(write_obj=write_obj, dict_rows=dict_rows, dialect=dialect)
+
+    def save_tuples(self, dst_file_path, field_names, tuple_rows, dialect=None):
+        """Пишет строки-кортежи в csv файл"""
+        with open(dst_file_path, 'w', buffering=self.buffer_size) as write_obj:
+            return self.write_tuples(
+                write_obj=write_obj, field_names=field_names, tuple_rows=tuple_rows, dialect=dialect,
+            )
+
+
+class RollingCSVFile:
+    """Файл для csv.writer: кодирует и буферизует строки, при превышении лимитов переходит к следующей части
+
+    Первая запись считается заголовком и повторяется в начале каждой части. csv.writer пишет каждую строку
+    одним вызовом write, поэтому части делятся по границам строк. max_bytes ограничивает размер части до сжатия.
+    Части открываются при первой записи, путь части возвращает get_part_file_path(номер части).
+    suspend закрывает файл части с сохранением положения, следующая запись дописывает в ту же часть
+
+    """
+
+    def __init__(
+            self, get_part_file_path, compression=None, encoding=None, max_rows=None, max_bytes=None,
+            buffer_size=DEFAULT_WRITE_BUFFER_SIZE,
+    ):
+        self._get_part_file_path = get_part_file_path
+        self._compression = compression
+        self._encoding = encoding if encoding else getpreferredencoding(False)
+        self._max_rows = max_rows
+        self._max_bytes = max_bytes
+        self._buffer_size = buffer_size
+        self._header = None
+        self._write_obj = None
+        self._part_number = 0
+        self._rows_count = 0
+        self._bytes_count = 0
+        self._chunks = []
+        self._chunks_size = 0
+        self.file_paths = []
+
+    def _open_next_part(self):
+        """Закрывает текущую часть и начинает следующую с заголовка"""
+        self.suspend()
+        self._part_number += 1
+        self.file_paths.append(self._get_part_file_path(self._part_number))
+        self._write_obj = open_compressed_write_obj(file_path=self.file_paths[-1], compression=self._compression)
+        self._rows_count = 0
+        self._bytes_count = 0
+        self._append(self._header)
+
+    def _append(self, data):
+        """Добавляет данные в буфер, заполненный буфер пишется в файл одним вызовом"""
+        self._chunks.append(data)
+        self._chunks_size += len(data)
+        self._bytes_count += len(data)
+        if self._chunks_size >= self._buffer_size:
+            self._flush_chunks()
+
+    def _flush_chunks(self):
+        """Пишет буфер в файл текущей части"""
+        if self._chunks:
+            self._write_obj.write(b''.join(self._chunks))
+            self._chunks = []
+            self._chunks_size = 0
+
+    def write(self, text):
+        """Пишет строку csv, при превышении лимитов - в новую часть"""
+        data = text.encode(self._encoding)
+        if self._header is None:
+            self._header = data
+            self._open_next_part()
+            return
+        if self._rows_count and (
+                (self._max_rows and self._rows_count >= self._max_rows)
+                or (self._max_bytes and self._bytes_count + len(data) > self._max_bytes)
+        ):
+            self._open_next_part()
+        elif self._write_obj is None:
+            self._write_obj = open_compressed_write_obj(
+                file_path=self.file_paths[-1], compression=self._compression, append=True,
+            )
+        self._append(data)
+        self._rows_count += 1
+
+    def suspend(self):
+        """Пишет буфер и закрывает файл текущей части"""
+        if self._write_obj is not None:
+            self._flush_chunks()
+            self._write_obj.close()
+            self._write_obj = None
+
+    def close(self):
+        """Завершает запись"""
+        self.suspend()
+
+
+class ShardedCSVWriterBackend(WriterBackend):
+    """Запись csv с делением на части, шардированием по значению колонки и потоковым сжатием
+
+    max_rows / max_bytes - лимиты части по количеству строк и размеру до сжатия,
+    shard_field_name - колонка, по значению которой строки за один проход раскладываются по файлам,
+    compression - gzip или zstd (пакет zstandard), buffer_size - размер буфера записи каждого файла,
+    max_open_shards - количество одновременно открытых файлов шардов, давно не использованные закрываются
+    и при следующей строке дописываются.
+
+    Без деления результат - один файл csv[.gz|.zst]. При делении результат - директория с именем исходного
+    файла и файлами <значение колонки>.<номер части>.csv[.gz|.zst], номер части - только при лимитах.
+    Каждый файл начинается с заголовка
+
+    """
+
+    def __init__(
+            self, max_rows=None, max_bytes=None, shard_field_name=None, compression=None,
+            buffer_size=DEFAULT_WRITE_BUFFER_SIZE, max_open_shards=DEFAULT_MAX_OPEN_SHARDS, encoding=None,
+    ):
+        check_compression(compression)
+        if compression == 'zstd':
+            _import_zstandard()
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.shard_field_name = shard_field_name
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.max_open_shards = max_open_shards
+        self.encoding = encoding
+        self.part_file_extension = f'csv{COMPRESSION_FILE_EXTENSIONS[compression]}'
+        self.file_extension = None if self.is_multi_file else self.part_file_extension
+
+    def __setstate__(self, state):
+        """Восстановление в процессе пула: zstandard импортируется и там"""
+        if state.get('compression') == 'zstd':
+            _import_zstandard()
+        self.__dict__.update(state)
+
+    @property
+    def is_multi_file(self):
+        """Признак записи результата в директорию из нескольких файлов"""
+        return bool(self.max_rows or self.max_bytes or self.shard_field_name)
+
+    def _get_part_file_path(self, dst_file_path, shard_value, part_number):
+        """Возвращает путь файла части шарда в результирующей директории или путь единственного файла"""
+        if not self.is_multi_file:
+            return dst_file_path
+        name_parts = []
+        if self.shard_field_name:
+            name_parts.append(get_shard_file_name(shard_value))
+        if self.max_rows or self.max_bytes:
+            name_parts.append(f'{part_number:05d}')
+        return f'{dst_file_path}/{".".join(name_parts)}.{self.part_file_extension}'
+
+    def _get_shard_value_func(self, field_names, tuple_rows):
+        """Возвращает функцию получения значения колонки шардирования или None"""
+        if not self.shard_field_name:
+            return None
+        if self.shard_field_name not in field_names:
+            raise ValueError(
+                f'Колонка шардирования "{self.shard_field_name}" отсутствует в результирующих полях {field_names}'
+            )
+        return itemgetter(field_names.index(self.shard_field_name) if tuple_rows else self.shard_field_name)
+
+    def _get_shard_writer(self, dst_file_path, field_names, shard_value, tuple_rows, dialect) -> tuple:
+        """Возвращает писатель csv и файл шарда с записанным заголовком"""
+        shard_file = RollingCSVFile(
+            get_part_file_path=lambda part_number: self._get_part_file_path(
+                dst_file_path=dst_file_path, shard_value=shard_value, part_number=part_number,
+            ),
+            compression=self.compression,
+            encoding=self.encoding,
+            max_rows=self.max_rows,
+            max_bytes=self.max_bytes,
+            buffer_size=self.buffer_size,
+        )
+        if tuple_rows:
+            shard_writer = writer(shard_file, dialect=dialect)
+            shard_writer.writerow(field_names)
+        else:
+            shard_writer = DictWriter(shard_file, dialect=dialect, fieldnames=field_names)
+            shard_writer.writeheader()
+        return shard_writer, shard_file
+
+    def _save_rows(self, dst_file_path, field_names, rows, tuple_rows, dialect):
+        """Раскладывает строки по файлам шардов за один проход"""
+        field_names = tuple(field_names)
+        get_shard_value = self._get_shard_value_func(field_names=field_names, tuple_rows=tuple_rows)
+        if self.is_multi_file:
+            if exists(dst_file_path):
+                rmtree(dst_file_path)
+            makedirs(dst_file_path)
+
+        shard_writers = {}
+        open_shard_files = OrderedDict()
+        try:
+            for cur_row in rows:
+                cur_shard_value = get_shard_value(cur_row) if get_shard_value else None
+                cur_shard = shard_writers.get(cur_shard_value)
+                if cur_shard is None:
+                    cur_shard = shard_writers[cur_shard_value] = self._get_shard_writer(
+                        dst_file_path=dst_file_path, field_names=field_names, shard_value=cur_shard_value,
+                        tuple_rows=tuple_rows, dialect=dialect,
+                    )
+                    open_shard_files[cur_shard_value] = cur_shard[1]
+                elif get_shard_value:
+                    open_shard_files[cur_shard_value] = cur_shard[1]
+                    open_shard_files.move_to_end(cur_shard_value)
+                if len(open_shard_files) > self.max_open_shards:
+                    open_shard_files.popitem(last=False)[1].suspend()
+                cur_shard[0].writerow(cur_row)
+        finally:
+            for cur_shard_file in open_shard_files.values():
+                cur_shard_file.close()
+        return field_names
+
+    def save_dicts(self, dst_file_path, dict_rows, dialect=None):
+        """Пишет строки-словари. Наименования полей берутся из первой строки"""
+        first_row = next(dict_rows, None)
+        if first_row is None:
+            return self._save_empty(dst_file_path=dst_file_path)
+        return self._save_rows(
+            dst_file_path=dst_file_path,
+            field_names=first_row.keys(),
+            rows=chain((first_row,), dict_rows),
+            tuple_rows=False,
+            dialect=dialect,
+        )
+
+    def save_tuples(self, dst_file_path, field_names, tuple_rows, dialect=None):
+        """Пишет строки-кортежи в порядке field_names"""
+        first_row = next(tuple_rows, None)
+        if first_row is None:
+            return self._save_empty(dst_file_path=dst_file_path)
+        return self._save_rows(
+            dst_file_path=dst_file_path,
+            field_names=field_names,
+            rows=chain((first_row,), tuple_rows),
+            tuple_rows=True,
+            dialect=dialect,
+        )
+
+    def _save_empty(self, dst_file_path):
+        """Создает пустой результат: пустую директорию или пустой файл"""
+        if self.is_multi_file:
+            if exists(dst_file_path):
+                rmtree(dst_file_path)
+            makedirs(dst_file_path)
+        else:
+            open_compressed_write_obj(file_path=dst_file_path, compression=self.compression).close()
+        return None
+
+
+class ArrowWriterBackend(WriterBackend):
+    """Базовый класс записи колоночных форматов пакетами записей со строковыми колонками"""
+
+    def __init__(self, batch_size=DEFAULT_ARROW_BATCH_SIZE):
+        _import_pyarrow()
+        self._batch_size = batch_size
+
+    def __setstate__(self, state):
+        """Восстановление в процессе пула: pyarrow импортируется и там"""
+        _import_pyarrow()
+        self.__dict__.update(state)
+
+    @abstractmethod
+    def _open_writer(self, dst_file_path, schema):
+        """Абстрактный метод открытия писателя пакетов записей"""
+        pass
+
+    def _write_record_batches(self, dst_file_path, field_names, rows, rows_to_record_batch):
+        """Пишет строки в файл пакетами по _batch_size, пакет собирается функцией rows_to_record_batch"""
+        schema = pyarrow.schema([(cur_name, pyarrow.string()) for cur_name in field_names])
+        with self._open_writer(dst_file_path=dst_file_path, schema=schema) as writer_obj:
+            while True:
+                cur_batch_rows = list(islice(rows, self._batch_size))
+                if not cur_batch_rows:
+                    break
+                writer_obj.write_batch(rows_to_record_batch(cur_batch_rows, schema))
+        return tuple(field_names)
+
+    def save_dicts(self, dst_file_path, dict_rows, dialect=None):
+        """Пишет строки-словари в файл. Наименования полей берутся из первой строки, без строк - файл без колонок"""
+        first_row = next(dict_rows, None)
+        if first_row is None:
+            self._write_record_batches(
+                dst_file_path=dst_file_path, field_names=(), rows=iter(()), rows_to_record_batch=None,
+            )
+            return None
+        return self._write_record_batches(
+            dst_file_path=dst_file_path,
+            field_names=tuple(first_row.keys()),
+            rows=chain((first_row,), dict_rows),
+            rows_to_record_batch=lambda batch_rows, schema: pyarrow.RecordBatch.from_pylist(batch_rows, schema=schema),
+        )
+
+    def save_tuples(self, dst_file_path, field_names, tuple_rows, dialect=None):
+        """Пишет строки-кортежи в файл, пакет собирается по колонкам. Без строк пишется файл только со схемой"""
+        first_row = next(tuple_rows, None)
+        if first_row is None:
+            self._write_record_batches(
+                dst_file_path=dst_file_path, field_names=field_names, rows=iter(()), rows_to_record_batch=None,
+            )
+            return None
+        return self._write_record_batches(
+            dst_file_path=dst_file_path,
+            field_names=field_names,
+            rows=chain((first_row,), tuple_rows),
+            rows_to_record_batch=lambda batch_rows, schema: pyarrow.RecordBatch.from_arrays(
+                [pyarrow.array(cur_column, pyarrow.string()) for cur_column in zip(*batch_rows)], schema=schema,
+            ),
+        )
+
+
+class ParquetWriterBackend(ArrowWriterBackend):
+    """Запись Parquet"""
+    file_extension = 'parquet'
+
+    def _open_writer(self, dst_file_path, schema):
+        """Открывает писатель Parquet"""
+        return pyarrow.parquet.ParquetWriter(dst_file_path, schema)
+
+
+class ArrowIPCWriterBackend(ArrowWriterBackend):
+    """Запись Arrow IPC (Feather v2)"""
+    file_extension = 'arrow'
+
+    def _open_writer(self, dst_file_path, schema):
+        """Открывает писатель Arrow IPC"""
+        return pyarrow.ipc.new_file(dst_file_path, schema)
+
+
+READER_BACKEND_CLASSES_BY_EXTENSION = {
+    'parquet': ParquetReaderBackend,
+    'arrow': ArrowIPCReaderBackend,
+    'feather': ArrowIPCReaderBackend,
+}
+
+
+def get_reader_backend_for_file(src_file_path) -> ReaderBackend:
+    """Возвращает бэкенд чтения по расширению файла, по умолчанию - csv"""
+    file_extension = src_file_path.rsplit('.', 1)[-1].lower()
+    return READER_BACKEND_CLASSES_BY_EXTENSION.get(file_extension, CSVReaderBackend)()
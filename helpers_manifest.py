@@ -0,0 +1,201 @@
+from hashlib import blake2b
+from json import dump, load, dumps
+from os import replace, stat, remove
+from os.path import exists
+from pickle import dump as pickle_dump, load as pickle_load, HIGHEST_PROTOCOL
+
+MANIFEST_FILE_NAME = '.manifest.json'
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def write_json_atomically(file_path, data):
+    """Пишет json во временный файл и переименовывает его, чтобы прерванная запись не портила файл"""
+    tmp_file_path = f'{file_path}.tmp'
+    with open(tmp_file_path, 'w', encoding='utf-8') as write_obj:
+        dump(data, write_obj, ensure_ascii=False, indent=2)
+    replace(tmp_file_path, file_path)
+
+
+def read_json(file_path, default=None):
+    """Читает json, при отсутствии или повреждении файла возвращает default"""
+    if not exists(file_path):
+        return default
+    try:
+        with open(file_path, 'r', encoding='utf-8') as read_obj:
+            return load(read_obj)
+    except ValueError:
+        return default
+
+
+def get_file_hash(file_path) -> str:
+    """Возвращает хеш содержимого файла"""
+    file_hash = blake2b(digest_size=20)
+    with open(file_path, 'rb') as read_obj:
+        for cur_block in iter(lambda: read_obj.read(_HASH_BLOCK_SIZE), b''):
+            file_hash.update(cur_block)
+    return file_hash.hexdigest()
+
+
+def _config_value_to_json(value):
+    """Приводит значения параметров преобразователя (классы, бэкенды) к стабильному json представлению"""
+    if isinstance(value, type):
+        return f'{value.__module__}.{value.__qualname__}'
+    return {
+        'class': f'{type(value).__module__}.{type(value).__qualname__}',
+        'state': vars(value) if hasattr(value, '__dict__') else repr(value),
+    }
+
+
+def get_transformer_config(transformer_class, transformer_kwargs) -> str:
+    """Возвращает строку конфигурации преобразователя для сравнения запусков"""
+    return dumps(
+        {'transformer': _config_value_to_json(transformer_class), 'kwargs': transformer_kwargs},
+        sort_keys=True, ensure_ascii=False, default=_config_value_to_json,
+    )
+
+
+class ProcessingManifest:
+    """Манифест обработанных файлов в результирующей директории
+
+    По каждому исходному файлу хранит размер, время изменения, хеш содержимого,
+    конфигурацию преобразователя и путь результата. Файл считается актуальным,
+    если конфигурация та же, результат существует, а содержимое источника не менялось.
+    Хеш пересчитывается только когда при том же размере изменилось время изменения
+
+    """
+    _manifest_file_path = None
+    _entries = None
+
+    def __init__(self, dst_dir_path, manifest_file_name=MANIFEST_FILE_NAME):
+        self._manifest_file_path = f'{dst_dir_path}/{manifest_file_name}'
+        self._entries = read_json(self._manifest_file_path, default={})
+
+    def save(self):
+        """Сохраняет манифест"""
+        write_json_atomically(self._manifest_file_path, self._entries)
+
+    def is_up_to_date(self, src_file_path, transformer_config) -> bool:
+        """Признак того, что результат файла актуален и обработку можно пропустить"""
+        entry = self._entries.get(src_file_path)
+        if not entry or entry.get('config') != transformer_config or not exists(entry.get('result_file_path', '')):
+            return False
+
+        src_file_stat = stat(src_file_path)
+        if src_file_stat.st_size != entry.get('size'):
+            return False
+        if src_file_stat.st_mtime_ns == entry.get('mtime_ns'):
+            return True
+        if get_file_hash(src_file_path) == entry.get('hash'):
+            entry['mtime_ns'] = src_file_stat.st_mtime_ns
+            return True
+        return False
+
+    def mark_done(self, src_file_path, transformer_config, result_file_path, src_file_stat, src_file_hash):
+        """Записывает в манифест успешно обработанный файл"""
+        self._entries[src_file_path] = {
+            'size': src_file_stat.st_size,
+            'mtime_ns': src_file_stat.st_mtime_ns,
+            'hash': src_file_hash,
+            'config': transformer_config,
+            'result_file_path': result_file_path,
+        }
+
+
+class FileCheckpoint:
+    """Контрольная точка потоковой обработки одного файла для возобновления после прерывания
+
+    Хранит количество прочитанных исходных строк, подготовленных строк и размер
+    зафиксированной части временного результирующего файла. Точка действительна,
+    только пока размер и время изменения источника совпадают с записанными,
+    а конфигурация преобразователя transformer_config (get_transformer_config) - та же
+
+    """
+    _checkpoint_file_path = None
+    _src_file_path = None
+    _transformer_config = None
+
+    def __init__(self, checkpoint_file_path, src_file_path, transformer_config=None):
+        self._checkpoint_file_path = checkpoint_file_path
+        self._src_file_path = src_file_path
+        self._transformer_config = transformer_config
+
+    def _get_src_file_signature(self) -> list:
+        """Возвращает размер и время изменения источника"""
+        src_file_stat = stat(self._src_file_path)
+        return [src_file_stat.st_size, src_file_stat.st_mtime_ns]
+
+    def load(self):
+        """Возвращает сохраненную точку или None, если ее нет, источник изменился или точка другой конфигурации"""
+        checkpoint = read_json(self._checkpoint_file_path)
+        if (
+                not checkpoint
+                or checkpoint.get('src_file_signature') != self._get_src_file_signature()
+                or checkpoint.get('transformer_config') != self._transformer_config
+        ):
+            return None
+        return checkpoint
+
+    def save(self, rows_in_count, rows_out_count, result_size, field_names):
+        """Сохраняет точку после фиксации записанных строк на диске"""
+        write_json_atomically(self._checkpoint_file_path, {
+            'src_file_signature': self._get_src_file_signature(),
+            'transformer_config': self._transformer_config,
+            'rows_in_count': rows_in_count,
+            'rows_out_count': rows_out_count,
+            'result_size': result_size,
+            'field_names': list(field_names) if field_names else None,
+        })
+
+    def remove(self):
+        """Удаляет точку после завершения обработки файла"""
+        if exists(self._checkpoint_file_path):
+            remove(self._checkpoint_file_path)
+
+
+class FileSnapshot:
+    """Бинарный снимок (pickle) значения, построенного по исходному файлу, например индекса справочника
+
+    Снимок действителен, только пока совпадают хеш содержимого источника и параметры построения options.
+    Снимок пишется во временный файл и атомарно переименовывается, поврежденный снимок считается отсутствующим
+
+    """
+    _snapshot_file_path = None
+    _src_file_path = None
+    _options = None
+
+    def __init__(self, snapshot_file_path, src_file_path, options=None):
+        self._snapshot_file_path = snapshot_file_path
+        self._src_file_path = src_file_path
+        self._options = options
+
+    def load(self):
+        """Возвращает значение снимка или None, если снимка нет, он поврежден или устарел"""
+        if not exists(self._snapshot_file_path):
+            return None
+        try:
+            with open(self._snapshot_file_path, 'rb') as read_obj:
+                snapshot = pickle_load(read_obj)
+        except Exception:
+            return None
+        if (
+                not isinstance(snapshot, dict)
+                or snapshot.get('options') != self._options
+                or snapshot.get('src_file_hash') != get_file_hash(self._src_file_path)
+        ):
+            return None
+        return snapshot.get('value')
+
+    def save(self, value):
+        """Сохраняет снимок значения. Если директория недоступна для записи, снимок не сохраняется"""
+        tmp_file_path = f'{self._snapshot_file_path}.tmp'
+        try:
+            with open(tmp_file_path, 'wb') as write_obj:
+                pickle_dump({
+                    'src_file_hash': get_file_hash(self._src_file_path),
+                    'options': self._options,
+                    'value': value,
+                }, write_obj, protocol=HIGHEST_PROTOCOL)
+            replace(tmp_file_path, self._snapshot_file_path)
+        except OSError:
+            if exists(tmp_file_path):
+                remove(tmp_file_path)
@@ -0,0 +1,165 @@
+from collections import defaultdict
+from io import StringIO
+from json import dumps
+from pickle import PicklingError, dumps as dumps_pickle
+from random import random
+from time import perf_counter
+
+
+class TransformMetrics:
+    """Метрики одного преобразования файла
+
+    stage_seconds - время по стадиям: read (чтение файла), parse (разбор строк), prepare (подготовка строки),
+    prepare.<подготовщик> (время отдельных подготовщиков внутри prepare), write (сериализация и запись), total.
+    counters - счетчики строк и байт: rows_in, rows_out, rows_dropped, rows_dropped.<причина>, bytes_in, bytes_out
+
+    """
+
+    def __init__(self, transformer_name, src_file_path):
+        self.transformer_name = transformer_name
+        self.src_file_path = src_file_path
+        self.stage_seconds = defaultdict(float)
+        self.counters = defaultdict(int)
+        self.profile_stats = None
+
+    def add_stage_seconds(self, stage_name, seconds):
+        """Добавляет время стадии"""
+        self.stage_seconds[stage_name] += seconds
+
+    def increment(self, counter_name, value=1):
+        """Увеличивает счетчик"""
+        self.counters[counter_name] += value
+
+    def merge(self, metrics_dict):
+        """Добавляет метрики, собранные в другом процессе"""
+        for cur_stage_name, cur_seconds in metrics_dict['stage_seconds'].items():
+            self.add_stage_seconds(cur_stage_name, cur_seconds)
+        for cur_counter_name, cur_value in metrics_dict['counters'].items():
+            self.increment(cur_counter_name, cur_value)
+
+    def as_dict(self) -> dict:
+        """Возвращает метрики в виде словаря для логирования и передачи между процессами"""
+        return {
+            'transformer': self.transformer_name,
+            'src_file_path': self.src_file_path,
+            'stage_seconds': dict(self.stage_seconds),
+            'counters': dict(self.counters),
+            'profile_stats': self.profile_stats,
+        }
+
+
+class TimedReadObj:
+    """Обертка файла, накапливающая время чтения строк в метриках"""
+
+    def __init__(self, read_obj, metrics, stage_name='read'):
+        self._read_obj = read_obj
+        self._metrics = metrics
+        self._stage_name = stage_name
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        started_at = perf_counter()
+        try:
+            return next(self._read_obj)
+        finally:
+            self._metrics.add_stage_seconds(self._stage_name, perf_counter() - started_at)
+
+
+def timed_func(func, get_metrics, stage_name):
+    """Возвращает обертку функции, накапливающую время вызовов в метриках
+
+    Метрики получаются вызовом get_metrics при каждом вызове функции, поэтому обертка, сохраненная
+    между преобразованиями, пишет в метрики текущего преобразования
+
+    """
+    def wrapper(*args, **kwargs):
+        started_at = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            get_metrics().add_stage_seconds(stage_name, perf_counter() - started_at)
+    return wrapper
+
+
+class SamplingProfiler:
+    """cProfile, включаемый для доли запусков profile_sample_rate (0 - никогда, 1 - всегда)
+
+    cProfile и pstats импортируются только для профилируемых запусков
+
+    """
+
+    def __init__(self, profile_sample_rate, top_functions_count=30):
+        self._profile = None
+        if profile_sample_rate and random() < profile_sample_rate:
+            from cProfile import Profile
+            self._profile = Profile()
+        self._top_functions_count = top_functions_count
+
+    def __enter__(self):
+        if self._profile:
+            self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._profile:
+            self._profile.disable()
+
+    def get_stats_text(self):
+        """Возвращает текст статистики по накопленному времени или None, если запуск не профилировался"""
+        if not self._profile:
+            return None
+        from pstats import Stats
+        stats_stream = StringIO()
+        Stats(self._profile, stream=stats_stream).sort_stats('cumulative').print_stats(self._top_functions_count)
+        return stats_stream.getvalue()
+
+
+class MetricsHook:
+    """Базовый класс обработчика метрик, вызывается по завершении преобразования файла"""
+
+    def on_finish(self, metrics):
+        """Обрабатывает метрики преобразования"""
+        pass
+
+
+def check_metrics_hooks_picklable(metrics_hooks):
+    """Проверяет, что обработчики метрик можно передать в процессы пула, иначе выбрасывает ValueError"""
+    for cur_metrics_hook in metrics_hooks:
+        try:
+            dumps_pickle(cur_metrics_hook)
+        except (PicklingError, AttributeError, TypeError) as e:
+            raise ValueError(
+                f'Обработчик метрик {cur_metrics_hook!r} нельзя передать в процессы пула ({e}), '
+                f'используйте max_workers=1'
+            ) from e
+
+
+class CallbackMetricsHook(MetricsHook):
+    """Передает метрики в функцию обратного вызова
+
+    Обработчик передается в процессы пула вместе с параметрами преобразователя, поэтому в пакетной обработке
+    с max_workers != 1 callback должен сериализоваться pickle (функция уровня модуля, не lambda и не замыкание).
+    Lambda можно использовать только при обработке в текущем процессе (max_workers=1)
+
+    """
+
+    def __init__(self, callback):
+        self._callback = callback
+
+    def on_finish(self, metrics):
+        """Вызывает функцию обратного вызова с метриками"""
+        self._callback(metrics)
+
+
+class LoggingMetricsHook(MetricsHook):
+    """Пишет метрики структурированной строкой json в лог"""
+
+    def __init__(self, logger_name='transform_metrics'):
+        self._logger_name = logger_name
+
+    def on_finish(self, metrics):
+        """Пишет метрики в лог"""
+        from logging import getLogger
+        getLogger(self._logger_name).info('transform_metrics %s', dumps(metrics.as_dict(), ensure_ascii=False))
@@ -1,21 +1,47 @@
 from _csv import register_dialect, QUOTE_MINIMAL
-from csv import unix_dialect, DictReader
+from csv import unix_dialect, DictReader, reader
+from io import StringIO
+from locale import getpreferredencoding
+
+from helpers_io_backends import CSVReaderBackend
+
+
+class DefaultDialect(unix_dialect):
+    """Describe the usual properties of Unix-generated CSV files."""
+    delimiter = ','
+    quoting = QUOTE_MINIMAL
+
+
+register_dialect("default", DefaultDialect)
 
 
 class CSVFileReaderMixin:
-    """Миксин для чтения csv файлов"""
+    """Миксин для чтения csv файлов
+
+    _read_on_init - признак чтения всего файла в _csv_file_list_of_dict при инициализации,
+    при потоковой обработке строки получаются генератором _iter_csv_dicts
+
+    _reader_backend - бэкенд чтения исходного файла, по умолчанию csv
+
+    _encoding - кодировка исходного файла, None - кодировка локали (бэкенд с определением кодировки определяет ее сам)
+
+    _compact_rows - признак компактного представления строк: последовательности значений csv.reader
+    с заголовком в _csv_field_names вместо словаря на каждую строку. Весь файл читается в _csv_file_list_of_tuples
+
+    """
     _dialect = None
     _filename = None
     _src_file_path = None
     _csv_file_list_of_dict = None
+    _read_on_init = True
+    _encoding = None
+    _reader_backend = CSVReaderBackend()
+    _compact_rows = False
+    _csv_field_names = None
+    _csv_file_list_of_tuples = None
 
     def _init_dialect(self):
-        class DefaultDialect(unix_dialect):
-            """Describe the usual properties of Unix-generated CSV files."""
-            delimiter = ','
-            quoting = QUOTE_MINIMAL
-
-        register_dialect("default", DefaultDialect)
+        """Устанавливает диалект csv. Диалекты регистрируются один раз при импорте модуля"""
         self._dialect = 'default'
 
     def set_file_path(self, src_file_path):
@@ -23,15 +49,95 @@ class CSVFileReaderMixin:
         self._src_file_path = src_file_path
         self._filename = src_file_path.rsplit('/', 1)[-1]
 
+    def set_encoding(self, encoding):
+        """Сеттер кодировки исходного файла"""
+        self._encoding = encoding
+
+    def _get_encoding(self):
+        """Возвращает кодировку исходного файла"""
+        return self._encoding if self._encoding else getpreferredencoding(False)
+
+    def set_reader_backend(self, reader_backend):
+        """Сеттер бэкенда чтения исходного файла"""
+        self._reader_backend = reader_backend
+
+    def set_compact_rows(self, compact_rows):
+        """Сеттер признака компактного представления строк"""
+        self._compact_rows = compact_rows
+
+    def _get_source_field_names(self):
+        """Возвращает колонки исходного файла, необходимые для обработки. None - все колонки"""
+        return None
+
+    def _get_read_obj_wrapper(self):
+        """Возвращает обертку открытого исходного файла или None"""
+        return None
+
+    def _iter_csv_dicts(self):
+        """Генератор строк исходного файла в виде словарей, без чтения всего файла в память"""
+        yield from self._reader_backend.iter_dicts(
+            src_file_path=self._src_file_path,
+            dialect=self._dialect,
+            encoding=self._encoding,
+            field_names=self._get_source_field_names(),
+            read_obj_wrapper=self._get_read_obj_wrapper(),
+        )
+
+    def _get_csv_field_names_and_tuples(self) -> tuple:
+        """Возвращает заголовок исходного файла и генератор строк в виде последовательностей значений"""
+        tuple_rows = self._reader_backend.iter_tuples(
+            src_file_path=self._src_file_path,
+            dialect=self._dialect,
+            encoding=self._encoding,
+            field_names=self._get_source_field_names(),
+            read_obj_wrapper=self._get_read_obj_wrapper(),
+        )
+        return tuple(next(tuple_rows, ())), tuple_rows
+
+    def _read_csv_field_names(self) -> tuple:
+        """Читает наименования полей из заголовка csv"""
+        with open(self._src_file_path, 'r', encoding=self._encoding, newline='') as read_obj:
+            return tuple(next(reader(read_obj, dialect=self._dialect), ()))
+
+    def _iter_csv_dicts_in_range(self, start_offset, end_offset, field_names):
+        """Генератор строк csv в виде словарей из диапазона байт файла, начинающегося с границы записи"""
+        with open(self._src_file_path, 'rb') as read_obj:
+            read_obj.seek(start_offset)
+            chunk_text = read_obj.read(end_offset - start_offset).decode(self._get_encoding())
+        chunk_read_obj = StringIO(chunk_text, newline='')
+        read_obj_wrapper = self._get_read_obj_wrapper()
+        yield from DictReader(
+            read_obj_wrapper(chunk_read_obj) if read_obj_wrapper else chunk_read_obj,
+            fieldnames=field_names,
+            dialect=self._dialect,
+        )
+
+    def _iter_csv_tuples_in_range(self, start_offset, end_offset):
+        """Генератор строк csv в виде списков значений из диапазона байт файла, начинающегося с границы записи"""
+        with open(self._src_file_path, 'rb') as read_obj:
+            read_obj.seek(start_offset)
+            chunk_text = read_obj.read(end_offset - start_offset).decode(self._get_encoding())
+        chunk_read_obj = StringIO(chunk_text, newline='')
+        read_obj_wrapper = self._get_read_obj_wrapper()
+        yield from filter(None, reader(
+            read_obj_wrapper(chunk_read_obj) if read_obj_wrapper else chunk_read_obj, dialect=self._dialect,
+        ))
+
     def _read_csv_in_list_of_dict(self):
         """Читает данные csv в _csv_file_list_of_dict"""
-        with open(self._src_file_path, 'r') as read_obj:
-            dict_reader = DictReader(read_obj, dialect=self._dialect)
-            self._csv_file_list_of_dict = list(dict_reader)
+        self._csv_file_list_of_dict = list(self._iter_csv_dicts())
+
+    def _read_csv_in_list_of_tuples(self):
+        """Читает заголовок csv в _csv_field_names, строки - в _csv_file_list_of_tuples"""
+        self._csv_field_names, tuple_rows = self._get_csv_field_names_and_tuples()
+        self._csv_file_list_of_tuples = list(tuple_rows)
 
-    def __init__(self, src_file_path, *args, **kwargs):
+    def __init__(self, src_file_path, *args, encoding=None, **kwargs):
         self._init_dialect()
         self.set_file_path(src_file_path=src_file_path)
-        self._read_csv_in_list_of_dict()
+        self.set_encoding(encoding=encoding)
+        if self._read_on_init and self._compact_rows:
+            self._read_csv_in_list_of_tuples()
+        elif self._read_on_init:
+            self._read_csv_in_list_of_dict()
         super(CSVFileReaderMixin, self).__init__(*args, **kwargs)
-
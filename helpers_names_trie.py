@@ -0,0 +1,74 @@
+_TERMINAL = ''
+
+
+class NamesTrie:
+    """Префиксное дерево имен по словам для поиска имен из нескольких слов
+
+    names - нормализованные имена (в нижнем регистре). Однословные имена проверяются по множеству names,
+    в дерево добавляются только имена из нескольких слов ("анна мария"), поэтому построение по
+    справочнику из десятков тысяч имен занимает миллисекунды.
+    Слово через дефис считается именем, если в справочнике есть оно целиком или все его части ("анна-мария")
+
+    """
+    _single_names = frozenset()
+    _root = None
+
+    def __init__(self, names):
+        self._single_names = names if isinstance(names, frozenset) else frozenset(names)
+        self._root = {}
+        for cur_name in self._single_names:
+            cur_words = cur_name.split()
+            if len(cur_words) > 1:
+                self._add_words(cur_words)
+
+    def _add_words(self, words):
+        """Добавляет в дерево имя из нескольких слов"""
+        node = self._root
+        for cur_word in words:
+            node = node.setdefault(cur_word, {})
+        node[_TERMINAL] = True
+
+    def is_name_word(self, word) -> bool:
+        """Проверяет, является ли нормализованное слово именем"""
+        if word in self._single_names:
+            return True
+        if '-' in word:
+            word_parts = word.split('-')
+            return all(word_parts) and all(cur_part in self._single_names for cur_part in word_parts)
+        return False
+
+    def match_at(self, words, start) -> int:
+        """Возвращает конец (не включая) самого длинного имени, начинающегося со слова start, или start"""
+        start_word = words[start].lower()
+        end = start + 1 if self.is_name_word(start_word) else start
+        node = self._root.get(start_word)
+        cur_index = start + 1
+        while node is not None:
+            if _TERMINAL in node:
+                end = cur_index
+            if cur_index >= len(words):
+                break
+            node = node.get(words[cur_index].lower())
+            cur_index += 1
+        return end
+
+    def find_first_span(self, words):
+        """Возвращает позиции (начало, конец) первого имени в словах полного имени или None
+
+        Слова сравниваются в нижнем регистре, приводится только просмотренная часть слов.
+
+        Слова просматриваются один раз слева направо, из каждой позиции, с которой может начинаться имя,
+        дерево проходится не дальше длины самого длинного имени
+
+        """
+        single_names = self._single_names
+        root = self._root
+        for cur_start, cur_word in enumerate(words):
+            cur_word = cur_word.lower()
+            if cur_word in root:
+                cur_end = self.match_at(words, cur_start)
+                if cur_end > cur_start:
+                    return cur_start, cur_end
+            elif cur_word in single_names or ('-' in cur_word and self.is_name_word(cur_word)):
+                return cur_start, cur_start + 1
+        return None
@@ -0,0 +1,177 @@
+from csv import writer
+from random import Random
+
+FIRST_NAMES = (
+    'Александр', 'Алексей', 'Анастасия', 'Анна', 'Андрей', 'Валентина', 'Виктор', 'Владимир', 'Галина', 'Дмитрий',
+    'Евгений', 'Екатерина', 'Елена', 'Иван', 'Ирина', 'Казбек', 'Ксения', 'Мария', 'Михаил', 'Наталья',
+    'Николай', 'Ольга', 'Павел', 'Пётр', 'Светлана', 'Сергей', 'Татьяна', 'Юлия', 'Ян', 'Ева',
+)
+LAST_NAMES = (
+    'Иванов', 'Смирнова', 'Кузнецов', 'Попова', 'Васильев', 'Петрова', 'Соколов', 'Михайлова', 'Новиков',
+    'Фёдорова', 'Морозов', 'Волкова', 'Алексеев', 'Лебедева', 'Семёнов', 'Егорова', 'Павлов', 'Козлова',
+    'Анна-Петрова', 'Ян', 'Олегов',
+)
+MIDDLE_NAMES = ('Иванович', 'Петровна', 'Сергеевич', 'Александровна', 'Олегович', 'Дмитриевна')
+NAME_SYLLABLES = ('ра', 'ми', 'ла', 'на', 'то', 'ки', 'са', 'ва', 'де', 'ло', 'ре', 'ан', 'ис', 'ол', 'ев', 'ик')
+CHANNEL_NAMES = ('vk', 'telegram', 'instagram', 'site', 'whatsapp')
+UTM_SOURCES = ('yandex', 'google', 'vk_ads', 'mytarget', '')
+
+LEADS_FIELD_NAMES = (
+    'id', 'phone', 'first_name', 'last_name', 'channel_name',
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content', 'email', 'comment',
+)
+SUBSCRIPTIONS_FIELD_NAMES = (
+    'ident', 'type', 'id', 'channel_id', 'system_id',
+    'utm_source', 'utm_medium', 'utm_campaign', 'utm_content', 'utm_term',
+    'created_at', 'updated_at', 'name',
+)
+
+
+def _is_synthetic_name(name) -> bool:
+    """Признак имени, которое может быть составлено synthetic_name из 2-4 слогов"""
+    name = name.lower()
+    return len(name) % 2 == 0 and 2 <= len(name) // 2 <= 4 and all(
+        name[cur_index:cur_index + 2] in NAME_SYLLABLES for cur_index in range(0, len(name), 2)
+    )
+
+
+def get_max_names_dictionary_size() -> int:
+    """Возвращает количество различных имен справочника: реальные имена и все сочетания 2-4 слогов"""
+    syllables_count = len(NAME_SYLLABLES)
+    synthetic_names_count = sum(syllables_count ** cur_count for cur_count in range(2, 5))
+    return synthetic_names_count + sum(not _is_synthetic_name(cur_name) for cur_name in set(FIRST_NAMES))
+
+
+class SyntheticDataGenerator:
+    """Детерминированный генератор синтетических лидов, подписок и справочников имен
+
+    Одинаковый seed дает одинаковые данные, поэтому результаты замеров сравнимы между версиями
+
+    """
+
+    def __init__(self, seed=0):
+        self._random = Random(seed)
+
+    def _digits(self, count) -> str:
+        """Возвращает строку случайных цифр"""
+        return ''.join(self._random.choice('0123456789') for _ in range(count))
+
+    def dirty_phone(self) -> str:
+        """Возвращает номер телефона в одном из встречающихся в выгрузках форматов, в т.ч. невалидный"""
+        code = '9' + self._digits(2)
+        number = self._digits(7)
+        formats = (
+            lambda: f'8 ({code}) {number[:3]}-{number[3:5]}-{number[5:]}',
+            lambda: f'+7 {code} {number[:3]} {number[3:5]} {number[5:]}',
+            lambda: f'{code}{number}',
+            lambda: f'7-{code}-{number[:3]}-{number[3:]}',
+            lambda: f' +7({code}){number}\t',
+            lambda: f'8 (495) {number[:3]}-{number[3:5]}-{number[5:]}',
+            lambda: f'+380{self._digits(9)}',
+            lambda: f'+7 ({code}) {number} доб. {self._digits(2)}',
+            lambda: '',
+            lambda: 'нет',
+        )
+        weights = (25, 20, 15, 10, 10, 6, 4, 4, 4, 2)
+        return self._random.choices(formats, weights=weights)[0]()
+
+    def full_name(self) -> str:
+        """Возвращает полное имя в произвольном порядке частей, с табуляциями и лишними пробелами"""
+        first_name = self._random.choice(FIRST_NAMES)
+        last_name = self._random.choice(LAST_NAMES)
+        parts_variants = (
+            (last_name, first_name),
+            (first_name, last_name),
+            (last_name, first_name, self._random.choice(MIDDLE_NAMES)),
+            (first_name,),
+            (last_name,),
+        )
+        parts = self._random.choices(parts_variants, weights=(40, 30, 15, 10, 5))[0]
+        separators = (' ', ' ', ' ', '  ', '\t', ' \t ')
+        full_name = ''.join(
+            cur_part + (self._random.choice(separators) if cur_index < len(parts) - 1 else '')
+            for cur_index, cur_part in enumerate(parts)
+        )
+        if self._random.random() < 0.1:
+            full_name = f'  {full_name}\t'
+        return full_name
+
+    def synthetic_name(self) -> str:
+        """Возвращает вымышленное имя из слогов"""
+        name = ''.join(self._random.choice(NAME_SYLLABLES) for _ in range(self._random.randint(2, 4)))
+        return name.capitalize()
+
+    def iter_names_dictionary(self, size):
+        """Возвращает генератор справочника имен заданного размера: реальные имена и вымышленные до нужного размера
+
+        Если size больше количества различных имен (get_max_names_dictionary_size), сразу выбрасывается ValueError
+
+        """
+        max_size = get_max_names_dictionary_size()
+        if size > max_size:
+            raise ValueError(f'Размер справочника имен {size} больше количества различных имен {max_size}')
+        return self._iter_names_dictionary(size)
+
+    def _iter_names_dictionary(self, size):
+        """Генератор справочника имен заданного размера"""
+        names = set()
+        for cur_name in FIRST_NAMES[:size]:
+            names.add(cur_name)
+            yield cur_name
+        while len(names) < size:
+            cur_name = self.synthetic_name()
+            if cur_name not in names:
+                names.add(cur_name)
+                yield cur_name
+
+    def iter_lead_rows(self, rows_count):
+        """Генератор строк выгрузки лидов LeadConv"""
+        for cur_index in range(rows_count):
+            yield (
+                cur_index,
+                self.dirty_phone(),
+                self._random.choice(FIRST_NAMES),
+                self._random.choice(LAST_NAMES),
+                self._random.choice(CHANNEL_NAMES),
+                self._random.choice(UTM_SOURCES),
+                'cpc', f'campaign_{self._random.randint(1, 50)}', 'term', 'content',
+                f'user{cur_index}@example.com',
+                self._random.choice(('', '', 'перезвонить', 'многострочный\n"комментарий"')),
+            )
+
+    def iter_subscription_rows(self, rows_count):
+        """Генератор строк выгрузки подписок платформы Давида"""
+        for cur_index in range(rows_count):
+            yield (
+                f'sub{cur_index}', 'subscription', cur_index,
+                self._random.randint(1, 20), self._random.randint(1, 5),
+                self._random.choice(UTM_SOURCES), 'cpc', 'campaign', 'content', 'term',
+                '2023-01-01 10:00:00', f'2023-02-{self._random.randint(10, 28)} 12:00:00',
+                self.full_name(),
+            )
+
+
+def write_csv(file_path, field_names, rows):
+    """Пишет строки в csv файл"""
+    with open(file_path, 'w', newline='') as write_obj:
+        csv_writer = writer(write_obj)
+        csv_writer.writerow(field_names)
+        csv_writer.writerows(rows)
+
+
+def write_leads_csv(file_path, rows_count, seed=0):
+    """Пишет синтетическую выгрузку лидов"""
+    write_csv(file_path, LEADS_FIELD_NAMES, SyntheticDataGenerator(seed=seed).iter_lead_rows(rows_count))
+
+
+def write_subscriptions_csv(file_path, rows_count, seed=0):
+    """Пишет синтетическую выгрузку подписок"""
+    write_csv(
+        file_path, SUBSCRIPTIONS_FIELD_NAMES, SyntheticDataGenerator(seed=seed).iter_subscription_rows(rows_count)
+    )
+
+
+def write_names_csv(file_path, size, seed=0):
+    """Пишет синтетический справочник имен с колонкой Name"""
+    names = SyntheticDataGenerator(seed=seed).iter_names_dictionary(size)
+    write_csv(file_path, ('Name',), ((cur_name,) for cur_name in names))
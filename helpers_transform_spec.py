@@ -0,0 +1,159 @@
+class DerivedFields:
+    """Вычисляемые поля: функция от значения исходного поля
+
+    Для одного целевого поля функция возвращает значение, для нескольких - кортеж значений по порядку
+
+    """
+
+    def __init__(self, target_field_names, source_field_name, func):
+        self.target_field_names = tuple(target_field_names)
+        self.source_field_name = source_field_name
+        self.func = func
+
+
+class TransformSpec:
+    """Декларативное описание преобразования строки
+
+    copied_field_names - переносимые без изменений поля,
+    renamed_field_names - переносимые под новым именем поля {целевое: исходное},
+    derived_fields - вычисляемые поля (DerivedFields),
+    required_fields - поля, при пустом значении которых строка отбрасывается {поле: причина отбрасывания}.
+    Порядок результирующих полей: переносимые, переименованные, вычисляемые.
+
+    Описание один раз компилируется методом compile в функцию подготовки строки
+
+    """
+
+    def __init__(self, copied_field_names=(), renamed_field_names=None, derived_fields=(), required_fields=None):
+        self.copied_field_names = tuple(copied_field_names)
+        self.renamed_field_names = dict(renamed_field_names) if renamed_field_names else {}
+        self.derived_fields = tuple(derived_fields)
+        self.required_fields = dict(required_fields) if required_fields else {}
+
+    @property
+    def result_field_names(self) -> tuple:
+        """Возвращает наименования результирующих полей по порядку"""
+        return (
+                self.copied_field_names
+                + tuple(self.renamed_field_names)
+                + tuple(cur_name for cur_fields in self.derived_fields for cur_name in cur_fields.target_field_names)
+        )
+
+    @property
+    def source_field_names(self) -> tuple:
+        """Возвращает наименования исходных полей, необходимых для преобразования"""
+        return tuple(dict.fromkeys(
+            self.copied_field_names
+            + tuple(self.renamed_field_names.values())
+            + tuple(cur_fields.source_field_name for cur_fields in self.derived_fields)
+        ))
+
+    @staticmethod
+    def _get_value_expression(field_name, src_field_names, tuple_rows):
+        """Возвращает выражение значения поля исходной строки для генерируемой функции
+
+        Для строк-кортежей поле берется по индексу в заголовке, для словарей - по ключу.
+        Отсутствующее в заголовке поле - None
+
+        """
+        if src_field_names is None or field_name not in src_field_names:
+            return 'None' if tuple_rows else f'cur_row.get({field_name!r})'
+        if tuple_rows:
+            return f'cur_row[{src_field_names.index(field_name)}]'
+        return f'cur_row[{field_name!r}]'
+
+    def _get_drop_check_lines(self, value_expression, field_name, on_drop) -> list:
+        """Возвращает строки проверки обязательного значения для генерируемой функции"""
+        if field_name not in self.required_fields:
+            return []
+        drop_lines = [f'if not {value_expression}:']
+        if on_drop:
+            drop_lines.append(f'    _on_drop({self.required_fields[field_name]!r})')
+        drop_lines.append('    return None')
+        return drop_lines
+
+    def compile(self, src_field_names=None, on_drop=None, tuple_rows=False):
+        """Компилирует описание в функцию подготовки строки
+
+        src_field_names - заголовок исходного файла, on_drop - функция, вызываемая с причиной отбрасывания строки,
+        tuple_rows - строки являются кортежами (списками) значений по заголовку, иначе - словарями.
+        Функция возвращает новую строку того же вида (кортеж в порядке result_field_names или словарь)
+        или None, если строка отбрасывается.
+
+        Текст функции генерируется один раз под описание и заголовок (как collections.namedtuple):
+        поля с обязательными значениями вычисляются первыми, чтобы отбрасываемые строки не копировались,
+        результат собирается литералом без циклов по полям. Короткие строки-кортежи дополняются None
+        до выполнения тела, как это делает DictReader, поэтому функции подготовщиков вызываются один раз
+
+        """
+        if tuple_rows and src_field_names is None:
+            raise ValueError('Для строк-кортежей необходим заголовок src_field_names')
+        src_field_names = tuple(src_field_names) if src_field_names is not None else None
+        namespace = {'_on_drop': on_drop}
+        required_lines = []
+        other_lines = []
+        result_expressions = {}
+
+        copied_field_names = dict(zip(self.copied_field_names, self.copied_field_names))
+        copied_field_names.update(self.renamed_field_names)
+        for cur_index, (cur_field_name, cur_source_field_name) in enumerate(copied_field_names.items()):
+            value_expression = self._get_value_expression(cur_source_field_name, src_field_names, tuple_rows)
+            if cur_field_name in self.required_fields:
+                required_lines.append(f'_copied_{cur_index} = {value_expression}')
+                required_lines += self._get_drop_check_lines(f'_copied_{cur_index}', cur_field_name, on_drop)
+                value_expression = f'_copied_{cur_index}'
+            result_expressions[cur_field_name] = value_expression
+
+        for cur_index, cur_fields in enumerate(self.derived_fields):
+            namespace[f'_func_{cur_index}'] = cur_fields.func
+            value_names = tuple(
+                f'_derived_{cur_index}_{cur_target_index}'
+                for cur_target_index in range(len(cur_fields.target_field_names))
+            )
+            value_expression = self._get_value_expression(cur_fields.source_field_name, src_field_names, tuple_rows)
+            derived_lines = [f'{", ".join(value_names)} = _func_{cur_index}({value_expression})']
+            for cur_value_name, cur_field_name in zip(value_names, cur_fields.target_field_names):
+                derived_lines += self._get_drop_check_lines(cur_value_name, cur_field_name, on_drop)
+                result_expressions[cur_field_name] = cur_value_name
+            if any(cur_name in self.required_fields for cur_name in cur_fields.target_field_names):
+                required_lines += derived_lines
+            else:
+                other_lines += derived_lines
+
+        if tuple_rows:
+            result_items = ''.join(f'{result_expressions[cur_name]}, ' for cur_name in self.result_field_names)
+            result_line = f'return ({result_items})'
+        else:
+            result_items = ', '.join(
+                f'{cur_name!r}: {result_expressions[cur_name]}' for cur_name in self.result_field_names
+            )
+            result_line = f'return {{{result_items}}}'
+        body_lines = required_lines + other_lines + [result_line]
+
+        if tuple_rows:
+            namespace['_row_length'] = len(src_field_names)
+            body_lines = [
+                'if len(cur_row) < _row_length:',
+                '    cur_row = tuple(cur_row) + (None,) * (_row_length - len(cur_row))',
+            ] + body_lines
+        source = '\n'.join(['def prepare_row(cur_row):'] + [f'    {cur_line}' for cur_line in body_lines])
+        exec(source, namespace)
+        return namespace['prepare_row']
+
+
+def get_row_dict_adapter(field_names):
+    """Возвращает функцию преобразования строки-кортежа в словарь по заголовку field_names
+
+    Позволяет подготавливать строки-кортежи методами, написанными для строк DictReader.
+    Короткие строки дополняются None, как это делает DictReader
+
+    """
+    field_names = tuple(field_names)
+    row_length = len(field_names)
+
+    def row_to_dict(cur_row):
+        if len(cur_row) < row_length:
+            cur_row = tuple(cur_row) + (None,) * (row_length - len(cur_row))
+        return dict(zip(field_names, cur_row))
+
+    return row_to_dict
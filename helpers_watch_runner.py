@@ -0,0 +1,174 @@
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from logging import getLogger
+from os import cpu_count
+from time import perf_counter
+
+from helpers_batch_runner import BatchTransformRunner, FileTransformResult, transform_file
+from helpers_file_watcher import DEFAULT_POLL_SECONDS, DEFAULT_WATCH_FILE_EXTENSIONS, get_file_watcher
+from helpers_manifest import get_transformer_config
+
+DEFAULT_WATCH_LOGGER_NAME = 'watch_transform'
+_BUSY_WAIT_SECONDS = 0.05
+
+
+class WatchTransformRunner(BatchTransformRunner):
+    """Долгоживущий режим: наблюдает за исходной директорией и преобразует файлы по мере появления
+
+    Процессы пула (max_workers, 1 - обработка в текущем процессе) создаются один раз после
+    preload_shared_data и живут все время наблюдения, поэтому справочники и кеши подготовки
+    загружаются однажды, а не при каждом запуске. Новые и измененные файлы определяются через inotify,
+    если он недоступен или use_inotify=False - опросом директории раз в poll_seconds.
+    Одновременно обрабатывается не больше max_workers файлов, остальные ждут в очереди;
+    файл, измененный во время обработки, обрабатывается повторно после ее завершения.
+
+    Результат пишется во временный файл и переименовывается преобразователем, манифест ведется
+    по умолчанию: при перезапуске актуальные файлы пропускаются. По каждому файлу в лог _logger_name
+    пишется результат и задержка от обнаружения файла до готовности результата.
+    Если процесс пула аварийно завершился (BrokenProcessPool), файлы, обрабатывавшиеся пулом,
+    получают результат с ошибкой, а пул создается заново - наблюдение продолжается
+
+    """
+    _poll_seconds = DEFAULT_POLL_SECONDS
+    _use_inotify = True
+    _file_extensions = DEFAULT_WATCH_FILE_EXTENSIONS
+    _logger_name = DEFAULT_WATCH_LOGGER_NAME
+    _is_stopped = False
+
+    def set_watch_params(self, poll_seconds, use_inotify, file_extensions):
+        """Сеттер параметров наблюдения"""
+        self._poll_seconds = poll_seconds
+        self._use_inotify = use_inotify
+        self._file_extensions = tuple(file_extensions)
+
+    def set_logger_name(self, logger_name):
+        """Сеттер имени лога обработанных файлов"""
+        self._logger_name = logger_name
+
+    def __init__(
+            self, transformer_class, dst_dir_path, max_workers=None, use_manifest=True,
+            poll_seconds=DEFAULT_POLL_SECONDS, use_inotify=True, file_extensions=DEFAULT_WATCH_FILE_EXTENSIONS,
+            logger_name=DEFAULT_WATCH_LOGGER_NAME, **transformer_kwargs
+    ):
+        self.set_watch_params(poll_seconds=poll_seconds, use_inotify=use_inotify, file_extensions=file_extensions)
+        self.set_logger_name(logger_name=logger_name)
+        super(WatchTransformRunner, self).__init__(
+            transformer_class=transformer_class,
+            dst_dir_path=dst_dir_path,
+            max_workers=max_workers,
+            use_manifest=use_manifest,
+            **transformer_kwargs
+        )
+
+    def stop(self):
+        """Останавливает наблюдение. Начатые файлы дообрабатываются"""
+        self._is_stopped = True
+
+    def _get_executor(self):
+        """Возвращает пул процессов с загруженными общими данными или None для обработки в текущем процессе"""
+        if self._max_workers == 1:
+            self._transformer_class.preload_shared_data()
+            return None
+        self._transformer_class.preload_shared_data_for_pool()
+        return ProcessPoolExecutor(max_workers=self._max_workers)
+
+    def _submit_file(self, executor, src_file_path) -> Future:
+        """Отправляет файл на преобразование, в текущем процессе возвращает уже выполненный Future"""
+        transform_args = (
+            self._transformer_class, src_file_path, self._dst_dir_path, self._transformer_kwargs, self._use_manifest,
+        )
+        if executor:
+            return executor.submit(transform_file, *transform_args)
+        future = Future()
+        future.set_result(transform_file(*transform_args))
+        return future
+
+    def _is_file_up_to_date(self, manifest, transformer_config, src_file_path) -> bool:
+        """Признак актуального результата файла. Удаленный до обработки файл тоже не обрабатывается"""
+        try:
+            return bool(manifest) and manifest.is_up_to_date(src_file_path, transformer_config)
+        except FileNotFoundError:
+            return True
+
+    def watch(self, src_dir_path, on_file_result=None):
+        """Наблюдает за src_dir_path и преобразует файлы до вызова stop
+
+        Сначала обрабатываются уже лежащие в директории файлы, затем новые и измененные.
+        on_file_result - функция, вызываемая с результатом (FileTransformResult) каждого обработанного файла
+
+        """
+        logger = getLogger(self._logger_name)
+        manifest = self._get_manifest()
+        transformer_config = get_transformer_config(self._transformer_class, self._transformer_kwargs)
+        watcher = get_file_watcher(
+            src_dir_path=src_dir_path, file_extensions=self._file_extensions,
+            poll_seconds=self._poll_seconds, use_inotify=self._use_inotify,
+        )
+        executor = None
+        queued_detected_at = {}
+        running_files = {}
+        self._is_stopped = False
+
+        def finish_done_files(futures, is_pool_broken=False):
+            nonlocal executor
+            while futures:
+                for cur_future in futures:
+                    cur_file_path, cur_detected_at = running_files.pop(cur_future)
+                    try:
+                        cur_file_result = cur_future.result()
+                    except Exception as e:
+                        is_pool_broken = is_pool_broken or isinstance(e, BrokenProcessPool)
+                        cur_file_result = FileTransformResult(src_file_path=cur_file_path)
+                        cur_file_result.error = f'{type(e).__name__}: {e}'
+                    self._mark_file_result_done(
+                        manifest=manifest, transformer_config=transformer_config, file_result=cur_file_result,
+                    )
+                    logger.info('%s, задержка %.2f с', cur_file_result, perf_counter() - cur_detected_at)
+                    if on_file_result:
+                        on_file_result(cur_file_result)
+                futures = wait(running_files).done if is_pool_broken and running_files else ()
+            if is_pool_broken:
+                logger.error('Пул процессов аварийно завершен, создается новый')
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = self._get_executor()
+
+        try:
+            executor = self._get_executor()
+            max_running_files = (self._max_workers or cpu_count() or 1) if executor else 1
+            logger.info('Наблюдение за %s (%s)', src_dir_path, type(watcher).__name__)
+            new_file_paths = watcher.scan()
+            while True:
+                detected_at = perf_counter()
+                for cur_file_path in new_file_paths:
+                    queued_detected_at.setdefault(cur_file_path, detected_at)
+                if self._is_stopped:
+                    break
+
+                running_file_paths = {cur_file_path for cur_file_path, _ in running_files.values()}
+                for cur_file_path in tuple(queued_detected_at):
+                    if len(running_files) >= max_running_files:
+                        break
+                    if cur_file_path in running_file_paths:
+                        continue
+                    cur_detected_at = queued_detected_at.pop(cur_file_path)
+                    if self._is_file_up_to_date(manifest, transformer_config, cur_file_path):
+                        continue
+                    try:
+                        cur_future = self._submit_file(executor, cur_file_path)
+                    except BrokenProcessPool:
+                        queued_detected_at[cur_file_path] = cur_detected_at
+                        finish_done_files(wait(running_files).done, is_pool_broken=True)
+                        break
+                    running_files[cur_future] = (cur_file_path, cur_detected_at)
+
+                finish_done_files([cur_future for cur_future in running_files if cur_future.done()])
+                timeout = _BUSY_WAIT_SECONDS if running_files or queued_detected_at else self._poll_seconds
+                new_file_paths = watcher.wait_for_file_paths(timeout=timeout)
+
+            finish_done_files(wait(running_files).done)
+        finally:
+            watcher.close()
+            if executor:
+                executor.shutdown(cancel_futures=True)
+            if manifest:
+                manifest.save()
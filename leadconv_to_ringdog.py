@@ -1,13 +1,14 @@
 from os import getcwd, listdir
 from os.path import abspath
 
+from helpers_batch_runner import BatchTransformRunner
 from transformers import LeadConvToRingerDogCSVFileTransformer
 
 
 def get_paths_of_files_in_source_folder() -> tuple:
-    """Возвращает перечень csv в src директории"""
+    """Возвращает перечень исходных файлов (csv, parquet, arrow) в src директории"""
     source_dir_path = abspath(getcwd() + '/source_csv_files')
-    files_in_src_dir = filter(lambda f: f.endswith('csv'), listdir(source_dir_path))
+    files_in_src_dir = filter(lambda f: f.endswith(('csv', 'parquet', 'arrow', 'feather')), listdir(source_dir_path))
     return tuple(f'{source_dir_path}/{cur_file}' for cur_file in files_in_src_dir)
 
 
@@ -16,11 +17,15 @@ if __name__ == '__main__':
         # TODO вынести в настраиваемый GUI
         dst_dir_path = abspath(getcwd() + '/result_csv_files')
         NeededTransformer = LeadConvToRingerDogCSVFileTransformer
+        max_workers = None  # по количеству ядер, 1 - без пула процессов
 
-        for cur_file_path in get_paths_of_files_in_source_folder():
-            NeededTransformer(
-                src_file_path=cur_file_path, dst_dir_path=dst_dir_path,
-            ).extract_data_to_result_file()
+        batch_result = BatchTransformRunner(
+            transformer_class=NeededTransformer, dst_dir_path=dst_dir_path, max_workers=max_workers, use_manifest=True,
+            streaming=True, compact_rows=True, checkpoint_rows=100000,
+            phone_numbers_cache_size=100000,
+        ).run(src_file_paths=get_paths_of_files_in_source_folder())
+        for cur_report_line in batch_result.report_lines():
+            print(cur_report_line)
 
     except Exception as e:
         print(f'Ошибка выполнения обработки конвертации: {e}')
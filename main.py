@@ -1,13 +1,16 @@
+from logging import basicConfig, INFO
 from os import getcwd, listdir
 from os.path import abspath
 
+from helpers_batch_runner import BatchTransformRunner
+from helpers_watch_runner import WatchTransformRunner
 from transformers import LeadConvToRingerDogCSVFileTransformer, DavidPlatformToLeadConvSubscriptionTransformer
 
 
 def get_paths_of_files_in_source_folder() -> tuple:
-    """Возвращает перечень csv в src директории"""
+    """Возвращает перечень исходных файлов (csv, parquet, arrow) в src директории"""
     source_dir_path = abspath(getcwd() + '/source_csv_files')
-    files_in_src_dir = filter(lambda f: f.endswith('csv'), listdir(source_dir_path))
+    files_in_src_dir = filter(lambda f: f.endswith(('csv', 'parquet', 'arrow', 'feather')), listdir(source_dir_path))
     return tuple(f'{source_dir_path}/{cur_file}' for cur_file in files_in_src_dir)
 
 
@@ -16,11 +19,25 @@ if __name__ == '__main__':
         # TODO вынести в настраиваемый GUI
         dst_dir_path = abspath(getcwd() + '/result_csv_files')
         NeededTransformer = DavidPlatformToLeadConvSubscriptionTransformer
+        max_workers = None  # по количеству ядер, 1 - без пула процессов
+        watch_mode = False  # True - не завершаться, а обрабатывать новые файлы по мере появления
 
-        for cur_file_path in get_paths_of_files_in_source_folder():
-            NeededTransformer(
-                src_file_path=cur_file_path, dst_dir_path=dst_dir_path,
-            ).extract_data_to_result_file()
+        if watch_mode:
+            basicConfig(level=INFO, format='%(asctime)s %(message)s')
+            WatchTransformRunner(
+                transformer_class=NeededTransformer, dst_dir_path=dst_dir_path, max_workers=max_workers,
+                streaming=True, compact_rows=True, full_names_cache_size=100000,
+            ).watch(src_dir_path=abspath(getcwd() + '/source_csv_files'))
+        else:
+            batch_result = BatchTransformRunner(
+                transformer_class=NeededTransformer, dst_dir_path=dst_dir_path, max_workers=max_workers,
+                use_manifest=True, streaming=True, compact_rows=True, checkpoint_rows=100000,
+                full_names_cache_size=100000,
+            ).run(src_file_paths=get_paths_of_files_in_source_folder())
+            for cur_report_line in batch_result.report_lines():
+                print(cur_report_line)
 
+    except KeyboardInterrupt:
+        print('Обработка остановлена')
     except Exception as e:
         print(f'Ошибка выполнения обработки конвертации: {e}')
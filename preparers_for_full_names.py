@@ -3,6 +3,9 @@ from os import getcwd
 from os.path import abspath
 
 from helpers_file_list_checker import ListCheckerFromCSVNamesFile
+from helpers_names_trie import NamesTrie
+
+_PATRONYMIC_ENDINGS = ('ович', 'евич', 'ич', 'овна', 'евна', 'ична', 'оглы', 'кызы')
 
 
 class FullName:
@@ -53,46 +56,96 @@ class FullName:
         """Возвращает имя, приготовленное на базе полного имени"""
         return self._last_name
 
+    @property
+    def last_and_middle_name(self):
+        """Возвращает фамилию вместе с отчеством для выгрузок без отдельного поля отчества"""
+        return ' '.join(cur_part for cur_part in (self._last_name, self._middle_name) if cur_part)
+
 
 class FullNameFromDavidPlatform(FullName):
+    """Полное имя с платформы David: имя определяется по справочнику имен
+
+    Справочник загружается один раз на класс из бинарного снимка, который пересоздается
+    при изменении csv справочника. По справочнику строится префиксное дерево, находящее
+    составные имена ("Анна Мария", "Анна-Мария") за один проход по словам полного имени.
+    Имя, отчество и фамилия получаются по позициям слов: отчество - слово после имени
+    с окончанием отчества, если после него остается фамилия, фамилия - остальные слова.
+    Фамилия с отчеством (last_and_middle_name) - все слова, кроме имени, в исходном порядке
+
+    """
     _nature_names_list_checker = None
+    _nature_names_trie = None
+    _first_name_span = None
+    _last_and_middle_name = ''
 
-    def _init_nature_names_list_checker(self):
+    @classmethod
+    def _init_nature_names_list_checker(cls):
+        """Инициализирует справочник имен и дерево имен один раз на класс"""
         nature_names_file_path = abspath(getcwd() + '/csv_dict_helpers/nature_names.csv')
-        self._nature_names_list_checker = ListCheckerFromCSVNamesFile(
+        cls._nature_names_list_checker = ListCheckerFromCSVNamesFile(
             src_file_path=nature_names_file_path,
             column_name='Name',
+            use_snapshot=True,
         )
+        cls._nature_names_trie = NamesTrie(names=cls._nature_names_list_checker.values)
+
+    @classmethod
+    def preload_nature_names(cls):
+        """Загружает справочник имен заранее, например до запуска пула процессов"""
+        if cls._nature_names_list_checker is None:
+            cls._init_nature_names_list_checker()
 
     def __init__(self, *args, **kwargs):
-        self._init_nature_names_list_checker()
+        if self._nature_names_list_checker is None:
+            self._init_nature_names_list_checker()
         super(FullNameFromDavidPlatform, self).__init__(*args, **kwargs)
 
-    def _check_first_name(self, first_name):
-        """Проверяет имя по справочнику"""
-        return self._nature_names_list_checker.check_value(first_name)
-
-    def _prepare_first_name(self):
-        """Готовит свойство имени"""
-        self._first_name = self._without_extra_spaces_full_name
-
-        full_name_words_list = self._without_extra_spaces_full_name.split()
-        for cur_word in full_name_words_list:
-            if self._check_first_name(cur_word):
-                self._first_name = cur_word
-                break
-
-    def _prepare_last_name(self):
+    @staticmethod
+    def _is_patronymic(word):
+        """Проверяет, похоже ли слово на отчество"""
+        return word.lower().endswith(_PATRONYMIC_ENDINGS)
+
+    def _prepare_first_name(self, words):
+        """Готовит свойство имени. Если имя не найдено, имя - полное имя целиком"""
+        if self._first_name_span is None:
+            self._first_name = self._without_extra_spaces_full_name
+            return
+        start, end = self._first_name_span
+        self._first_name = ' '.join(words[start:end])
+
+    def _prepare_middle_name(self, words):
+        """Готовит свойство отчества: слово сразу после имени с окончанием отчества"""
+        if self._first_name_span is None:
+            return
+        start, end = self._first_name_span
+        is_last_name_left = start > 0 or end + 1 < len(words)
+        if end < len(words) and is_last_name_left and self._is_patronymic(words[end]):
+            self._middle_name = words[end]
+
+    def _prepare_last_name(self, words):
         """Готовит свойство фамилии
 
         Присваивает свойству _last_name
-        оставшуюся часть полного имени,
-        после удаления _first_name
+        слова полного имени вне позиций имени и отчества
 
         """
-        self._last_name = self._without_extra_spaces_full_name.replace(self._first_name, '').strip()
+        if self._first_name_span is None:
+            return
+        start, end = self._first_name_span
+        self._last_and_middle_name = ' '.join(words[:start] + words[end:])
+        if self._middle_name:
+            end += 1
+        self._last_name = ' '.join(words[:start] + words[end:])
+
+    @property
+    def last_and_middle_name(self):
+        """Возвращает фамилию с отчеством: все слова полного имени, кроме имени, в исходном порядке"""
+        return self._last_and_middle_name
 
     def prepare_separate_parts_of_fullname(self):
-        """Готовит отдельные поля имени и фамилии"""
-        self._prepare_first_name()
-        self._prepare_last_name()
+        """Готовит отдельные поля имени, отчества и фамилии"""
+        words = self._without_extra_spaces_full_name.split()
+        self._first_name_span = self._nature_names_trie.find_first_span(words=words)
+        self._prepare_first_name(words)
+        self._prepare_middle_name(words)
+        self._prepare_last_name(words)
@@ -1,4 +1,10 @@
 from abc import abstractmethod
+from re import compile as re_compile
+
+_NON_DIGITS_PATTERN = re_compile(r'[^0-9]+')
+_REMOVE_ASCII_NON_DIGITS_TABLE = str.maketrans({
+    cur_code: None for cur_code in range(128) if not '0' <= chr(cur_code) <= '9'
+})
 
 
 class PhoneNumber:
@@ -54,6 +60,16 @@ class PhoneNumber:
         self.prepare_phone_number()
         return self._phone_number
 
+    @classmethod
+    def prepare_phone_number_string(cls, src_phone_number) -> str:
+        """Подготавливает и возвращает телефонный номер из строки. Наследники могут переопределить быстрым путем"""
+        return cls(src_phone_number=src_phone_number).prepared_phone_number
+
+    @classmethod
+    def prepare_phone_number_strings(cls, src_phone_numbers) -> list:
+        """Подготавливает колонку телефонных номеров за один проход, возвращает список в том же порядке"""
+        return list(map(cls.prepare_phone_number_string, src_phone_numbers))
+
 
 class PhoneNumberForRingerDog(PhoneNumber):
     def prepare_phone_number(self):
@@ -63,3 +79,22 @@ class PhoneNumberForRingerDog(PhoneNumber):
         self._append_seven_for_10_digit()
         self._append_plus_at_start_with_seven()
         self._remove_non_russian_mobile_numbers()
+
+    @classmethod
+    def prepare_phone_number_string(cls, src_phone_number) -> str:
+        """Подготавливает номер телефона для звонопса без создания объекта
+
+        Результат совпадает с цепочкой шагов prepare_phone_number:
+        очистка, 89 -> 79 для 11 цифр, 7 перед 10 цифрами с 9, + перед 79, только +79
+
+        """
+        digits = src_phone_number.translate(_REMOVE_ASCII_NON_DIGITS_TABLE)
+        if not digits.isascii():
+            digits = _NON_DIGITS_PATTERN.sub('', digits)
+
+        digits_count = len(digits)
+        if digits_count == 11 and digits[1] == '9' and (digits[0] == '8' or digits[0] == '7'):
+            return '+79' + digits[2:]
+        if digits_count == 10 and digits[0] == '9':
+            return '+7' + digits
+        return ''
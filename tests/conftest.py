@@ -0,0 +1,4 @@
+from os.path import abspath, dirname
+from sys import path
+
+path.insert(0, dirname(dirname(abspath(__file__))))
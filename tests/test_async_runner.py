@@ -0,0 +1,63 @@
+from pickle import dumps
+
+from helpers_async_runner import AsyncBatchTransformRunner, prepare_rows_block_in_worker
+from helpers_metrics import CallbackMetricsHook
+from helpers_synthetic_data import write_leads_csv
+from transformers import LeadConvToRingerDogCSVFileTransformer
+
+
+def test_worker_restores_transformer_once_per_key(tmp_path):
+    src_file_path = tmp_path / 'leads.csv'
+    write_leads_csv(str(src_file_path), rows_count=100)
+    transformer = LeadConvToRingerDogCSVFileTransformer(
+        src_file_path=str(src_file_path), dst_dir_path=str(tmp_path), streaming=True, compact_rows=True,
+    )
+    src_field_names, source_rows = transformer._get_source_rows()
+    rows = list(source_rows)
+
+    assert prepare_rows_block_in_worker('file-key', src_field_names, rows[:50]) is None
+    first_block = prepare_rows_block_in_worker('file-key', src_field_names, rows[:50], dumps(transformer))
+    second_block = prepare_rows_block_in_worker('file-key', src_field_names, rows[50:])
+
+    expected_rows, _, _ = transformer.prepare_rows_block(src_field_names=src_field_names, rows=rows)
+    assert first_block[0] + second_block[0] == expected_rows
+    assert first_block[1] + second_block[1] == 100
+
+
+def test_process_pool_preparation_matches_direct_extraction(tmp_path):
+    src_file_paths = []
+    for cur_index in range(3):
+        cur_file_path = tmp_path / 'src' / f'leads{cur_index}.csv'
+        cur_file_path.parent.mkdir(exist_ok=True)
+        write_leads_csv(str(cur_file_path), rows_count=2000, seed=cur_index)
+        src_file_paths.append(str(cur_file_path))
+    (tmp_path / 'base').mkdir()
+    (tmp_path / 'result').mkdir()
+
+    batch_result = AsyncBatchTransformRunner(
+        LeadConvToRingerDogCSVFileTransformer, str(tmp_path / 'result'), transform_workers=2, block_rows=300,
+        streaming=True,
+    ).run(src_file_paths)
+
+    assert not any(cur_file_result.error for cur_file_result in batch_result.file_results)
+    for cur_file_path in src_file_paths:
+        LeadConvToRingerDogCSVFileTransformer(
+            src_file_path=cur_file_path, dst_dir_path=str(tmp_path / 'base'),
+        ).extract_data_to_result_file()
+    for cur_file_name in ('leads0.csv', 'leads1.csv', 'leads2.csv'):
+        assert (tmp_path / 'result' / cur_file_name).read_text() == (tmp_path / 'base' / cur_file_name).read_text()
+
+
+def test_lambda_metrics_hooks_are_accepted_and_called(tmp_path):
+    src_file_path = tmp_path / 'leads.csv'
+    write_leads_csv(str(src_file_path), rows_count=300)
+    (tmp_path / 'dst').mkdir()
+    collected_metrics = []
+
+    batch_result = AsyncBatchTransformRunner(
+        LeadConvToRingerDogCSVFileTransformer, str(tmp_path / 'dst'), transform_workers=2, streaming=True,
+        metrics_hooks=[CallbackMetricsHook(lambda metrics: collected_metrics.append(metrics))],
+    ).run([str(src_file_path)])
+
+    assert [cur_result.is_success for cur_result in batch_result.file_results] == [True]
+    assert len(collected_metrics) == 1
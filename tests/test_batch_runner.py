@@ -0,0 +1,48 @@
+from os import _exit
+
+from helpers_batch_runner import BatchTransformRunner
+from helpers_synthetic_data import write_leads_csv
+from transformers import LeadConvToRingerDogCSVFileTransformer
+
+
+class _CrashingTransformer(LeadConvToRingerDogCSVFileTransformer):
+    """Преобразователь, аварийно завершающий процесс пула на файлах crash*.csv"""
+
+    def extract_data_to_result_file(self):
+        if self._filename.startswith('crash'):
+            _exit(1)
+        super(_CrashingTransformer, self).extract_data_to_result_file()
+
+
+def test_process_pool_keeps_order_and_isolates_file_errors(tmp_path, monkeypatch):
+    src_dir_path = tmp_path / 'src'
+    src_dir_path.mkdir()
+    src_file_paths = []
+    for cur_index, cur_name in enumerate(('a.csv', 'bad.csv', 'crash.csv', 'd.csv', 'e.csv')):
+        cur_file_path = src_dir_path / cur_name
+        if cur_name == 'bad.csv':
+            cur_file_path.write_text('id,name\n1,Анна\n')
+        else:
+            write_leads_csv(str(cur_file_path), rows_count=100 + cur_index, seed=cur_index)
+        src_file_paths.append(str(cur_file_path))
+    preload_calls = []
+    monkeypatch.setattr(
+        _CrashingTransformer, 'preload_shared_data_for_pool', classmethod(lambda cls: preload_calls.append(cls)),
+    )
+    (tmp_path / 'pool').mkdir()
+    (tmp_path / 'current').mkdir()
+
+    pool_result = BatchTransformRunner(_CrashingTransformer, str(tmp_path / 'pool'), max_workers=2).run(src_file_paths)
+    current_result = BatchTransformRunner(
+        LeadConvToRingerDogCSVFileTransformer, str(tmp_path / 'current'), max_workers=1,
+    ).run([cur_file_path for cur_file_path in src_file_paths if 'crash' not in cur_file_path])
+
+    assert preload_calls == [_CrashingTransformer]
+    assert [cur_result.src_file_path for cur_result in pool_result.file_results] == src_file_paths
+    assert [cur_result.is_success for cur_result in pool_result.file_results] == [True, False, False, True, True]
+    assert pool_result.file_results[2].error.startswith('BrokenProcessPool')
+    assert [cur_result.rows_in_count for cur_result in pool_result.file_results if cur_result.is_success] == [
+        100, 103, 104,
+    ]
+    for cur_name in ('a.csv', 'd.csv', 'e.csv'):
+        assert (tmp_path / 'pool' / cur_name).read_bytes() == (tmp_path / 'current' / cur_name).read_bytes()
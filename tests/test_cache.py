@@ -0,0 +1,45 @@
+from helpers_cache import PreparersCache
+from helpers_synthetic_data import write_leads_csv
+from transformers import LeadConvToRingerDogCSVFileTransformer
+
+
+def test_cached_func_evicts_least_recently_used_values():
+    calls = []
+
+    def prepare(value):
+        calls.append(value)
+        return value.upper()
+
+    cached_prepare = PreparersCache().get_cached_func(func=prepare, max_size=2)
+
+    assert PreparersCache().get_cached_func(func=prepare, max_size=2) is cached_prepare
+    assert PreparersCache().get_cached_func(func=prepare, max_size=3) is not cached_prepare
+    assert [cached_prepare(cur_value) for cur_value in ('a', 'b', 'a', 'c', 'b', 'a')] == ['A', 'B', 'A', 'C', 'B', 'A']
+    assert calls == ['a', 'b', 'c', 'b', 'a']
+    cache_info = PreparersCache().cache_info()[f'{prepare.__qualname__}[2]']
+    assert (cache_info.hits, cache_info.misses, cache_info.maxsize, cache_info.currsize) == (1, 5, 2, 2)
+
+    PreparersCache().clear()
+    assert cached_prepare.cache_info().currsize == 0
+
+
+def test_cached_preparers_match_uncached_result(tmp_path):
+    src_file_path = tmp_path / 'leads.csv'
+    write_leads_csv(str(src_file_path), rows_count=2000, seed=4)
+    results = []
+    for cur_cache_size in (None, 16):
+        cur_dst_dir_path = tmp_path / f'cache_{cur_cache_size}'
+        cur_dst_dir_path.mkdir()
+        cur_transformer = LeadConvToRingerDogCSVFileTransformer(
+            src_file_path=str(src_file_path), dst_dir_path=str(cur_dst_dir_path), streaming=True,
+            phone_numbers_cache_size=cur_cache_size,
+        )
+        cur_transformer.extract_data_to_result_file()
+        results.append((cur_dst_dir_path / 'leads.csv').read_bytes())
+
+    assert results[0] == results[1]
+    cache_infos = [
+        cur_cache_info for cur_name, cur_cache_info in PreparersCache().cache_info().items()
+        if cur_name.endswith('[16]')
+    ]
+    assert cache_infos and all(cur_cache_info.currsize <= 16 for cur_cache_info in cache_infos)
@@ -0,0 +1,93 @@
+from csv import writer
+
+from helpers_csv_chunks import find_csv_record_boundaries, iter_chunk_ranges
+from helpers_metrics import CallbackMetricsHook
+from helpers_synthetic_data import write_leads_csv
+from transformers import LeadConvToRingerDogCSVFileTransformer
+
+
+def _write_rows(file_path, rows):
+    with open(file_path, 'w', newline='') as write_obj:
+        writer(write_obj, lineterminator='\n').writerows(rows)
+
+
+def _extract(src_file_path, dst_dir_path, **kwargs):
+    dst_dir_path.mkdir(exist_ok=True)
+    transformer = LeadConvToRingerDogCSVFileTransformer(
+        src_file_path=str(src_file_path), dst_dir_path=str(dst_dir_path), **kwargs
+    )
+    transformer.extract_data_to_result_file()
+    with open(transformer.result_file_path, 'rb') as read_obj:
+        return read_obj.read()
+
+
+def test_boundaries_do_not_split_quoted_new_lines(tmp_path):
+    src_file_path = tmp_path / 'src.csv'
+    _write_rows(src_file_path, [('id', 'text')] + [(cur_index, f'a\nb "{cur_index}"\r\nc') for cur_index in range(200)])
+    data = src_file_path.read_bytes()
+
+    boundaries = find_csv_record_boundaries(src_file_path=str(src_file_path), chunk_size=50)
+
+    assert boundaries[0] == data.index(b'\n') + 1
+    assert boundaries[-1] == len(data)
+    assert len(boundaries) > 10
+    for cur_start_offset, cur_end_offset in iter_chunk_ranges(boundaries):
+        cur_chunk = data[cur_start_offset:cur_end_offset]
+        assert cur_chunk.count(b'"') % 2 == 0
+        assert cur_chunk.endswith(b'\n')
+
+
+def test_boundaries_of_file_smaller_than_chunk(tmp_path):
+    src_file_path = tmp_path / 'src.csv'
+    _write_rows(src_file_path, [('id',), (1,), (2,)])
+
+    assert find_csv_record_boundaries(src_file_path=str(src_file_path), chunk_size=1024) == (3, 7)
+
+
+def test_chunked_result_matches_whole_file_result(tmp_path):
+    src_file_path = tmp_path / 'leads.csv'
+    write_leads_csv(file_path=str(src_file_path), rows_count=3000)
+    with open(src_file_path, 'a', newline='') as write_obj:
+        writer(write_obj).writerow((3000, '89123456789', 'Анна\r\nМария', 'Фам', 'vk', '', '', '', '', '', '', ''))
+
+    whole_result = _extract(src_file_path, tmp_path / 'whole', streaming=True)
+    for compact_rows in (False, True):
+        chunked_result = _extract(
+            src_file_path, tmp_path / f'chunked_{compact_rows}',
+            streaming=True, compact_rows=compact_rows, chunk_size=16 * 1024, chunk_workers=2,
+        )
+        assert chunked_result == whole_result
+    assert 'Анна\r\nМария'.encode() in whole_result
+
+
+def test_chunked_extraction_calls_lambda_metrics_hooks_in_parent_process(tmp_path):
+    src_file_path = tmp_path / 'leads.csv'
+    write_leads_csv(file_path=str(src_file_path), rows_count=3000)
+    collected_metrics = []
+
+    chunked_result = _extract(
+        src_file_path, tmp_path / 'chunked', streaming=True, chunk_size=16 * 1024, chunk_workers=2,
+        metrics_hooks=[CallbackMetricsHook(lambda metrics: collected_metrics.append(metrics))],
+    )
+
+    assert chunked_result == _extract(src_file_path, tmp_path / 'whole', streaming=True)
+    assert len(collected_metrics) == 1
+    assert collected_metrics[0].stage_seconds['merge'] > 0
+
+
+def test_source_encoding_is_used_by_whole_and_chunked_reading(tmp_path):
+    src_file_path = tmp_path / 'leads.csv'
+    write_leads_csv(file_path=str(src_file_path), rows_count=3000)
+    cp1251_file_path = tmp_path / 'cp1251' / 'leads.csv'
+    cp1251_file_path.parent.mkdir()
+    cp1251_file_path.write_bytes(src_file_path.read_text(encoding='utf-8').encode('cp1251'))
+
+    baseline = _extract(src_file_path, tmp_path / 'baseline', streaming=True, encoding='utf-8')
+    for compact_rows in (False, True):
+        assert _extract(
+            cp1251_file_path, tmp_path / f'whole_{compact_rows}', compact_rows=compact_rows, encoding='cp1251',
+        ) == baseline
+        assert _extract(
+            cp1251_file_path, tmp_path / f'chunked_{compact_rows}', streaming=True, compact_rows=compact_rows,
+            chunk_size=16 * 1024, chunk_workers=2, encoding='cp1251',
+        ) == baseline
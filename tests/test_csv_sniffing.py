@@ -0,0 +1,117 @@
+import csv
+from io import StringIO
+from os import listdir
+
+import pytest
+
+from helpers_csv_sniffing import DecodeErrorsCounter, detect_encoding
+from helpers_io_backends import SniffingCSVReaderBackend
+from helpers_synthetic_data import LEADS_FIELD_NAMES, SyntheticDataGenerator
+from transformers import LeadConvToRingerDogCSVFileTransformer
+
+
+def _get_csv_text(rows, delimiter=','):
+    text_obj = StringIO()
+    csv.writer(text_obj, delimiter=delimiter, lineterminator='\n').writerows(rows)
+    return text_obj.getvalue()
+
+
+def _transform(src_file_path, dst_dir_path, **kwargs):
+    dst_dir_path.mkdir()
+    LeadConvToRingerDogCSVFileTransformer(
+        src_file_path=str(src_file_path), dst_dir_path=str(dst_dir_path), **kwargs
+    ).extract_data_to_result_file()
+    return (dst_dir_path / 'leads.csv').read_text()
+
+
+def test_partner_formats_match_plain_csv(tmp_path):
+    rows = [LEADS_FIELD_NAMES] + list(SyntheticDataGenerator(seed=5).iter_lead_rows(500))
+    baseline_file_path = tmp_path / 'plain' / 'leads.csv'
+    baseline_file_path.parent.mkdir()
+    baseline_file_path.write_text(_get_csv_text(rows), encoding='utf-8')
+    baseline = _transform(baseline_file_path, tmp_path / 'base')
+
+    for cur_name, cur_data in (
+            ('bom', b'\xef\xbb\xbf' + _get_csv_text(rows, delimiter=';').encode('utf-8')),
+            ('cp1251', _get_csv_text(rows, delimiter=';').encode('cp1251')),
+            ('tab', _get_csv_text(rows, delimiter='\t').encode('utf-8')),
+    ):
+        cur_file_path = tmp_path / cur_name / 'leads.csv'
+        cur_file_path.parent.mkdir()
+        cur_file_path.write_bytes(cur_data)
+
+        result = _transform(
+            cur_file_path, tmp_path / f'{cur_name}_result', streaming=True, reader_backend=SniffingCSVReaderBackend(),
+        )
+
+        assert result == baseline, cur_name
+        assert listdir(cur_file_path.parent) == ['leads.csv']
+
+
+@pytest.mark.parametrize('fast_parser', (False, True))
+def test_bad_rows_go_to_hidden_quarantine_dir(tmp_path, fast_parser):
+    rows = [LEADS_FIELD_NAMES] + list(SyntheticDataGenerator(seed=6).iter_lead_rows(100))
+    src_dir_path = tmp_path / 'src'
+    src_dir_path.mkdir()
+    lines = _get_csv_text(rows).encode('utf-8').split(b'\n')
+    lines.insert(10, b'x,y')
+    lines.insert(20, b'20,89123456789,\xff\xfe' + b',' * (len(LEADS_FIELD_NAMES) - 3))
+    (src_dir_path / 'leads.csv').write_bytes(b'\n'.join(lines))
+    clean_file_path = tmp_path / 'clean' / 'leads.csv'
+    clean_file_path.parent.mkdir()
+    clean_file_path.write_text(_get_csv_text(rows), encoding='utf-8')
+
+    result = _transform(
+        src_dir_path / 'leads.csv', tmp_path / 'result', streaming=True,
+        reader_backend=SniffingCSVReaderBackend(fast_parser=fast_parser),
+    )
+
+    assert result == _transform(clean_file_path, tmp_path / 'base')
+    assert [cur_name for cur_name in listdir(src_dir_path) if cur_name.endswith('csv')] == ['leads.csv']
+    with open(src_dir_path / '.quarantine' / 'leads.csv.quarantine.csv', newline='') as read_obj:
+        quarantine_rows = list(csv.DictReader(read_obj))
+    assert [cur_row['line_number'] for cur_row in quarantine_rows] == ['11', '21']
+
+
+def test_utf8_file_with_one_cp1251_row_keeps_utf8(tmp_path):
+    rows = [LEADS_FIELD_NAMES] + list(SyntheticDataGenerator(seed=7).iter_lead_rows(100))
+    src_dir_path = tmp_path / 'src'
+    src_dir_path.mkdir()
+    lines = _get_csv_text(rows).encode('utf-8').split(b'\n')
+    bad_row = ['15', '89123456789', 'Ёлка'] + [''] * (len(LEADS_FIELD_NAMES) - 3)
+    lines.insert(5, _get_csv_text([bad_row]).rstrip('\n').encode('cp1251'))
+    (src_dir_path / 'leads.csv').write_bytes(b'\n'.join(lines))
+    clean_file_path = tmp_path / 'clean' / 'leads.csv'
+    clean_file_path.parent.mkdir()
+    clean_file_path.write_text(_get_csv_text(rows), encoding='utf-8')
+
+    assert detect_encoding((src_dir_path / 'leads.csv').read_bytes()) == ('utf-8', False)
+    result = _transform(
+        src_dir_path / 'leads.csv', tmp_path / 'result', streaming=True, reader_backend=SniffingCSVReaderBackend(),
+    )
+
+    assert result == _transform(clean_file_path, tmp_path / 'base')
+    with open(src_dir_path / '.quarantine' / 'leads.csv.quarantine.csv', newline='') as read_obj:
+        quarantine_rows = list(csv.DictReader(read_obj))
+    assert [(cur_row['line_number'], cur_row['error']) for cur_row in quarantine_rows] == [
+        ('6', 'Байты не в кодировке utf-8'),
+    ]
+
+
+def test_decode_errors_are_counted_per_reader():
+    first_counter = DecodeErrorsCounter()
+    second_counter = DecodeErrorsCounter()
+    first_handler_name, second_handler_name = first_counter.handler_name, second_counter.handler_name
+    try:
+        assert first_counter.handler_name != second_counter.handler_name
+        b'\xd0\xb0\xff'.decode('utf-8', errors=first_counter.handler_name)
+        assert (first_counter.errors_count, second_counter.errors_count) == (1, 0)
+    finally:
+        first_counter.close()
+        second_counter.close()
+
+    reused_counter = DecodeErrorsCounter()
+    reused_counter_handler_name = reused_counter.handler_name
+    reused_counter.close()
+    assert reused_counter_handler_name in (first_handler_name, second_handler_name)
+    assert reused_counter.errors_count == 0
@@ -0,0 +1,98 @@
+import csv
+from random import Random
+
+import pytest
+
+from transformers import LeadConvToRingerDogCSVFileTransformer
+
+SOURCE_FIELD_NAMES = ('id', 'phone', 'first_name', 'last_name', 'channel_name', 'updated_at')
+REUSABLE_FIELD_NAMES = ('id', 'first_name', 'last_name', 'channel_name')
+TRANSFORM_MODES = (
+    {},
+    {'streaming': True},
+    {'compact_rows': True},
+    {'streaming': True, 'compact_rows': True},
+)
+
+
+def _write_source(file_path, rows_count=2000, seed=1):
+    random = Random(seed)
+    with open(file_path, 'w', newline='') as write_obj:
+        csv_writer = csv.writer(write_obj)
+        csv_writer.writerow(SOURCE_FIELD_NAMES)
+        for cur_index in range(rows_count):
+            csv_writer.writerow((
+                cur_index,
+                f'912345{random.randrange(300):04d}' if random.random() > 0.05 else '',
+                random.choice(('', 'Анна', 'Ян')),
+                random.choice(('', 'Петрова')),
+                random.choice(('', 'vk', 'site')),
+                f'2024-01-{random.randrange(1, 29):02d}',
+            ))
+
+
+def _read_rows(file_path):
+    with open(file_path, newline='') as read_obj:
+        return list(csv.DictReader(read_obj))
+
+
+def _deduplicate_naively(rows, policy, order_values):
+    rows_by_key = {}
+    for cur_row in rows:
+        cur_old_row = rows_by_key.get(cur_row['phone'])
+        if cur_old_row is None:
+            rows_by_key[cur_row['phone']] = cur_row
+        elif policy == 'latest' and order_values[cur_row['id']] >= order_values[cur_old_row['id']]:
+            rows_by_key[cur_row['phone']] = cur_row
+        elif policy == 'merge':
+            rows_by_key[cur_row['phone']] = {
+                cur_name: cur_value if cur_value else cur_row[cur_name] for cur_name, cur_value in cur_old_row.items()
+            }
+    return list(rows_by_key.values())
+
+
+def _transform(src_file_path, dst_dir_path, **kwargs):
+    dst_dir_path.mkdir()
+    transformer = LeadConvToRingerDogCSVFileTransformer(
+        src_file_path=str(src_file_path), dst_dir_path=str(dst_dir_path), **kwargs
+    )
+    transformer.extract_data_to_result_file()
+    return transformer, _read_rows(dst_dir_path / src_file_path.name)
+
+
+@pytest.fixture
+def src_file_path(tmp_path):
+    src_file_path = tmp_path / 'leads.csv'
+    _write_source(src_file_path)
+    return src_file_path
+
+
+@pytest.mark.parametrize('policy', ('first', 'latest', 'merge'))
+@pytest.mark.parametrize('transformer_kwargs', TRANSFORM_MODES)
+@pytest.mark.parametrize('max_keys_in_memory', (1000000, 7))
+def test_dedup_matches_naive_reference(tmp_path, src_file_path, policy, transformer_kwargs, max_keys_in_memory):
+    order_values = {cur_row['id']: cur_row['updated_at'] for cur_row in _read_rows(src_file_path)}
+    _, baseline_rows = _transform(src_file_path, tmp_path / 'base', reusable_field_names_tuple=REUSABLE_FIELD_NAMES)
+
+    transformer, rows = _transform(
+        src_file_path, tmp_path / 'result', reusable_field_names_tuple=REUSABLE_FIELD_NAMES,
+        dedup_policy=policy, dedup_max_keys_in_memory=max_keys_in_memory, **transformer_kwargs
+    )
+
+    assert rows == _deduplicate_naively(baseline_rows, policy=policy, order_values=order_values)
+    assert transformer.rows_out_count == len(rows)
+
+
+def test_latest_policy_orders_by_source_field_not_in_result(tmp_path, src_file_path):
+    transformer, rows = _transform(src_file_path, tmp_path / 'result', streaming=True, dedup_policy='latest')
+
+    assert 'updated_at' not in rows[0]
+    assert len(rows) == len({cur_row['phone'] for cur_row in rows}) == transformer.rows_out_count
+
+
+def test_latest_policy_requires_order_field_in_source(tmp_path, src_file_path):
+    with pytest.raises(ValueError):
+        _transform(
+            src_file_path, tmp_path / 'result', streaming=True, dedup_policy='latest',
+            dedup_order_field_name='created_at',
+        )
@@ -0,0 +1,47 @@
+from os import listdir
+
+from helpers_fanout_runner import FanOutTarget, FanOutTransformRunner
+from helpers_synthetic_data import write_leads_csv
+from transformers import LeadConvToRingerDogCSVFileTransformer
+
+
+class _FailingPreparerTransformer(LeadConvToRingerDogCSVFileTransformer):
+    """Преобразователь, падающий при подготовке второго блока строк"""
+
+    def _iter_rows_prepared_by(self, rows, prepare_row):
+        if self._rows_in_count:
+            raise ValueError('ошибка подготовки')
+        yield from super(_FailingPreparerTransformer, self)._iter_rows_prepared_by(rows=rows, prepare_row=prepare_row)
+
+
+class _FailingFallbackTransformer(LeadConvToRingerDogCSVFileTransformer):
+    """Преобразователь с отдельным чтением, падающий при извлечении данных"""
+
+    def extract_data_to_result_file(self):
+        raise ValueError('ошибка извлечения')
+
+
+def test_fanout_target_errors_are_isolated(tmp_path):
+    src_file_path = tmp_path / 'leads.csv'
+    write_leads_csv(str(src_file_path), rows_count=500)
+    dst_dir_paths = [tmp_path / cur_name for cur_name in ('fallback', 'failing', 'good', 'reference')]
+    for cur_dst_dir_path in dst_dir_paths:
+        cur_dst_dir_path.mkdir()
+    fallback_dir_path, failing_dir_path, good_dir_path, reference_dir_path = dst_dir_paths
+    targets = [
+        FanOutTarget(_FailingFallbackTransformer, str(fallback_dir_path), checkpoint_rows=100),
+        FanOutTarget(_FailingPreparerTransformer, str(failing_dir_path)),
+        FanOutTarget(LeadConvToRingerDogCSVFileTransformer, str(good_dir_path)),
+    ]
+
+    batch_result = FanOutTransformRunner(targets, max_workers=1, block_rows=100).run([str(src_file_path)])
+
+    fallback_result, failing_result, good_result = batch_result.file_results
+    assert fallback_result.error == 'ValueError: ошибка извлечения'
+    assert failing_result.error == 'ValueError: ошибка подготовки'
+    assert good_result.is_success and good_result.rows_in_count == 500
+    assert listdir(failing_dir_path) == []
+    LeadConvToRingerDogCSVFileTransformer(
+        src_file_path=str(src_file_path), dst_dir_path=str(reference_dir_path), streaming=True,
+    ).extract_data_to_result_file()
+    assert (good_dir_path / 'leads.csv').read_bytes() == (reference_dir_path / 'leads.csv').read_bytes()
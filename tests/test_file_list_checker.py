@@ -0,0 +1,53 @@
+from helpers_file_list_checker import ListCheckerFromCSVNamesFile
+from helpers_synthetic_data import write_csv
+
+NAMES_ROWS = (
+    ('Анна', 'Нюра|Аня'),
+    ('  Иван ', ''),
+    ('МАРИЯ', 'Маша'),
+    ('', 'Жан'),
+)
+CHECKED_VALUES = ('анна', 'АННА ', 'Иван', 'мария', 'маша', 'нюра', 'аня', 'жан', 'петр', '', 'Нюра|Аня', 42)
+
+
+def _get_reference_list(names_rows, with_aliases):
+    """Список справочника, как его строил исходный ListChecker: нормализованные непустые значения колонки"""
+    reference_list = []
+    for cur_name, cur_aliases in names_rows:
+        for cur_value in ((cur_name,) + (tuple(cur_aliases.split('|')) if with_aliases else ())):
+            if cur_value.strip():
+                reference_list.append(cur_value.lower().strip())
+    return reference_list
+
+
+def test_index_matches_list_membership(tmp_path):
+    class _NamesChecker(ListCheckerFromCSVNamesFile):
+        pass
+
+    names_file_path = tmp_path / 'names.csv'
+    write_csv(str(names_file_path), ('Name', 'Aliases'), NAMES_ROWS)
+    names_checker = _NamesChecker(src_file_path=str(names_file_path))
+    reference_list = _get_reference_list(NAMES_ROWS, with_aliases=False)
+
+    assert names_checker.values == frozenset(reference_list)
+    assert [names_checker.check_value(cur_value) for cur_value in CHECKED_VALUES] == [
+        str(cur_value).lower().strip() in reference_list for cur_value in CHECKED_VALUES
+    ]
+    assert names_checker.check_values(CHECKED_VALUES) == tuple(map(names_checker.check_value, CHECKED_VALUES))
+
+
+def test_index_of_several_columns_with_aliases(tmp_path):
+    class _NamesWithAliasesChecker(ListCheckerFromCSVNamesFile):
+        pass
+
+    names_file_path = tmp_path / 'names.csv'
+    write_csv(str(names_file_path), ('Name', 'Aliases'), NAMES_ROWS)
+    names_checker = _NamesWithAliasesChecker(
+        src_file_path=str(names_file_path), column_names=('Name', 'Aliases'), aliases_separator='|',
+    )
+    reference_list = _get_reference_list(NAMES_ROWS, with_aliases=True)
+
+    assert names_checker.values == frozenset(reference_list)
+    assert names_checker.check_values(CHECKED_VALUES) == tuple(
+        str(cur_value).lower().strip() in reference_list for cur_value in CHECKED_VALUES
+    )
@@ -0,0 +1,46 @@
+import pytest
+
+from helpers_names_trie import NamesTrie
+from preparers_for_full_names import FullNameFromDavidPlatform
+
+NAMES = ('анна', 'мария', 'иван', 'анна мария', 'жан', 'жан поль', 'ян')
+
+
+@pytest.fixture
+def names_trie(monkeypatch):
+    names_trie = NamesTrie(names=NAMES)
+    monkeypatch.setattr(FullNameFromDavidPlatform, '_nature_names_list_checker', object())
+    monkeypatch.setattr(FullNameFromDavidPlatform, '_nature_names_trie', names_trie)
+    return names_trie
+
+
+@pytest.mark.parametrize('words, span', (
+    (['Петрова', 'Анна-Мария'], (1, 2)),
+    (['Петрова', 'Анна-Петра'], None),
+    (['Анна', 'Мария', 'Петрова'], (0, 2)),
+    (['Жан', 'Поль', 'Сартр'], (0, 2)),
+    (['Жан', 'Сартр'], (0, 1)),
+    (['Сидоров', 'Ян'], (1, 2)),
+    (['Сидоров', 'Петр'], None),
+    ([], None),
+))
+def test_find_first_span(names_trie, words, span):
+    assert names_trie.find_first_span(words=words) == span
+
+
+@pytest.mark.parametrize('src_full_name, first_name, middle_name, last_name, last_and_middle_name', (
+    ('Иванов Иван Иванович', 'Иван', 'Иванович', 'Иванов', 'Иванов Иванович'),
+    ('Иван Иванович Иванов', 'Иван', 'Иванович', 'Иванов', 'Иванович Иванов'),
+    (' Петрова\tАнна   Мария ', 'Анна Мария', '', 'Петрова', 'Петрова'),
+    ('Петрова Анна-Мария', 'Анна-Мария', '', 'Петрова', 'Петрова'),
+    ('Иван Иванович', 'Иван', '', 'Иванович', 'Иванович'),
+    ('Сидоров Ян', 'Ян', '', 'Сидоров', 'Сидоров'),
+    ('Сидоров Петр', 'Сидоров Петр', '', '', ''),
+))
+def test_full_name_split(names_trie, src_full_name, first_name, middle_name, last_name, last_and_middle_name):
+    full_name = FullNameFromDavidPlatform(src_full_name)
+
+    assert full_name.first_name == first_name
+    assert full_name.middle_name == middle_name
+    assert full_name.last_name == last_name
+    assert full_name.last_and_middle_name == last_and_middle_name
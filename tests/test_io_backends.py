@@ -0,0 +1,82 @@
+import pytest
+
+from helpers_io_backends import ArrowIPCReaderBackend, ArrowIPCWriterBackend, CSVReaderBackend, CSVWriterBackend, \
+    ParquetReaderBackend, ParquetWriterBackend
+from helpers_synthetic_data import write_leads_csv
+from transformers import LeadConvToRingerDogCSVFileTransformer
+
+pytest.importorskip('pyarrow')
+
+ARROW_BACKEND_CLASSES = (
+    ('parquet', ParquetReaderBackend, ParquetWriterBackend),
+    ('arrow', ArrowIPCReaderBackend, ArrowIPCWriterBackend),
+)
+
+
+def _convert_csv(src_file_path, dst_file_path, writer_backend):
+    """Переписывает csv файл бэкендом записи writer_backend"""
+    tuple_rows = CSVReaderBackend().iter_tuples(src_file_path=str(src_file_path), dialect='excel')
+    writer_backend.save_tuples(
+        dst_file_path=str(dst_file_path), field_names=next(tuple_rows), tuple_rows=tuple_rows, dialect='excel',
+    )
+
+
+@pytest.mark.parametrize('file_extension, reader_backend_class, writer_backend_class', ARROW_BACKEND_CLASSES)
+def test_csv_round_trip_through_arrow_format(tmp_path, file_extension, reader_backend_class, writer_backend_class):
+    src_file_path = tmp_path / 'leads.csv'
+    write_leads_csv(str(src_file_path), rows_count=1500, seed=8)
+    arrow_file_path = tmp_path / f'leads.{file_extension}'
+    _convert_csv(src_file_path, arrow_file_path, writer_backend_class(batch_size=400))
+
+    for cur_compact_rows, cur_iter_rows in (
+            (True, reader_backend_class(batch_size=300).iter_tuples(src_file_path=str(arrow_file_path))),
+            (False, reader_backend_class(batch_size=300).iter_dicts(src_file_path=str(arrow_file_path))),
+    ):
+        cur_result_file_path = tmp_path / f'result_{cur_compact_rows}.csv'
+        if cur_compact_rows:
+            CSVWriterBackend().save_tuples(
+                dst_file_path=str(cur_result_file_path), field_names=next(cur_iter_rows), tuple_rows=cur_iter_rows,
+                dialect='excel',
+            )
+        else:
+            CSVWriterBackend().save_dicts(
+                dst_file_path=str(cur_result_file_path), dict_rows=cur_iter_rows, dialect='excel',
+            )
+        assert cur_result_file_path.read_bytes() == src_file_path.read_bytes()
+
+
+@pytest.mark.parametrize('file_extension, reader_backend_class, writer_backend_class', ARROW_BACKEND_CLASSES)
+@pytest.mark.parametrize('compact_rows', (False, True))
+def test_transformer_reads_and_writes_arrow_formats(
+        tmp_path, file_extension, reader_backend_class, writer_backend_class, compact_rows,
+):
+    src_dir_path = tmp_path / 'src'
+    src_dir_path.mkdir()
+    write_leads_csv(str(src_dir_path / 'leads.csv'), rows_count=1500, seed=9)
+    _convert_csv(src_dir_path / 'leads.csv', src_dir_path / f'leads.{file_extension}', writer_backend_class())
+
+    def transform(src_file_name, dst_dir_name, **kwargs):
+        dst_dir_path = tmp_path / dst_dir_name
+        dst_dir_path.mkdir()
+        transformer = LeadConvToRingerDogCSVFileTransformer(
+            src_file_path=str(src_dir_path / src_file_name), dst_dir_path=str(dst_dir_path), streaming=True,
+            compact_rows=compact_rows, **kwargs
+        )
+        transformer.extract_data_to_result_file()
+        return transformer.result_file_path
+
+    baseline_file_path = transform('leads.csv', 'baseline')
+    from_arrow_file_path = transform(f'leads.{file_extension}', 'from_arrow')
+    to_arrow_file_path = transform('leads.csv', 'to_arrow', writer_backend=writer_backend_class())
+    back_to_csv_file_path = tmp_path / 'back_to_csv.csv'
+    rows = reader_backend_class().iter_tuples(src_file_path=to_arrow_file_path)
+    CSVWriterBackend().save_tuples(
+        dst_file_path=str(back_to_csv_file_path), field_names=next(rows), tuple_rows=rows, dialect='default',
+    )
+
+    with open(baseline_file_path, 'rb') as read_obj:
+        baseline = read_obj.read()
+    with open(from_arrow_file_path, 'rb') as read_obj:
+        assert read_obj.read() == baseline
+    assert to_arrow_file_path.endswith(f'.{file_extension}')
+    assert back_to_csv_file_path.read_bytes() == baseline
@@ -0,0 +1,124 @@
+from os import listdir
+
+import pytest
+
+from helpers_batch_runner import BatchTransformRunner
+from helpers_synthetic_data import write_csv
+from helpers_transform_spec import DerivedFields, TransformSpec
+from transformers import CSVFileTransformerBySpec
+
+
+class _InterruptingFunc:
+    """Функция вычисляемого поля, прерывающая обработку на заданном значении
+
+    Состояние хранится в классе: атрибуты объекта входят в конфигурацию преобразователя
+
+    """
+    interrupt_on = None
+    calls_count = 0
+
+    def __init__(self, interrupt_on=None):
+        type(self).interrupt_on = interrupt_on
+        type(self).calls_count = 0
+
+    def __call__(self, value):
+        type(self).calls_count += 1
+        if value == self.interrupt_on:
+            raise KeyboardInterrupt
+        return value.upper()
+
+
+def _write_source(tmp_path, rows_count=1000):
+    src_file_path = tmp_path / 'src' / 'leads.csv'
+    src_file_path.parent.mkdir(exist_ok=True)
+    write_csv(str(src_file_path), ('id', 'name'), ((cur_index, f'name{cur_index}') for cur_index in range(rows_count)))
+    return src_file_path
+
+
+def _get_spec(func, copied_field_names=('id',)):
+    return TransformSpec(
+        copied_field_names=copied_field_names,
+        derived_fields=(DerivedFields(target_field_names=('name',), source_field_name='name', func=func),),
+    )
+
+
+def _extract(src_file_path, dst_dir_path, transform_spec, **kwargs):
+    dst_dir_path.mkdir(exist_ok=True)
+    transformer = CSVFileTransformerBySpec(
+        src_file_path=str(src_file_path), dst_dir_path=str(dst_dir_path), transform_spec=transform_spec,
+        streaming=True, **kwargs
+    )
+    transformer.extract_data_to_result_file()
+    return transformer
+
+
+def test_interrupted_file_resumes_from_checkpoint(tmp_path):
+    src_file_path = _write_source(tmp_path)
+    expected = _extract(src_file_path, tmp_path / 'expected', _get_spec(_InterruptingFunc()))
+    interrupting_func = _InterruptingFunc(interrupt_on='name550')
+
+    with pytest.raises(KeyboardInterrupt):
+        _extract(src_file_path, tmp_path / 'dst', _get_spec(interrupting_func), checkpoint_rows=100)
+    assert (tmp_path / 'dst' / '.leads.csv.CSVFileTransformerBySpec.checkpoint.json').exists()
+
+    _InterruptingFunc.interrupt_on = None
+    _InterruptingFunc.calls_count = 0
+    resumed = _extract(src_file_path, tmp_path / 'dst', _get_spec(interrupting_func), checkpoint_rows=100)
+
+    assert _InterruptingFunc.calls_count == 500
+    assert resumed.rows_in_count == 1000
+    assert (tmp_path / 'dst' / 'leads.csv').read_bytes() == (tmp_path / 'expected' / 'leads.csv').read_bytes()
+    assert listdir(tmp_path / 'dst') == ['leads.csv']
+
+
+def test_checkpoint_of_other_config_is_not_used(tmp_path):
+    src_file_path = _write_source(tmp_path)
+    with pytest.raises(KeyboardInterrupt):
+        _extract(src_file_path, tmp_path / 'dst', _get_spec(_InterruptingFunc('name550')), checkpoint_rows=100)
+
+    other_spec = _get_spec(_InterruptingFunc(), copied_field_names=())
+    resumed = _extract(src_file_path, tmp_path / 'dst', other_spec, checkpoint_rows=100)
+    expected = _extract(src_file_path, tmp_path / 'expected', other_spec)
+
+    assert resumed.rows_in_count == 1000
+    assert (tmp_path / 'dst' / 'leads.csv').read_bytes() == (tmp_path / 'expected' / 'leads.csv').read_bytes()
+
+
+def test_manifest_skips_up_to_date_files(tmp_path):
+    src_file_path = _write_source(tmp_path, rows_count=10)
+    empty_src_file_path = tmp_path / 'src' / 'empty.csv'
+    write_csv(str(empty_src_file_path), ('id', 'name'), ())
+    src_file_paths = [str(src_file_path), str(empty_src_file_path)]
+    (tmp_path / 'dst').mkdir()
+    runner = BatchTransformRunner(
+        transformer_class=CSVFileTransformerBySpec, dst_dir_path=str(tmp_path / 'dst'), max_workers=1,
+        use_manifest=True, streaming=True, transform_spec=TransformSpec(copied_field_names=('id', 'name')),
+    )
+
+    first_result = runner.run(src_file_paths=src_file_paths)
+    second_result = runner.run(src_file_paths=src_file_paths)
+    write_csv(str(src_file_path), ('id', 'name'), ((1, 'changed'),))
+    third_result = runner.run(src_file_paths=src_file_paths)
+
+    assert not first_result.failed_file_results
+    assert not first_result.skipped_file_results
+    assert len(second_result.skipped_file_results) == 2
+    assert [cur_result.src_file_path for cur_result in third_result.skipped_file_results] == [
+        str(empty_src_file_path)
+    ]
+    assert (tmp_path / 'dst' / 'leads.csv').read_text() == 'id,name\n1,changed\n'
+
+
+def test_empty_arrow_result_is_written(tmp_path):
+    pytest.importorskip('pyarrow')
+    from helpers_io_backends import ArrowIPCWriterBackend
+
+    empty_src_file_path = tmp_path / 'empty.csv'
+    write_csv(str(empty_src_file_path), ('id', 'name'), ())
+    for compact_rows in (False, True):
+        transformer = _extract(
+            empty_src_file_path, tmp_path / f'dst_{compact_rows}', TransformSpec(copied_field_names=('id',)),
+            writer_backend=ArrowIPCWriterBackend(), compact_rows=compact_rows,
+        )
+        assert transformer.result_file_path.endswith('empty.arrow')
+        assert (tmp_path / f'dst_{compact_rows}' / 'empty.arrow').exists()
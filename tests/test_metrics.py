@@ -0,0 +1,36 @@
+import pytest
+
+from helpers_batch_runner import BatchTransformRunner
+from helpers_metrics import CallbackMetricsHook
+from helpers_synthetic_data import write_leads_csv
+from transformers import LeadConvToRingerDogCSVFileTransformer
+
+
+def test_preparer_times_go_to_metrics_of_each_extraction(tmp_path):
+    src_file_path = tmp_path / 'leads.csv'
+    write_leads_csv(str(src_file_path), rows_count=200)
+    (tmp_path / 'dst').mkdir()
+    collected_metrics = []
+    transformer = LeadConvToRingerDogCSVFileTransformer(
+        src_file_path=str(src_file_path), dst_dir_path=str(tmp_path / 'dst'),
+        metrics_hooks=[CallbackMetricsHook(collected_metrics.append)], phone_numbers_cache_size=100,
+    )
+
+    transformer.extract_data_to_result_file()
+    transformer.extract_data_to_result_file()
+
+    assert len(collected_metrics) == 2
+    assert collected_metrics[0] is not collected_metrics[1]
+    for cur_metrics in collected_metrics:
+        assert cur_metrics.stage_seconds['prepare.phone_number'] > 0
+
+
+def test_batch_runner_rejects_unpicklable_metrics_hooks_for_pool(tmp_path):
+    metrics_hooks = [CallbackMetricsHook(lambda metrics: None)]
+    with pytest.raises(ValueError):
+        BatchTransformRunner(
+            LeadConvToRingerDogCSVFileTransformer, str(tmp_path), max_workers=2, metrics_hooks=metrics_hooks,
+        )
+    BatchTransformRunner(
+        LeadConvToRingerDogCSVFileTransformer, str(tmp_path), max_workers=1, metrics_hooks=metrics_hooks,
+    )
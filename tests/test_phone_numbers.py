@@ -0,0 +1,28 @@
+from preparers_for_phone_number import PhoneNumberForRingerDog
+from helpers_synthetic_data import SyntheticDataGenerator
+
+EDGE_PHONES = (
+    '', 'нет', '89123456789', '79123456789', '+7 912 345-67-89', '9123456789', '8 (495) 123-45-67',
+    '+380123456789', '7912345678', '891234567890', '٩١٢٣٤٥٦٧٨٩', '８９１２３４５６７８９', '+7 (912) 3456789 доб. 12',
+    ' +7(912)3456789\t', '99123456789', '89',
+)
+
+
+def _prepare_step_by_step(src_phone_number):
+    return PhoneNumberForRingerDog(src_phone_number=src_phone_number).prepared_phone_number
+
+
+def test_fast_path_matches_step_by_step_path():
+    generator = SyntheticDataGenerator(seed=1)
+    src_phones = EDGE_PHONES + tuple(generator.dirty_phone() for _ in range(5000))
+
+    for cur_phone in src_phones:
+        assert PhoneNumberForRingerDog.prepare_phone_number_string(cur_phone) == _prepare_step_by_step(cur_phone)
+
+
+def test_bulk_path_keeps_order_and_values():
+    src_phones = list(EDGE_PHONES)
+
+    assert PhoneNumberForRingerDog.prepare_phone_number_strings(src_phones) == [
+        _prepare_step_by_step(cur_phone) for cur_phone in src_phones
+    ]
@@ -0,0 +1,49 @@
+from os import listdir
+
+import pytest
+
+from helpers_io_backends import ShardedCSVWriterBackend
+from helpers_synthetic_data import write_leads_csv
+from transformers import LeadConvToRingerDogCSVFileTransformer
+
+
+def test_result_directory_is_replaced_without_leftovers(tmp_path):
+    src_file_path = tmp_path / 'leads.csv'
+    write_leads_csv(str(src_file_path), rows_count=500)
+    dst_dir_path = tmp_path / 'dst'
+    dst_dir_path.mkdir()
+
+    def transform(max_rows):
+        transformer = LeadConvToRingerDogCSVFileTransformer(
+            src_file_path=str(src_file_path), dst_dir_path=str(dst_dir_path), streaming=True,
+            writer_backend=ShardedCSVWriterBackend(max_rows=max_rows),
+        )
+        transformer.extract_data_to_result_file()
+        return transformer
+
+    transform(max_rows=100)
+    assert len(listdir(dst_dir_path / 'leads')) > 2
+
+    transformer = transform(max_rows=1000)
+    old_result_file_path = transformer._get_work_file_path('old')
+    (dst_dir_path / old_result_file_path.rsplit('/', 1)[-1]).mkdir()
+    transform(max_rows=1000)
+
+    assert listdir(dst_dir_path) == ['leads']
+    assert listdir(dst_dir_path / 'leads') == ['00001.csv']
+
+
+@pytest.mark.parametrize('streaming', (False, True))
+def test_failed_write_leaves_no_tmp_file(tmp_path, streaming):
+    src_file_path = tmp_path / 'leads.csv'
+    src_file_path.write_text('id,name\n1,Анна\n')
+    dst_dir_path = tmp_path / 'dst'
+    dst_dir_path.mkdir()
+    transformer = LeadConvToRingerDogCSVFileTransformer(
+        src_file_path=str(src_file_path), dst_dir_path=str(dst_dir_path), streaming=streaming,
+    )
+
+    with pytest.raises(Exception):
+        transformer.extract_data_to_result_file()
+
+    assert listdir(dst_dir_path) == []
@@ -0,0 +1,101 @@
+import csv
+import gzip
+from io import StringIO
+from os import listdir
+
+import pytest
+
+from helpers_io_backends import ShardedCSVWriterBackend, get_shard_file_name
+from helpers_synthetic_data import write_leads_csv
+from transformers import LeadConvToRingerDogCSVFileTransformer
+
+
+def _transform(src_file_path, dst_dir_path, compact_rows=False, writer_backend=None):
+    dst_dir_path.mkdir()
+    transformer = LeadConvToRingerDogCSVFileTransformer(
+        src_file_path=str(src_file_path), dst_dir_path=str(dst_dir_path), streaming=True, compact_rows=compact_rows,
+        writer_backend=writer_backend,
+    )
+    transformer.extract_data_to_result_file()
+    return transformer.result_file_path
+
+
+def _read_rows(data) -> list:
+    return list(csv.reader(StringIO(data.decode(), newline='')))
+
+
+@pytest.fixture
+def leads_file_path(tmp_path):
+    src_file_path = tmp_path / 'leads.csv'
+    write_leads_csv(str(src_file_path), rows_count=1000, seed=11)
+    return src_file_path
+
+
+@pytest.fixture
+def baseline(tmp_path, leads_file_path):
+    with open(_transform(leads_file_path, tmp_path / 'baseline'), 'rb') as read_obj:
+        return read_obj.read()
+
+
+@pytest.mark.parametrize('compact_rows', (False, True))
+def test_gzip_single_file_matches_plain_result(tmp_path, leads_file_path, baseline, compact_rows):
+    result_file_path = _transform(
+        leads_file_path, tmp_path / 'gzip', compact_rows=compact_rows,
+        writer_backend=ShardedCSVWriterBackend(compression='gzip', buffer_size=1024),
+    )
+
+    assert result_file_path.endswith('/leads.csv.gz')
+    with gzip.open(result_file_path, 'rb') as read_obj:
+        assert read_obj.read() == baseline
+
+
+@pytest.mark.parametrize('compression, open_part', ((None, open), ('gzip', gzip.open)))
+def test_parts_roll_by_row_count(tmp_path, leads_file_path, baseline, compression, open_part):
+    result_dir_path = _transform(
+        leads_file_path, tmp_path / 'parts',
+        writer_backend=ShardedCSVWriterBackend(max_rows=300, compression=compression),
+    )
+    header, *baseline_rows = _read_rows(baseline)
+
+    part_file_names = sorted(listdir(result_dir_path))
+    file_extension = 'csv.gz' if compression else 'csv'
+    parts_count = (len(baseline_rows) + 299) // 300
+    assert parts_count > 2
+    assert part_file_names == [f'{cur_number:05d}.{file_extension}' for cur_number in range(1, parts_count + 1)]
+    rows = []
+    for cur_part_file_name in part_file_names:
+        with open_part(f'{result_dir_path}/{cur_part_file_name}', 'rb') as read_obj:
+            cur_header, *cur_rows = _read_rows(read_obj.read())
+        assert cur_header == header
+        assert len(cur_rows) <= 300
+        rows.extend(cur_rows)
+    assert rows == baseline_rows
+
+
+@pytest.mark.parametrize('compact_rows', (False, True))
+def test_shards_by_column_with_limited_open_files(tmp_path, leads_file_path, baseline, compact_rows):
+    result_dir_path = _transform(
+        leads_file_path, tmp_path / 'shards', compact_rows=compact_rows,
+        writer_backend=ShardedCSVWriterBackend(shard_field_name='utm_source', max_open_shards=2),
+    )
+    header, *baseline_rows = _read_rows(baseline)
+    shard_index = header.index('utm_source')
+    shard_values = {cur_row[shard_index] for cur_row in baseline_rows}
+
+    assert '' in shard_values and len(shard_values) > 2
+    assert sorted(listdir(result_dir_path)) == sorted(
+        f'{get_shard_file_name(cur_value)}.csv' for cur_value in shard_values
+    )
+    for cur_value in shard_values:
+        with open(f'{result_dir_path}/{get_shard_file_name(cur_value)}.csv', 'rb') as read_obj:
+            assert _read_rows(read_obj.read()) == [header] + [
+                cur_row for cur_row in baseline_rows if cur_row[shard_index] == cur_value
+            ]
+
+
+def test_shard_file_names_do_not_collide():
+    assert get_shard_file_name('vk_ads') == 'vk_ads'
+    shard_file_names = [get_shard_file_name(cur_value) for cur_value in ('a/b', 'a_b', 'a b', '', None)]
+    assert len(set(shard_file_names[:3])) == 3
+    assert shard_file_names[3] == shard_file_names[4]
+    assert all(cur_name and '/' not in cur_name for cur_name in shard_file_names)
@@ -0,0 +1,18 @@
+import transformers
+from transformers import BASEFileTransformer, LeadConvToRingerDogCSVFileTransformer
+
+
+def test_shared_data_is_frozen_once_only_for_fork(monkeypatch):
+    freeze_calls = []
+    monkeypatch.setattr(transformers, 'freeze', lambda: freeze_calls.append(1))
+    monkeypatch.setattr(BASEFileTransformer, '_is_shared_data_frozen', False)
+
+    monkeypatch.setattr(transformers, 'get_start_method', lambda: 'spawn')
+    LeadConvToRingerDogCSVFileTransformer.preload_shared_data_for_pool()
+    LeadConvToRingerDogCSVFileTransformer.preload_shared_data()
+    assert freeze_calls == []
+
+    monkeypatch.setattr(transformers, 'get_start_method', lambda: 'fork')
+    LeadConvToRingerDogCSVFileTransformer.preload_shared_data_for_pool()
+    LeadConvToRingerDogCSVFileTransformer.preload_shared_data_for_pool()
+    assert freeze_calls == [1]
@@ -0,0 +1,38 @@
+import pytest
+
+from helpers_names_trie import NamesTrie
+from helpers_synthetic_data import FIRST_NAMES, write_leads_csv, write_subscriptions_csv
+from preparers_for_full_names import FullNameFromDavidPlatform
+from transformers import DavidPlatformToLeadConvSubscriptionTransformer, LeadConvToRingerDogCSVFileTransformer
+
+
+@pytest.fixture(autouse=True)
+def names_trie(monkeypatch):
+    monkeypatch.setattr(FullNameFromDavidPlatform, '_nature_names_list_checker', object())
+    names_trie = NamesTrie(names=[cur_name.lower() for cur_name in FIRST_NAMES])
+    monkeypatch.setattr(FullNameFromDavidPlatform, '_nature_names_trie', names_trie)
+
+
+@pytest.mark.parametrize('transformer_class, write_src_csv', (
+        (LeadConvToRingerDogCSVFileTransformer, write_leads_csv),
+        (DavidPlatformToLeadConvSubscriptionTransformer, write_subscriptions_csv),
+))
+@pytest.mark.parametrize('compact_rows', (False, True))
+def test_streaming_result_matches_in_memory_result(tmp_path, transformer_class, write_src_csv, compact_rows):
+    src_file_path = tmp_path / 'src.csv'
+    write_src_csv(str(src_file_path), rows_count=1000, seed=3)
+    results = []
+    for cur_streaming in (False, True):
+        cur_dst_dir_path = tmp_path / f'streaming_{cur_streaming}'
+        cur_dst_dir_path.mkdir()
+        cur_transformer = transformer_class(
+            src_file_path=str(src_file_path), dst_dir_path=str(cur_dst_dir_path),
+            streaming=cur_streaming, compact_rows=compact_rows,
+        )
+        cur_transformer.extract_data_to_result_file()
+        with open(cur_transformer.result_file_path, 'rb') as read_obj:
+            results.append((read_obj.read(), cur_transformer.rows_in_count, cur_transformer.rows_out_count))
+
+    assert results[0] == results[1]
+    assert results[1][1] == 1000
+    assert results[1][0].count(b'\n') == results[1][2] + 1
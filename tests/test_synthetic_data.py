@@ -0,0 +1,14 @@
+import pytest
+
+from helpers_synthetic_data import SyntheticDataGenerator, get_max_names_dictionary_size
+
+
+def test_names_dictionary_of_max_size_has_unique_names():
+    max_size = get_max_names_dictionary_size()
+    names = list(SyntheticDataGenerator(seed=0).iter_names_dictionary(max_size))
+    assert len(names) == len(set(names)) == max_size
+
+
+def test_names_dictionary_larger_than_max_size_raises():
+    with pytest.raises(ValueError):
+        SyntheticDataGenerator(seed=0).iter_names_dictionary(get_max_names_dictionary_size() + 1)
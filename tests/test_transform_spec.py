@@ -0,0 +1,97 @@
+import pytest
+
+from helpers_synthetic_data import write_leads_csv
+from helpers_transform_spec import DerivedFields, TransformSpec
+from transformers import CSVFileTransformerBySpec, LeadConvToRingerDogCSVFileTransformer
+from preparers_for_phone_number import PhoneNumberForRingerDog
+
+
+def _get_spec():
+    return TransformSpec(
+        copied_field_names=('id', 'first_name'),
+        renamed_field_names={'channel': 'channel_name'},
+        derived_fields=(
+            DerivedFields(
+                target_field_names=('phone',),
+                source_field_name='phone',
+                func=PhoneNumberForRingerDog.prepare_phone_number_string,
+            ),
+        ),
+        required_fields={'phone': 'invalid_phone'},
+    )
+
+
+def _transform(transformer_class, src_file_path, dst_dir_path, **kwargs):
+    dst_dir_path.mkdir(exist_ok=True)
+    transformer_class(
+        src_file_path=str(src_file_path), dst_dir_path=str(dst_dir_path), **kwargs
+    ).extract_data_to_result_file()
+    return (dst_dir_path / src_file_path.name).read_text()
+
+
+@pytest.fixture
+def src_file_path(tmp_path):
+    src_file_path = tmp_path / 'leads.csv'
+    write_leads_csv(str(src_file_path), rows_count=3000, seed=3)
+    return src_file_path
+
+
+@pytest.mark.parametrize('transformer_kwargs', (
+    {'streaming': True},
+    {'compact_rows': True},
+    {'streaming': True, 'compact_rows': True},
+    {'streaming': True, 'compact_rows': True, 'checkpoint_rows': 500},
+))
+def test_spec_transformer_matches_dict_path(tmp_path, src_file_path, transformer_kwargs):
+    baseline = _transform(CSVFileTransformerBySpec, src_file_path, tmp_path / 'base', transform_spec=_get_spec())
+
+    result = _transform(
+        CSVFileTransformerBySpec, src_file_path, tmp_path / 'result', transform_spec=_get_spec(), **transformer_kwargs
+    )
+
+    assert result == baseline
+
+
+@pytest.mark.parametrize('transformer_kwargs', ({'streaming': True, 'compact_rows': True}, {'compact_rows': True}))
+def test_leadconv_tuple_rows_match_dict_rows(tmp_path, src_file_path, transformer_kwargs):
+    baseline = _transform(LeadConvToRingerDogCSVFileTransformer, src_file_path, tmp_path / 'base')
+
+    result = _transform(LeadConvToRingerDogCSVFileTransformer, src_file_path, tmp_path / 'result', **transformer_kwargs)
+
+    assert result == baseline
+
+
+def test_spec_is_compiled_once_per_header(tmp_path, src_file_path, monkeypatch):
+    compile_calls = []
+    compile_func = TransformSpec.compile
+    monkeypatch.setattr(
+        TransformSpec, 'compile', lambda *args, **kwargs: compile_calls.append(1) or compile_func(*args, **kwargs)
+    )
+
+    _transform(
+        CSVFileTransformerBySpec, src_file_path, tmp_path / 'result', transform_spec=_get_spec(),
+        streaming=True, compact_rows=True, checkpoint_rows=500,
+    )
+
+    assert len(compile_calls) == 1
+
+
+def test_spec_transformer_requires_transform_spec(tmp_path, src_file_path):
+    with pytest.raises(ValueError):
+        CSVFileTransformerBySpec(src_file_path=str(src_file_path), dst_dir_path=str(tmp_path), transform_spec=None)
+
+
+def test_short_tuple_rows_are_padded_and_prepared_once():
+    prepared_values = []
+    transform_spec = TransformSpec(
+        copied_field_names=('id', 'comment'),
+        derived_fields=(
+            DerivedFields(target_field_names=('name',), source_field_name='name', func=prepared_values.append),
+        ),
+    )
+    prepare_tuple = transform_spec.compile(src_field_names=('id', 'name', 'comment'), tuple_rows=True)
+
+    assert prepare_tuple(['1', 'Анна']) == ('1', None, None)
+    assert prepared_values == ['Анна']
+    assert prepare_tuple(('2', 'Иван', 'комментарий')) == ('2', 'комментарий', None)
+    assert prepared_values == ['Анна', 'Иван']
@@ -0,0 +1,71 @@
+from os import _exit
+from threading import Thread
+from time import sleep
+
+import pytest
+
+from helpers_file_watcher import FileWatcher, PollingFileWatcher
+from helpers_synthetic_data import write_leads_csv
+from helpers_watch_runner import WatchTransformRunner
+from transformers import LeadConvToRingerDogCSVFileTransformer
+
+
+class _CrashingTransformer(LeadConvToRingerDogCSVFileTransformer):
+    """Преобразователь, аварийно завершающий процесс пула на файлах crash*.csv"""
+
+    def extract_data_to_result_file(self):
+        if self._filename.startswith('crash'):
+            _exit(1)
+        super(_CrashingTransformer, self).extract_data_to_result_file()
+
+
+def test_polling_watcher_reports_existing_files_after_two_stable_polls(tmp_path):
+    (tmp_path / 'ready.csv').write_text('id\n1\n')
+    (tmp_path / 'copying.csv').write_text('id\n')
+    watcher = PollingFileWatcher(src_dir_path=str(tmp_path), poll_seconds=0.05)
+
+    assert watcher.scan() == []
+    (tmp_path / 'copying.csv').write_text('id\n1\n2\n')
+    assert watcher.wait_for_file_paths(timeout=1) == [f'{tmp_path}/ready.csv']
+    assert watcher.wait_for_file_paths(timeout=1) == [f'{tmp_path}/copying.csv']
+    assert watcher.wait_for_file_paths(timeout=1) == []
+
+
+def test_file_watcher_without_wait_is_not_created(tmp_path):
+    class _IncompleteFileWatcher(FileWatcher):
+        pass
+
+    with pytest.raises(TypeError):
+        _IncompleteFileWatcher(src_dir_path=str(tmp_path))
+
+
+def test_watch_survives_broken_process_pool(tmp_path):
+    src_dir_path = tmp_path / 'src'
+    dst_dir_path = tmp_path / 'dst'
+    src_dir_path.mkdir()
+    dst_dir_path.mkdir()
+    write_leads_csv(str(src_dir_path / 'crash.csv'), rows_count=10)
+    file_results = []
+    runner = WatchTransformRunner(
+        _CrashingTransformer, str(dst_dir_path), max_workers=2, use_inotify=False, poll_seconds=0.05, streaming=True,
+    )
+    watch_thread = Thread(target=runner.watch, args=(str(src_dir_path), file_results.append))
+    watch_thread.start()
+    try:
+        for _ in range(200):
+            if file_results:
+                break
+            sleep(0.05)
+        write_leads_csv(str(src_dir_path / 'leads.csv'), rows_count=10)
+        for _ in range(200):
+            if len(file_results) >= 2:
+                break
+            sleep(0.05)
+    finally:
+        runner.stop()
+        watch_thread.join()
+
+    assert [(cur_result.src_file_path.rsplit('/', 1)[-1], cur_result.is_success) for cur_result in file_results] == [
+        ('crash.csv', False), ('leads.csv', True),
+    ]
+    assert 'BrokenProcessPool' in file_results[0].error
@@ -1,16 +1,46 @@
 from _csv import register_dialect, QUOTE_MINIMAL
 from abc import abstractmethod
-from csv import DictWriter, unix_dialect
+from gc import freeze
+from multiprocessing import get_start_method
+from csv import DictWriter, unix_dialect, get_dialect
+from itertools import islice, chain
+from os import remove, replace, fsync, fstat, listdir
+from os.path import getsize, exists, basename, isdir
+from shutil import copyfileobj, rmtree
+from time import perf_counter
+
+from helpers_csv_chunks import find_csv_record_boundaries, iter_chunk_ranges, transform_csv_chunk
+from helpers_io_backends import CSVReaderBackend, CSVWriterBackend, get_reader_backend_for_file
+from helpers_manifest import FileCheckpoint, get_transformer_config
+from helpers_metrics import TransformMetrics, TimedReadObj, SamplingProfiler, timed_func
+from helpers_transform_spec import TransformSpec, DerivedFields, get_row_dict_adapter
 
 from helpers_mixins import CSVFileReaderMixin
 from preparers_for_full_names import FullNameFromDavidPlatform
 from preparers_for_phone_number import PhoneNumberForRingerDog
 from transformers_mixins import CSVFileTransformerWithReusableFieldsMixin, CSVFileTransformerWithPhonesMixin, \
-    CSVFileTransformerWithFullNames
+    CSVFileTransformerWithFullNames, CSVFileTransformerWithDedupMixin
+
+
+class LeadConvSubscriptionsDialect(unix_dialect):
+    """Describe the usual properties of Unix-generated CSV files."""
+    delimiter = ','
+    quoting = QUOTE_MINIMAL
+
+
+register_dialect("lead_conv_subscriptions", LeadConvSubscriptionsDialect)
 
 
 class BASEFileTransformer:
     _dst_dir_path = None
+    _init_kwargs = None
+    _is_shared_data_frozen = False
+
+    def __new__(cls, *args, **kwargs):
+        """Запоминает параметры создания преобразователя для его конфигурации"""
+        transformer = super(BASEFileTransformer, cls).__new__(cls)
+        transformer._init_kwargs = kwargs
+        return transformer
 
     def set_dst_dir_path(self, dst_dir_path):
         """Сеттер пути результирующей директории"""
@@ -29,33 +59,695 @@ class BASEFileTransformer:
         """Метод для сохранения подготовленных данных"""
         pass
 
+    @property
+    def transformer_config(self) -> str:
+        """Возвращает строку конфигурации: класс и параметры создания без путей, как в манифесте"""
+        return get_transformer_config(type(self), {
+            cur_name: cur_value for cur_name, cur_value in (self._init_kwargs or {}).items()
+            if cur_name not in ('src_file_path', 'dst_dir_path')
+        })
+
     def extract_data_to_result_file(self):
         """Готовит результирующий файл"""
         self._prepare_data_for_export()
         self._save_prepared_data_file()
 
+    @classmethod
+    def preload_shared_data(cls):
+        """Загружает общие для преобразований данные (справочники) до запуска пула процессов
+
+        Наследники загружают свои данные и вызывают родительский метод
+
+        """
+        pass
+
+    @classmethod
+    def preload_shared_data_for_pool(cls):
+        """Загружает общие данные непосредственно перед созданием пула процессов
+
+        Процессы пула, созданные через fork, используют загруженное совместно (copy-on-write),
+        а gc.freeze убирает эти объекты из обхода сборщика мусора, чтобы он не копировал их страницы памяти.
+        Заморозка выполняется один раз за процесс и только при методе запуска fork:
+        при spawn и forkserver память не наследуется
+
+        """
+        cls.preload_shared_data()
+        if not BASEFileTransformer._is_shared_data_frozen and get_start_method() == 'fork':
+            freeze()
+            BASEFileTransformer._is_shared_data_frozen = True
+
 
 class BASECSVFileTransformer(CSVFileReaderMixin, BASEFileTransformer):
-    """Класс, управляющий преобразованием csv файлов"""
+    """Класс, управляющий преобразованием csv файлов
+
+    _streaming - признак потоковой обработки: строки идут из DictReader через подготовку строк
+    в DictWriter генераторами, без материализации всего файла в _csv_file_list_of_dict
+
+    _chunk_size - размер части в байтах для параллельной обработки одного большого файла.
+    При потоковой обработке файл больше _chunk_size делится на части по границам записей,
+    части готовятся в _chunk_workers процессах и склеиваются по порядку в результирующий файл
+
+    reader_backend / writer_backend - бэкенды чтения и записи (Parquet, Arrow IPC),
+    по умолчанию бэкенд чтения выбирается по расширению исходного файла, запись - в csv
+
+    Результат пишется во временный файл и атомарно переименовывается.
+    _checkpoint_rows - при потоковой обработке csv каждые _checkpoint_rows исходных строк
+    записанное фиксируется на диске с контрольной точкой, прерванная обработка продолжается с нее
 
-    def __init__(self, src_file_path, *args, **kwargs):
+    metrics_hooks - обработчики метрик (helpers_metrics.MetricsHook). Если заданы, при преобразовании
+    собираются время стадий и счетчики строк и байт, по завершении метрики передаются обработчикам.
+    profile_sample_rate - доля преобразований, выполняемых под cProfile
+
+    transform_spec - декларативное описание преобразования строки (helpers_transform_spec.TransformSpec).
+    Наследники создают его один раз в _create_transform_spec, либо переопределяют _prepare_row
+    для подготовки словарями. Скомпилированные функции подготовки кешируются по заголовку исходного файла
+
+    compact_rows - компактное представление строк: исходные строки читаются последовательностями значений
+    csv.reader (колоночными пакетами для Parquet / Arrow IPC) с индексами полей по заголовку.
+    Описание преобразования компилируется под кортежи и пишется csv.writer без словарей.
+    Для наследников с _prepare_row строка преобразуется в словарь адаптером get_row_dict_adapter
+
+    """
+    _streaming = False
+    _rows_in_count = 0
+    _rows_out_count = 0
+    _chunk_size = None
+    _chunk_workers = None
+    _src_field_names = ()
+    _writer_backend = CSVWriterBackend()
+    _checkpoint_rows = None
+    _metrics_hooks = ()
+    _profile_sample_rate = None
+    _metrics = None
+    _transform_spec = None
+    _prepare_funcs = None
+
+    def set_streaming(self, streaming):
+        """Сеттер признака потоковой обработки"""
+        self._streaming = streaming
+        self._read_on_init = not streaming
+
+    def set_chunks_params(self, chunk_size, chunk_workers):
+        """Сеттер параметров параллельной обработки частей файла"""
+        self._chunk_size = chunk_size
+        self._chunk_workers = chunk_workers
+
+    def set_writer_backend(self, writer_backend):
+        """Сеттер бэкенда записи результирующего файла"""
+        self._writer_backend = writer_backend
+
+    def set_checkpoint_rows(self, checkpoint_rows):
+        """Сеттер количества исходных строк между контрольными точками"""
+        self._checkpoint_rows = checkpoint_rows
+
+    def set_transform_spec(self, transform_spec):
+        """Сеттер декларативного описания преобразования строки"""
+        self._transform_spec = transform_spec
+        self._prepare_funcs = None
+
+    def set_metrics_params(self, metrics_hooks, profile_sample_rate):
+        """Сеттер обработчиков метрик и доли профилируемых преобразований"""
+        self._metrics_hooks = tuple(metrics_hooks)
+        self._profile_sample_rate = profile_sample_rate
+
+    def __init__(
+            self, src_file_path, streaming=False, chunk_size=None, chunk_workers=None,
+            reader_backend=None, writer_backend=None, checkpoint_rows=None,
+            metrics_hooks=(), profile_sample_rate=None, transform_spec=None, compact_rows=False,
+            *args, **kwargs
+    ):
+        self.set_streaming(streaming=streaming)
+        self.set_compact_rows(compact_rows=compact_rows)
+        self.set_checkpoint_rows(checkpoint_rows=checkpoint_rows)
+        self.set_metrics_params(metrics_hooks=metrics_hooks, profile_sample_rate=profile_sample_rate)
+        self.set_transform_spec(transform_spec=transform_spec if transform_spec else self._create_transform_spec())
+        self.set_chunks_params(chunk_size=chunk_size, chunk_workers=chunk_workers)
+        self.set_reader_backend(
+            reader_backend=reader_backend if reader_backend else get_reader_backend_for_file(src_file_path)
+        )
+        if writer_backend:
+            self.set_writer_backend(writer_backend=writer_backend)
         super(BASECSVFileTransformer, self).__init__(src_file_path=src_file_path, *args, **kwargs)
 
     @abstractmethod
-    def _prepare_data_for_export(self):
-        """Метод для подготовки данных"""
+    def _prepare_row(self, cur_dict):
+        """Метод для подготовки одной строки. Возвращает новый словарь или None, если строка отбрасывается"""
         pass
 
+    def _create_transform_spec(self):
+        """Создает описание преобразования наследника при создании преобразователя. None - подготовка _prepare_row"""
+        return None
+
+    def _get_transform_spec(self):
+        """Возвращает декларативное описание преобразования или None для подготовки методом _prepare_row"""
+        return self._transform_spec
+
+    def _get_source_field_names(self):
+        """Возвращает колонки исходного файла из описания преобразования. None - все колонки"""
+        transform_spec = self._get_transform_spec()
+        return transform_spec.source_field_names if transform_spec else None
+
+    def _on_row_dropped(self, drop_reason):
+        """Учитывает отброшенную описанием преобразования строку в метриках"""
+        self._increment_metric(f'rows_dropped.{drop_reason}')
+
+    def _get_compiled_spec_func(self, src_field_names, tuple_rows=False):
+        """Возвращает функцию подготовки, скомпилированную из описания преобразования, с кешем по заголовку
+
+        Описание компилируется один раз на заголовок, представление строк и признак сбора метрик,
+        а не для каждой части, контрольной точки или блока
+
+        """
+        with_metrics = self._metrics is not None
+        cache_key = (tuple(src_field_names), tuple_rows, with_metrics)
+        if self._prepare_funcs is None:
+            self._prepare_funcs = {}
+        prepare_func = self._prepare_funcs.get(cache_key)
+        if prepare_func is None:
+            prepare_func = self._get_transform_spec().compile(
+                src_field_names=src_field_names,
+                on_drop=self._on_row_dropped if with_metrics else None,
+                tuple_rows=tuple_rows,
+            )
+            self._prepare_funcs[cache_key] = prepare_func
+        return prepare_func
+
+    def _get_prepare_row_func(self, src_field_names):
+        """Возвращает функцию подготовки строки: скомпилированное описание преобразования или _prepare_row"""
+        if self._get_transform_spec() is None:
+            return self._prepare_row
+        return self._get_compiled_spec_func(src_field_names=src_field_names)
+
+    def _is_tuple_result(self):
+        """Признак подготовки строк-кортежей: компактные строки с описанием преобразования"""
+        return self._compact_rows and self._get_transform_spec() is not None
+
+    def _get_prepare_tuple_func(self, src_field_names):
+        """Возвращает функцию подготовки компактной строки
+
+        Описание преобразования компилируется под кортежи, иначе строка адаптируется в словарь для _prepare_row
+
+        """
+        if self._get_transform_spec() is not None:
+            return self._get_compiled_spec_func(src_field_names=src_field_names, tuple_rows=True)
+        prepare_row = self._prepare_row
+        row_to_dict = get_row_dict_adapter(field_names=src_field_names)
+        return lambda cur_row: prepare_row(row_to_dict(cur_row))
+
+    @property
+    def rows_in_count(self):
+        """Возвращает количество обработанных исходных строк"""
+        return self._rows_in_count
+
+    @property
+    def rows_out_count(self):
+        """Возвращает количество подготовленных результирующих строк"""
+        return self._rows_out_count
+
+    def add_rows_counts(self, rows_in_count, rows_out_count):
+        """Добавляет количество строк, подготовленных копией преобразователя в другом процессе"""
+        self._rows_in_count += rows_in_count
+        self._rows_out_count += rows_out_count
+
+    @property
+    def metrics(self):
+        """Возвращает метрики последнего преобразования или None, если метрики не собирались"""
+        return self._metrics
+
+    def _increment_metric(self, counter_name, value=1):
+        """Увеличивает счетчик метрик, если метрики собираются"""
+        if self._metrics is not None:
+            self._metrics.increment(counter_name, value)
+
+    def _wrap_preparer_func(self, preparer_name, func):
+        """Оборачивает функцию подготовщика замером времени, если метрики собираются
+
+        Функция подготовщика сохраняется между преобразованиями, поэтому время пишется
+        в метрики преобразователя на момент вызова, а не в метрики первого преобразования
+
+        """
+        if self._metrics is None:
+            return func
+        return timed_func(func=func, get_metrics=lambda: self._metrics, stage_name=f'prepare.{preparer_name}')
+
+    def _get_read_obj_wrapper(self):
+        """Возвращает обертку исходного файла с замером времени чтения, если метрики собираются"""
+        if self._metrics is None:
+            return None
+        return lambda read_obj: TimedReadObj(read_obj=read_obj, metrics=self._metrics)
+
+    def _iter_prepared_rows_with_metrics(self, rows, prepare_row):
+        """Генератор подготовленных строк с замером времени получения и подготовки строк"""
+        metrics = self._metrics
+        rows = iter(rows)
+        rows_end = object()
+        source_seconds = prepare_seconds = 0.0
+        try:
+            while True:
+                started_at = perf_counter()
+                cur_dict = next(rows, rows_end)
+                got_at = perf_counter()
+                source_seconds += got_at - started_at
+                if cur_dict is rows_end:
+                    break
+
+                self._rows_in_count += 1
+                new_dict = prepare_row(cur_dict)
+                prepare_seconds += perf_counter() - got_at
+                if new_dict is None:
+                    metrics.increment('rows_dropped')
+                    continue
+                self._rows_out_count += 1
+                yield new_dict
+        finally:
+            metrics.add_stage_seconds('source', source_seconds)
+            metrics.add_stage_seconds('prepare', prepare_seconds)
+
+    def _iter_rows_prepared_by(self, rows, prepare_row):
+        """Генератор строк, подготовленных функцией prepare_row, с подсчетом строк"""
+        if self._metrics is not None:
+            yield from self._iter_prepared_rows_with_metrics(rows=rows, prepare_row=prepare_row)
+            return
+        for cur_row in rows:
+            self._rows_in_count += 1
+            new_row = prepare_row(cur_row)
+            if new_row is not None:
+                self._rows_out_count += 1
+                yield new_row
+
+    def _iter_prepared_rows(self, rows):
+        """Генератор подготовленных строк из переданных исходных строк
+
+        Функция подготовки получается один раз по заголовку (ключам первой строки)
+
+        """
+        rows = iter(rows)
+        first_dict = next(rows, None)
+        if first_dict is None:
+            return
+        prepare_row = self._get_prepare_row_func(src_field_names=tuple(first_dict))
+        yield from self._iter_rows_prepared_by(rows=chain((first_dict,), rows), prepare_row=prepare_row)
+
+    def _iter_prepared_tuples(self, src_field_names, rows):
+        """Генератор подготовленных строк из компактных исходных строк с заголовком src_field_names"""
+        prepare_row = self._get_prepare_tuple_func(src_field_names=src_field_names)
+        yield from self._iter_rows_prepared_by(rows=rows, prepare_row=prepare_row)
+
+    def _get_source_rows(self) -> tuple:
+        """Возвращает заголовок и генератор исходных строк. Для строк-словарей заголовок - None"""
+        if self._compact_rows:
+            return self._get_csv_field_names_and_tuples()
+        return None, self._iter_csv_dicts()
+
+    def _iter_prepared_source_rows(self, src_field_names, rows):
+        """Генератор подготовленных строк из исходных строк, полученных _get_source_rows"""
+        if self._compact_rows:
+            return self._iter_prepared_tuples(src_field_names=src_field_names, rows=rows)
+        return self._iter_prepared_rows(rows=rows)
+
+    def _write_csv_rows(self, write_obj, rows, with_header=True):
+        """Пишет подготовленные строки в открытый csv файл. Возвращает наименования полей или None"""
+        if self._is_tuple_result():
+            return CSVWriterBackend.write_tuples(
+                write_obj=write_obj,
+                field_names=self._get_transform_spec().result_field_names,
+                tuple_rows=rows,
+                dialect=self._dialect,
+                with_header=with_header,
+            )
+        return CSVWriterBackend.write_dicts(
+            write_obj=write_obj, dict_rows=rows, dialect=self._dialect, with_header=with_header,
+        )
+
+    def _prepare_data_for_export(self):
+        """Подготавливает данные. При потоковой обработке строки готовятся при сохранении"""
+        if self._streaming:
+            return
+        if self._compact_rows:
+            self._csv_file_list_of_tuples = list(self._iter_prepared_tuples(
+                src_field_names=self._csv_field_names, rows=self._csv_file_list_of_tuples,
+            ))
+        else:
+            self._csv_file_list_of_dict = list(self._iter_prepared_rows(rows=self._csv_file_list_of_dict))
+
+    def _iter_rows_for_save(self):
+        """Возвращает итератор подготовленных строк для сохранения"""
+        if self._streaming:
+            src_field_names, rows = self._get_source_rows()
+            return self._iter_prepared_source_rows(src_field_names=src_field_names, rows=rows)
+        return iter(self._csv_file_list_of_tuples if self._compact_rows else self._csv_file_list_of_dict)
+
+    def _get_result_file_path(self):
+        """Возвращает путь результирующего файла с расширением бэкенда записи
+
+        Бэкенды, пишущие результат в несколько файлов (file_extension None), пишут в директорию без расширения
+
+        """
+        file_extension = self._writer_backend.file_extension
+        if file_extension is None:
+            return f'{self._dst_dir_path}/{self._filename.rsplit(".", 1)[0]}'
+        if self._filename.endswith(f'.{file_extension}'):
+            return f'{self._dst_dir_path}/{self._filename}'
+        return f'{self._dst_dir_path}/{self._filename.rsplit(".", 1)[0]}.{file_extension}'
+
+    @property
+    def result_file_path(self):
+        """Возвращает путь результирующего файла"""
+        return self._get_result_file_path()
+
+    def _get_work_file_path(self, suffix):
+        """Возвращает путь служебного файла результата
+
+        В имени есть класс преобразователя: разные преобразователи с одним именем результата
+        в общей директории не используют чужие временные файлы и контрольные точки
+
+        """
+        return f'{self._dst_dir_path}/.{basename(self._get_result_file_path())}.{type(self).__name__}.{suffix}'
+
+    def _get_tmp_result_file_path(self):
+        """Возвращает путь временного файла, который после записи переименовывается в результирующий"""
+        return self._get_work_file_path('tmp')
+
+    def _commit_tmp_result_file(self):
+        """Атомарно заменяет результирующий файл записанным временным
+
+        Прежняя директория результата сначала переименовывается в служебную, на ее место переименовывается
+        временная, и только затем прежняя удаляется: результат отсутствует лишь между двумя переименованиями,
+        а не на время удаления директории. Если временный файл не записан, выбрасывается FileNotFoundError:
+        результат без файла не должен попасть в манифест как готовый
+
+        """
+        tmp_result_file_path = self._get_tmp_result_file_path()
+        if not exists(tmp_result_file_path):
+            raise FileNotFoundError(f'Временный результирующий файл {tmp_result_file_path} не записан')
+        result_file_path = self._get_result_file_path()
+        if not isdir(result_file_path):
+            replace(tmp_result_file_path, result_file_path)
+            return
+        old_result_file_path = self._get_work_file_path('old')
+        if exists(old_result_file_path):
+            rmtree(old_result_file_path)
+        replace(result_file_path, old_result_file_path)
+        replace(tmp_result_file_path, result_file_path)
+        rmtree(old_result_file_path)
+
+    def _remove_tmp_result_file(self):
+        """Удаляет временный результирующий файл (директорию частей), если он записан"""
+        tmp_result_file_path = self._get_tmp_result_file_path()
+        if isdir(tmp_result_file_path):
+            rmtree(tmp_result_file_path)
+        elif exists(tmp_result_file_path):
+            remove(tmp_result_file_path)
+
+    def _is_checkpoint_saving(self):
+        """Признак записи с контрольными точками. Только для потоковой обработки csv"""
+        return (
+                self._streaming and self._checkpoint_rows
+                and isinstance(self._reader_backend, CSVReaderBackend)
+                and isinstance(self._writer_backend, CSVWriterBackend)
+        )
+
+    def _save_prepared_data_file_with_checkpoints(self):
+        """Пишет обработанные данные блоками по _checkpoint_rows исходных строк с контрольными точками
+
+        При наличии действительной точки временный файл обрезается до зафиксированного размера,
+        уже обработанные исходные строки пропускаются, запись продолжается в конец
+
+        """
+        tmp_result_file_path = self._get_tmp_result_file_path()
+        file_checkpoint = FileCheckpoint(
+            checkpoint_file_path=self._get_work_file_path('checkpoint.json'),
+            src_file_path=self._src_file_path,
+            transformer_config=self.transformer_config,
+        )
+        checkpoint = file_checkpoint.load() if exists(tmp_result_file_path) else None
+        field_names = None
+        if checkpoint:
+            self._rows_in_count = checkpoint['rows_in_count']
+            self._rows_out_count = checkpoint['rows_out_count']
+            field_names = checkpoint['field_names']
+            with open(tmp_result_file_path, 'ab') as write_obj:
+                write_obj.truncate(checkpoint['result_size'])
+
+        src_field_names, source_rows = self._get_source_rows()
+        source_rows = islice(source_rows, self._rows_in_count, None)
+        with open(tmp_result_file_path, 'a' if checkpoint else 'w') as write_obj:
+            while True:
+                started_at = perf_counter()
+                cur_block = list(islice(source_rows, self._checkpoint_rows))
+                if self._metrics is not None:
+                    self._metrics.add_stage_seconds('source', perf_counter() - started_at)
+                if not cur_block:
+                    break
+                cur_field_names = self._write_csv_rows(
+                    write_obj=write_obj,
+                    rows=self._iter_prepared_source_rows(src_field_names=src_field_names, rows=cur_block),
+                    with_header=field_names is None,
+                )
+                field_names = field_names if field_names else cur_field_names
+                write_obj.flush()
+                fsync(write_obj.fileno())
+                file_checkpoint.save(
+                    rows_in_count=self._rows_in_count,
+                    rows_out_count=self._rows_out_count,
+                    result_size=fstat(write_obj.fileno()).st_size,
+                    field_names=field_names,
+                )
+
+        self._commit_tmp_result_file()
+        file_checkpoint.remove()
+
     def _save_prepared_data_file(self):
-        """Пишет обработанные данные в результирующую директорию"""
-        result_csv_file = f'{self._dst_dir_path}/{self._filename}'
-        with open(result_csv_file, 'w') as write_obj:
-            dict_writer = DictWriter(write_obj, dialect=self._dialect, fieldnames=self._csv_file_list_of_dict[0].keys())
-            dict_writer.writeheader()
-            dict_writer.writerows(self._csv_file_list_of_dict)
+        """Пишет обработанные данные в результирующую директорию через временный файл
+
+        При ошибке записи временный файл удаляется. Временный файл записи с контрольными точками
+        сохраняется: запись продолжится с последней точки
+
+        """
+        if self._is_checkpoint_saving():
+            self._save_prepared_data_file_with_checkpoints()
+            return
+        try:
+            if self._is_tuple_result():
+                self._writer_backend.save_tuples(
+                    dst_file_path=self._get_tmp_result_file_path(),
+                    field_names=self._get_transform_spec().result_field_names,
+                    tuple_rows=self._iter_rows_for_save(),
+                    dialect=self._dialect,
+                )
+            else:
+                self._writer_backend.save_dicts(
+                    dst_file_path=self._get_tmp_result_file_path(),
+                    dict_rows=self._iter_rows_for_save(),
+                    dialect=self._dialect,
+                )
+        except Exception:
+            self._remove_tmp_result_file()
+            raise
+        self._commit_tmp_result_file()
+
+    def __getstate__(self):
+        """Состояние для передачи в процессы пула
+
+        Обработчики метрик вызываются только в исходном процессе, поэтому не передаются ни сами,
+        ни в параметрах создания. Скомпилированные функции подготовки не сериализуются
+        и компилируются в процессе заново
+
+        """
+        state = self.__dict__.copy()
+        state['_metrics_hooks'] = ()
+        if state.get('_init_kwargs') and 'metrics_hooks' in state['_init_kwargs']:
+            state['_init_kwargs'] = {
+                cur_name: cur_value for cur_name, cur_value in state['_init_kwargs'].items()
+                if cur_name != 'metrics_hooks'
+            }
+        state['_prepare_funcs'] = None
+        return state
+
+    def transform_chunk_to_part_file(self, start_offset, end_offset, part_file_path) -> tuple:
+        """Готовит часть исходного файла в файл части без заголовка
+
+        Возвращает количество исходных и подготовленных строк части и наименования полей
+
+        """
+        self._init_dialect()
+        if self._metrics is not None:
+            self._metrics = TransformMetrics(transformer_name=type(self).__name__, src_file_path=self._src_file_path)
+        started_at = perf_counter()
+        rows_in_count, rows_out_count = self._rows_in_count, self._rows_out_count
+        if self._compact_rows:
+            source_rows = self._iter_csv_tuples_in_range(start_offset=start_offset, end_offset=end_offset)
+        else:
+            source_rows = self._iter_csv_dicts_in_range(
+                start_offset=start_offset, end_offset=end_offset, field_names=self._src_field_names,
+            )
+        with open(part_file_path, 'w') as write_obj:
+            field_names = self._write_csv_rows(
+                write_obj=write_obj,
+                rows=self._iter_prepared_source_rows(src_field_names=self._src_field_names, rows=source_rows),
+                with_header=False,
+            )
+        metrics_dict = None
+        if self._metrics is not None:
+            self._add_write_stage_metrics(seconds=perf_counter() - started_at)
+            metrics_dict = self._metrics.as_dict()
+        return self._rows_in_count - rows_in_count, self._rows_out_count - rows_out_count, field_names, metrics_dict
+
+    def prepare_rows_block(self, src_field_names, rows) -> tuple:
+        """Готовит блок исходных строк, полученных _get_source_rows
+
+        Возвращает список подготовленных строк и количество исходных и подготовленных строк блока
+
+        """
+        rows_in_count, rows_out_count = self._rows_in_count, self._rows_out_count
+        prepared_rows = list(self._iter_prepared_source_rows(src_field_names=src_field_names, rows=rows))
+        return prepared_rows, self._rows_in_count - rows_in_count, self._rows_out_count - rows_out_count
+
+    def _is_pipelined_extraction(self):
+        """Признак конвейерной обработки в helpers_async_runner
+
+        Только потоковая запись csv без контрольных точек, обработки по частям и сбора метрик,
+        иначе файл обрабатывается extract_data_to_result_file в отдельном потоке
+
+        """
+        return (
+                self._streaming
+                and isinstance(self._writer_backend, CSVWriterBackend)
+                and not self._is_checkpoint_saving()
+                and not self._is_chunked_extraction()
+                and not self._metrics_hooks
+        )
+
+    def _is_chunked_extraction(self):
+        """Признак обработки файла по частям в пуле процессов. Только для бэкендов чтения частями и записи csv"""
+        return (
+                self._streaming and self._chunk_size
+                and self._reader_backend.supports_chunks
+                and isinstance(self._writer_backend, CSVWriterBackend)
+                and getsize(self._src_file_path) > self._chunk_size
+        )
+
+    def _extract_data_to_result_file_in_chunks(self):
+        """Готовит результирующий файл, обрабатывая части исходного файла в пуле процессов"""
+        from concurrent.futures import ProcessPoolExecutor
+        self.preload_shared_data_for_pool()
+        self._src_field_names = self._read_csv_field_names()
+        boundaries = find_csv_record_boundaries(
+            src_file_path=self._src_file_path,
+            chunk_size=self._chunk_size,
+            quote_char=get_dialect(self._dialect).quotechar,
+        )
+        tmp_result_file_path = self._get_tmp_result_file_path()
+        chunk_ranges = iter_chunk_ranges(boundaries=boundaries)
+        part_file_paths = tuple(
+            self._get_work_file_path(f'part{cur_index}') for cur_index in range(len(chunk_ranges))
+        )
+        try:
+            with ProcessPoolExecutor(max_workers=self._chunk_workers) as executor:
+                futures = [
+                    executor.submit(transform_csv_chunk, self, cur_start_offset, cur_end_offset, cur_part_file_path)
+                    for (cur_start_offset, cur_end_offset), cur_part_file_path in zip(chunk_ranges, part_file_paths)
+                ]
+                chunk_results = [cur_future.result() for cur_future in futures]
+
+            field_names = next((cur_result[2] for cur_result in chunk_results if cur_result[2]), None)
+            merge_started_at = perf_counter()
+            with open(tmp_result_file_path, 'w') as write_obj:
+                if field_names:
+                    DictWriter(write_obj, dialect=self._dialect, fieldnames=field_names).writeheader()
+            with open(tmp_result_file_path, 'ab') as write_obj:
+                for cur_part_file_path in part_file_paths:
+                    with open(cur_part_file_path, 'rb') as read_obj:
+                        copyfileobj(read_obj, write_obj, 1024 * 1024)
+            self._commit_tmp_result_file()
+
+            for cur_rows_in_count, cur_rows_out_count, _, cur_metrics_dict in chunk_results:
+                self.add_rows_counts(rows_in_count=cur_rows_in_count, rows_out_count=cur_rows_out_count)
+                if cur_metrics_dict:
+                    self._metrics.merge(metrics_dict=cur_metrics_dict)
+            if self._metrics is not None:
+                self._metrics.add_stage_seconds('merge', perf_counter() - merge_started_at)
+        finally:
+            for cur_part_file_path in part_file_paths:
+                if exists(cur_part_file_path):
+                    remove(cur_part_file_path)
+
+    def _add_write_stage_metrics(self, seconds):
+        """Добавляет время записи: время цикла за вычетом получения и подготовки строк"""
+        stage_seconds = self._metrics.stage_seconds
+        self._metrics.add_stage_seconds(
+            'write', max(seconds - stage_seconds['source'] - stage_seconds['prepare'] - stage_seconds['write'], 0.0)
+        )
+
+    def _finish_metrics(self, total_seconds):
+        """Завершает сбор метрик и передает их обработчикам"""
+        metrics = self._metrics
+        metrics.add_stage_seconds('total', total_seconds)
+        metrics.add_stage_seconds('parse', max(metrics.stage_seconds['source'] - metrics.stage_seconds['read'], 0.0))
+        metrics.stage_seconds.pop('source', None)
+        metrics.counters['rows_in'] = self._rows_in_count
+        metrics.counters['rows_out'] = self._rows_out_count
+        metrics.counters['bytes_in'] = getsize(self._src_file_path)
+        result_file_path = self._get_result_file_path()
+        if isdir(result_file_path):
+            metrics.counters['bytes_out'] = sum(
+                getsize(f'{result_file_path}/{cur_file_name}') for cur_file_name in listdir(result_file_path)
+            )
+        else:
+            metrics.counters['bytes_out'] = getsize(result_file_path) if exists(result_file_path) else 0
+        for cur_metrics_hook in self._metrics_hooks:
+            cur_metrics_hook.on_finish(metrics)
+
+    def _extract_data_to_result_file(self):
+        """Готовит результирующий файл, большие файлы при заданном _chunk_size - по частям в пуле процессов"""
+        if self._is_chunked_extraction():
+            self._extract_data_to_result_file_in_chunks()
+        else:
+            super(BASECSVFileTransformer, self).extract_data_to_result_file()
+
+    def extract_data_to_result_file(self):
+        """Готовит результирующий файл, при заданных обработчиках метрик - с замерами"""
+        if not self._metrics_hooks:
+            self._extract_data_to_result_file()
+            return
+
+        self._metrics = TransformMetrics(transformer_name=type(self).__name__, src_file_path=self._src_file_path)
+        started_at = perf_counter()
+        with SamplingProfiler(profile_sample_rate=self._profile_sample_rate) as profiler:
+            self._extract_data_to_result_file()
+        total_seconds = perf_counter() - started_at
+        if not self._is_chunked_extraction():
+            self._add_write_stage_metrics(seconds=total_seconds)
+        self._metrics.profile_stats = profiler.get_stats_text()
+        self._finish_metrics(total_seconds=total_seconds)
+
+
+class CSVFileTransformerBySpec(BASECSVFileTransformer):
+    """Преобразователь csv по декларативному описанию transform_spec
+
+    Позволяет добавлять новые пары источник-приемник без отдельного класса и стека миксинов:
+    вычисляемые поля задаются функциями подготовщиков, например PhoneNumberForRingerDog.prepare_phone_number_string.
+    Все строки готовятся скомпилированным описанием, transform_spec обязателен
+
+    """
+
+    def __init__(self, src_file_path, dst_dir_path, transform_spec, *args, **kwargs):
+        if transform_spec is None:
+            raise ValueError('Для CSVFileTransformerBySpec должно быть задано описание преобразования transform_spec')
+        super(CSVFileTransformerBySpec, self).__init__(
+            src_file_path=src_file_path,
+            dst_dir_path=dst_dir_path,
+            transform_spec=transform_spec,
+            *args, **kwargs
+        )
+
+    def _prepare_row(self, cur_dict):
+        """Готовит строку-словарь скомпилированным по ее ключам описанием преобразования"""
+        return self._get_compiled_spec_func(src_field_names=tuple(cur_dict))(cur_dict)
 
 
 class LeadConvToRingerDogCSVFileTransformer(
+    CSVFileTransformerWithDedupMixin,
     CSVFileTransformerWithReusableFieldsMixin,
     CSVFileTransformerWithPhonesMixin,
     BASECSVFileTransformer
@@ -77,19 +769,19 @@ class LeadConvToRingerDogCSVFileTransformer(
             *args, **kwargs
         )
 
-    def _prepare_data_for_export(self):
-        """Подготавливает данные из лид конвертера для звонопса"""
-        prepared_csv_file_list_of_dict = []
-        for cur_dict in self._csv_file_list_of_dict:
-            res_phone = self.prepared_phone_number_string(src_phone_str=cur_dict.get('phone'))
-            if len(res_phone) > 0:
-                new_dict = {}
-
-                self.append_reusable_fields_to_new_dict(cur_dict=cur_dict, new_dict=new_dict)
-                new_dict['phone'] = res_phone
-
-                prepared_csv_file_list_of_dict.append(new_dict)
-            self._csv_file_list_of_dict = prepared_csv_file_list_of_dict
+    def _create_transform_spec(self):
+        """Описание преобразования: переносимые поля и подготовленный телефон, строки без телефона отбрасываются"""
+        return TransformSpec(
+            copied_field_names=self._reusable_field_names_tuple,
+            derived_fields=(
+                DerivedFields(
+                    target_field_names=('phone',),
+                    source_field_name='phone',
+                    func=self.prepared_phone_number_string,
+                ),
+            ),
+            required_fields={'phone': 'invalid_phone'},
+        )
 
 
 class DavidPlatformToLeadConvSubscriptionTransformer(
@@ -97,13 +789,14 @@ class DavidPlatformToLeadConvSubscriptionTransformer(
     CSVFileTransformerWithFullNames,
     BASECSVFileTransformer
 ):
-    def _init_dialect(self):
-        class LeadConvSubscriptionsDialect(unix_dialect):
-            """Describe the usual properties of Unix-generated CSV files."""
-            delimiter = ','
-            quoting = QUOTE_MINIMAL
+    @classmethod
+    def preload_shared_data(cls):
+        """Загружает справочник имен до запуска пула процессов"""
+        FullNameFromDavidPlatform.preload_nature_names()
+        super(DavidPlatformToLeadConvSubscriptionTransformer, cls).preload_shared_data()
 
-        register_dialect("lead_conv_subscriptions", LeadConvSubscriptionsDialect)
+    def _init_dialect(self):
+        """Устанавливает диалект csv подписок LeadConv"""
         self._dialect = 'lead_conv_subscriptions'
 
     def __init__(
@@ -123,16 +816,15 @@ class DavidPlatformToLeadConvSubscriptionTransformer(
             *args, **kwargs
         )
 
-    def _prepare_data_for_export(self):
-        """Подготавливает данные подписок из платформы Давида для лид конвертера"""
-        prepared_csv_file_list_of_dict = []
-        for cur_dict in self._csv_file_list_of_dict:
-            new_dict = {}
-
-            self.append_reusable_fields_to_new_dict(cur_dict=cur_dict, new_dict=new_dict)
-            full_name_obj = self.get_full_name_obj(cur_dict.get('name'))
-            new_dict['first_name'] = full_name_obj.first_name
-            new_dict['last_name'] = full_name_obj.last_name
-
-            prepared_csv_file_list_of_dict.append(new_dict)
-        self._csv_file_list_of_dict = prepared_csv_file_list_of_dict
+    def _create_transform_spec(self):
+        """Описание преобразования: переносимые поля, имя и фамилия из полного имени"""
+        return TransformSpec(
+            copied_field_names=self._reusable_field_names_tuple,
+            derived_fields=(
+                DerivedFields(
+                    target_field_names=('first_name', 'last_name'),
+                    source_field_name='name',
+                    func=self.get_first_and_last_name,
+                ),
+            ),
+        )
@@ -1,3 +1,5 @@
+from helpers_cache import PreparersCache
+from helpers_dedup import DedupIndex, DEDUP_POLICIES, DEDUP_POLICY_LATEST, DEFAULT_DEDUP_MAX_KEYS_IN_MEMORY
 from preparers_for_full_names import FullName
 from preparers_for_phone_number import PhoneNumber
 
@@ -25,25 +27,64 @@ class CSVFileTransformerWithReusableFieldsMixin:
 
 
 class CSVFileTransformerWithPhonesMixin:
-    """Миксин для подготовки CSV с телефонами"""
+    """Миксин для подготовки CSV с телефонами
+
+    _phone_numbers_cache_size - размер LRU кеша подготовленных номеров по исходной строке, None - без кеша
+
+    """
     _phone_number_class = None
+    _phone_numbers_cache_size = None
+    _prepare_phone_number_func = None
 
-    def set_phone_number_class(self, phone_number_class):
-        """Сеттер класса для подготовки номера телефона"""
+    def set_phone_number_class(self, phone_number_class, phone_numbers_cache_size=None):
+        """Сеттер класса для подготовки номера телефона и размера кеша подготовленных номеров"""
         self._phone_number_class = phone_number_class
+        self._phone_numbers_cache_size = phone_numbers_cache_size
+        self._prepare_phone_number_func = None
+
+    def _init_prepare_phone_number_func(self):
+        """Инициализирует функцию подготовки номера, при заданном размере кеша - кешированную
+
+        Функция получается при первом использовании в процессе, поэтому объект
+        преобразователя можно передать в процесс пула до начала подготовки строк
+
+        """
+        self._prepare_phone_number_func = self._phone_number_class.prepare_phone_number_string
+        if self._phone_numbers_cache_size:
+            self._prepare_phone_number_func = PreparersCache().get_cached_func(
+                func=self._prepare_phone_number_func, max_size=self._phone_numbers_cache_size,
+            )
+        self._prepare_phone_number_func = self._wrap_preparer_func('phone_number', self._prepare_phone_number_func)
+        return self._prepare_phone_number_func
 
     def prepared_phone_number_string(self, src_phone_str) -> str:
         """Возвращает приготовленную строку номера телефона, согласно установленного класса"""
+        prepare_phone_number_func = self._prepare_phone_number_func
+        if prepare_phone_number_func is None:
+            if not self._phone_number_class:
+                raise AttributeError(
+                    'Аттрибут "_phone_number_class" должен быть установлен методом set_phone_number_class'
+                )
+            prepare_phone_number_func = self._init_prepare_phone_number_func()
+        return prepare_phone_number_func(src_phone_str)
+
+    def prepared_phone_number_strings(self, src_phone_strs) -> list:
+        """Возвращает список приготовленных номеров телефонов для колонки исходных строк"""
         if not self._phone_number_class:
             raise AttributeError('Аттрибут "_phone_number_class" должен быть установлен методом set_phone_number_class')
-        return self._phone_number_class(src_phone_number=src_phone_str).prepared_phone_number
+        if self._phone_numbers_cache_size:
+            return list(map(self.prepared_phone_number_string, src_phone_strs))
+        return self._phone_number_class.prepare_phone_number_strings(src_phone_numbers=src_phone_strs)
 
     def __init__(self, src_file_path, dst_dir_path,
                  reusable_field_names_tuple=(),
                  phone_number_class=PhoneNumber,
+                 phone_numbers_cache_size=None,
                  *args, **kwargs
                  ):
-        self.set_phone_number_class(phone_number_class=phone_number_class)
+        self.set_phone_number_class(
+            phone_number_class=phone_number_class, phone_numbers_cache_size=phone_numbers_cache_size,
+        )
         super(CSVFileTransformerWithPhonesMixin, self).__init__(
             src_file_path=src_file_path,
             dst_dir_path=dst_dir_path,
@@ -53,27 +94,215 @@ class CSVFileTransformerWithPhonesMixin:
 
 
 class CSVFileTransformerWithFullNames:
-    """Миксин для подготовки CSV с разделением полных имен"""
+    """Миксин для подготовки CSV с разделением полных имен
+
+    _full_names_cache_size - размер LRU кеша объектов полных имен по исходной строке, None - без кеша
+
+    """
 
     _full_names_class = None
+    _full_names_cache_size = None
+    _get_full_name_obj_func = None
 
-    def set_full_names_class(self, full_names_class):
-        """Сеттер класса для для разделения полных имен"""
+    def set_full_names_class(self, full_names_class, full_names_cache_size=None):
+        """Сеттер класса для для разделения полных имен и размера кеша полных имен"""
         self._full_names_class = full_names_class
+        self._full_names_cache_size = full_names_cache_size
+        self._get_full_name_obj_func = None
+
+    def _init_get_full_name_obj_func(self):
+        """Инициализирует функцию получения объекта полного имени, при заданном размере кеша - кешированную
+
+        Функция получается при первом использовании в процессе, поэтому объект
+        преобразователя можно передать в процесс пула до начала подготовки строк
+
+        """
+        self._get_full_name_obj_func = self._full_names_class
+        if self._full_names_cache_size:
+            self._get_full_name_obj_func = PreparersCache().get_cached_func(
+                func=self._full_names_class, max_size=self._full_names_cache_size,
+            )
+        self._get_full_name_obj_func = self._wrap_preparer_func('full_name', self._get_full_name_obj_func)
+        return self._get_full_name_obj_func
 
     def get_full_name_obj(self, src_full_name) -> FullName:
-        """Возвращает приготовленную строку номера телефона, согласно установленного класса"""
-        if not self._full_names_class:
-            raise AttributeError('Аттрибут "_full_names_class" должен быть установлен методом set_full_names_class')
-        return self._full_names_class(src_full_name=src_full_name)
+        """Возвращает объект полного имени, согласно установленного класса"""
+        get_full_name_obj_func = self._get_full_name_obj_func
+        if get_full_name_obj_func is None:
+            if not self._full_names_class:
+                raise AttributeError('Аттрибут "_full_names_class" должен быть установлен методом set_full_names_class')
+            get_full_name_obj_func = self._init_get_full_name_obj_func()
+        return get_full_name_obj_func(src_full_name)
+
+    def get_first_and_last_name(self, src_full_name) -> tuple:
+        """Возвращает имя и фамилию из полного имени
+
+        Выгрузка не содержит отдельного поля отчества, поэтому отчество остается в фамилии
+
+        """
+        full_name_obj = self.get_full_name_obj(src_full_name)
+        return full_name_obj.first_name, full_name_obj.last_and_middle_name
 
     def __init__(self, src_file_path, dst_dir_path,
                  full_names_class=FullName,
+                 full_names_cache_size=None,
                  *args, **kwargs
                  ):
-        self.set_full_names_class(full_names_class=full_names_class)
+        self.set_full_names_class(full_names_class=full_names_class, full_names_cache_size=full_names_cache_size)
         super(CSVFileTransformerWithFullNames, self).__init__(
             src_file_path=src_file_path,
             dst_dir_path=dst_dir_path,
             *args, **kwargs
         )
+
+
+class CSVFileTransformerWithDedupMixin:
+    """Миксин дедупликации подготовленных строк по ключу (helpers_dedup.DedupIndex)
+
+    _dedup_policy - политика: None - без дедупликации, first - первая строка, latest - строка с наибольшим
+    значением поля исходного файла _dedup_order_field_name (в результат поле может не переноситься),
+    merge - слияние непустых значений.
+    _dedup_key_field_name - результирующее поле ключа, например подготовленный телефон или переносимое поле.
+    _dedup_max_keys_in_memory - количество ключей (не байт) в памяти, после которого индекс сбрасывается в sqlite.
+    _dedup_index_path - общий для пакета файл индекса sqlite для дедупликации между файлами: ключ остается
+    за первым обработанным файлом, поэтому для воспроизводимого результата пакет обрабатывается с max_workers=1.
+
+    Дедупликация выполняется над всеми строками файла, поэтому контрольные точки, обработка по частям
+    и конвейерная обработка при ней не используются
+
+    """
+    _dedup_policy = None
+    _dedup_key_field_name = 'phone'
+    _dedup_order_field_name = 'updated_at'
+    _dedup_max_keys_in_memory = DEFAULT_DEDUP_MAX_KEYS_IN_MEMORY
+    _dedup_index_path = None
+
+    def set_dedup_params(self, dedup_policy, dedup_key_field_name, dedup_order_field_name, dedup_max_keys_in_memory,
+                         dedup_index_path):
+        """Сеттер параметров дедупликации"""
+        if dedup_policy and dedup_policy not in DEDUP_POLICIES:
+            raise ValueError(
+                f'Неизвестная политика дедупликации "{dedup_policy}", допустимые: {", ".join(DEDUP_POLICIES)}'
+            )
+        self._dedup_policy = dedup_policy
+        self._dedup_key_field_name = dedup_key_field_name
+        self._dedup_order_field_name = dedup_order_field_name
+        self._dedup_max_keys_in_memory = dedup_max_keys_in_memory
+        self._dedup_index_path = dedup_index_path
+
+    def _get_dedup_index(self) -> DedupIndex:
+        """Возвращает индекс дедупликации для строк результата"""
+        transform_spec = self._get_transform_spec()
+        return DedupIndex(
+            policy=self._dedup_policy,
+            key_field_name=self._dedup_key_field_name,
+            field_names=transform_spec.result_field_names if transform_spec else None,
+            tuple_rows=self._is_tuple_result(),
+            order_field_name=self._dedup_order_field_name,
+            max_keys_in_memory=self._dedup_max_keys_in_memory,
+            index_file_path=self._dedup_index_path,
+            src_file_path=self._src_file_path,
+            ordered_rows=self._dedup_policy == DEDUP_POLICY_LATEST,
+        )
+
+    def _get_source_field_names(self):
+        """Колонки исходного файла, при политике latest - вместе с полем порядка"""
+        field_names = super(CSVFileTransformerWithDedupMixin, self)._get_source_field_names()
+        if self._dedup_policy != DEDUP_POLICY_LATEST or field_names is None:
+            return field_names
+        return tuple(dict.fromkeys(field_names + (self._dedup_order_field_name,)))
+
+    def _get_ordered_prepare_func(self, prepare_row, src_field_names, tuple_rows):
+        """Оборачивает функцию подготовки для политики latest: строка готовится в пару (значение порядка, строка)
+
+        Значение порядка берется из исходной строки, поэтому поле порядка не обязано быть среди результирующих
+
+        """
+        order_field_name = self._dedup_order_field_name
+        if order_field_name not in src_field_names:
+            raise ValueError(
+                f'Поле порядка дедупликации "{order_field_name}" отсутствует в исходном файле {self._src_file_path}'
+            )
+        if tuple_rows:
+            order_index = tuple(src_field_names).index(order_field_name)
+
+            def get_order_value(cur_row):
+                return cur_row[order_index] if order_index < len(cur_row) else None
+        else:
+            def get_order_value(cur_row):
+                return cur_row.get(order_field_name)
+
+        def prepare_ordered_row(cur_row):
+            order_value = get_order_value(cur_row)
+            new_row = prepare_row(cur_row)
+            return None if new_row is None else (order_value, new_row)
+
+        return prepare_ordered_row
+
+    def _get_prepare_row_func(self, src_field_names):
+        """Функция подготовки строки-словаря, при политике latest - со значением порядка"""
+        prepare_row = super(CSVFileTransformerWithDedupMixin, self)._get_prepare_row_func(
+            src_field_names=src_field_names,
+        )
+        if self._dedup_policy != DEDUP_POLICY_LATEST:
+            return prepare_row
+        return self._get_ordered_prepare_func(prepare_row, src_field_names=src_field_names, tuple_rows=False)
+
+    def _get_prepare_tuple_func(self, src_field_names):
+        """Функция подготовки компактной строки, при политике latest - со значением порядка"""
+        prepare_row = super(CSVFileTransformerWithDedupMixin, self)._get_prepare_tuple_func(
+            src_field_names=src_field_names,
+        )
+        if self._dedup_policy != DEDUP_POLICY_LATEST:
+            return prepare_row
+        return self._get_ordered_prepare_func(prepare_row, src_field_names=src_field_names, tuple_rows=True)
+
+    def _iter_deduplicated_rows(self, rows):
+        """Генератор строк без дубликатов, отброшенные строки вычитаются из количества результирующих"""
+        dedup_index = self._get_dedup_index()
+        try:
+            yield from dedup_index.iter_rows(rows)
+            self._rows_out_count -= dedup_index.dropped_rows_count
+            self._increment_metric('rows_deduplicated', dedup_index.dropped_rows_count)
+        finally:
+            dedup_index.close()
+
+    def _iter_rows_for_save(self):
+        """Возвращает итератор подготовленных строк для сохранения, при заданной политике - без дубликатов"""
+        rows = super(CSVFileTransformerWithDedupMixin, self)._iter_rows_for_save()
+        if not self._dedup_policy:
+            return rows
+        return self._iter_deduplicated_rows(rows)
+
+    def _is_checkpoint_saving(self):
+        """Контрольные точки не используются при дедупликации"""
+        return not self._dedup_policy and super(CSVFileTransformerWithDedupMixin, self)._is_checkpoint_saving()
+
+    def _is_chunked_extraction(self):
+        """Обработка по частям не используется при дедупликации"""
+        return not self._dedup_policy and super(CSVFileTransformerWithDedupMixin, self)._is_chunked_extraction()
+
+    def _is_pipelined_extraction(self):
+        """Конвейерная обработка не используется при дедупликации"""
+        return not self._dedup_policy and super(CSVFileTransformerWithDedupMixin, self)._is_pipelined_extraction()
+
+    def __init__(self, src_file_path, dst_dir_path,
+                 dedup_policy=None,
+                 dedup_key_field_name='phone',
+                 dedup_order_field_name='updated_at',
+                 dedup_max_keys_in_memory=DEFAULT_DEDUP_MAX_KEYS_IN_MEMORY,
+                 dedup_index_path=None,
+                 *args, **kwargs
+                 ):
+        self.set_dedup_params(
+            dedup_policy=dedup_policy,
+            dedup_key_field_name=dedup_key_field_name,
+            dedup_order_field_name=dedup_order_field_name,
+            dedup_max_keys_in_memory=dedup_max_keys_in_memory,
+            dedup_index_path=dedup_index_path,
+        )
+        super(CSVFileTransformerWithDedupMixin, self).__init__(
+            src_file_path=src_file_path,
+            dst_dir_path=dst_dir_path,
+            *args, **kwargs
+        )